@@ -0,0 +1,178 @@
+"""Message activity counters, aggregated in memory.
+
+Every guild message bumps counters in a bucket for its guild and UTC day. The
+bucket counts the total, messages per hour of the day, and messages per channel
+and per author. Nothing is written per message. Every ``interval`` seconds the
+buckets become one ``$inc`` upsert each, sent as one ``bulk_write``. Buckets
+whose write fails are merged back and retried on the next flush. Stored
+buckets are one ``activity`` document per guild per day, so ``/stats`` reads at
+most one document for each day it covers.
+"""
+import asyncio
+import collections
+import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import config
+import database
+
+
+def _midnight(day: datetime.date) -> datetime.datetime:
+    # Stored as the bucket's ``date``; BSON has no plain date type.
+    return datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc)
+
+
+class Bucket:
+    __slots__ = ("total", "hours", "channels", "users")
+
+    def __init__(self):
+        self.total = 0
+        self.hours = [0] * 24
+        self.channels: collections.Counter = collections.Counter()
+        self.users: collections.Counter = collections.Counter()
+
+    def add(self, other: "Bucket"):
+        self.total += other.total
+        self.hours = [a + b for a, b in zip(self.hours, other.hours)]
+        self.channels.update(other.channels)
+        self.users.update(other.users)
+
+    def update(self) -> dict:
+        inc = {"total": self.total}
+        inc.update({f"hours.{hour}": count for hour, count in enumerate(self.hours) if count})
+        inc.update({f"channels.{channel_id}": count for channel_id, count in self.channels.items()})
+        inc.update({f"users.{user_id}": count for user_id, count in self.users.items()})
+        return {"$inc": inc}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Bucket":
+        bucket = cls()
+        bucket.total = doc.get("total", 0)
+        for hour, count in (doc.get("hours") or {}).items():
+            bucket.hours[int(hour)] += count
+        bucket.channels.update({int(k): v for k, v in (doc.get("channels") or {}).items()})
+        bucket.users.update({int(k): v for k, v in (doc.get("users") or {}).items()})
+        return bucket
+
+
+class ActivityCounter:
+    def __init__(self, interval: float = 60.0):
+        self.interval = interval
+        self.flushed = 0
+        self.retried = 0
+        self._pending: dict[tuple[int, datetime.date], Bucket] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def record(self, guild_id: int, channel_id: int, user_id: int, created_at: datetime.datetime):
+        moment = created_at.astimezone(datetime.timezone.utc)
+        key = (guild_id, moment.date())
+        bucket = self._pending.get(key)
+        if bucket is None:
+            bucket = self._pending[key] = Bucket()
+        bucket.total += 1
+        bucket.hours[moment.hour] += 1
+        bucket.channels[channel_id] += 1
+        bucket.users[user_id] += 1
+
+    def pending(self, guild_id: int, since: datetime.date) -> Bucket:
+        """Counts for ``guild_id`` that have not been flushed yet."""
+        merged = Bucket()
+        for (pending_guild, day), bucket in list(self._pending.items()):
+            if pending_guild == guild_id and day >= since:
+                merged.add(bucket)
+        return merged
+
+    def _load_stored(self, guild_id: int, since: datetime.date) -> Bucket:
+        merged = Bucket()
+        docs = database.get_database().activity.find(
+            {"guild_id": guild_id, "date": {"$gte": _midnight(since)}}, {"_id": 0, "guild_id": 0, "date": 0}
+        )
+        for doc in docs:
+            merged.add(Bucket.from_doc(doc))
+        return merged
+
+    async def load(self, guild_id: int, days: int) -> Bucket:
+        """Counts for the last ``days`` UTC days, today included."""
+        since = datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=days - 1)
+        # The stored days are read off the loop; pending counts are merged on it, where they change.
+        merged = await asyncio.to_thread(self._load_stored, guild_id, since)
+        merged.add(self.pending(guild_id, since))
+        return merged
+
+    async def flush(self):
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            keys = list(pending)
+            requests = [
+                UpdateOne({"guild_id": guild_id, "date": _midnight(day)}, pending[guild_id, day].update(), upsert=True)
+                for guild_id, day in keys
+            ]
+            try:
+                await asyncio.to_thread(database.get_database().activity.bulk_write, requests, ordered=False)
+                self.flushed += len(requests)
+                return
+            except BulkWriteError as e:
+                # The other upserts were applied; retrying them would count twice.
+                failed = sorted({error["index"] for error in e.details.get("writeErrors", [])})
+                reason = e
+            except Exception as e:
+                failed = range(len(keys))
+                reason = e
+            print(f"Activity counters will retry {len(failed)} bucket(s): {reason}")
+            self.flushed += len(keys) - len(failed)
+            self.retried += len(failed)
+            for index in failed:
+                key = keys[index]
+                bucket = self._pending.get(key)
+                if bucket is None:
+                    self._pending[key] = pending[key]
+                else:
+                    bucket.add(pending[key])
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            async with self._flush_lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+_counter: ActivityCounter | None = None
+
+
+def get_counter() -> ActivityCounter:
+    global _counter
+    if _counter is None:
+        _counter = ActivityCounter(config.config_data.activity.interval)
+    return _counter
+
+
+def record(message) -> None:
+    if config.config_data.activity.enabled:
+        get_counter().record(message.guild.id, message.channel.id, message.author.id, message.created_at)
+
+
+def start() -> None:
+    get_counter().start()
+
+
+async def stop() -> None:
+    global _counter
+    if _counter is not None:
+        await _counter.stop()
+        _counter = None
@@ -0,0 +1,153 @@
+"""Spam detection on the message path, kept entirely in memory.
+
+Each member (per guild) and each channel has a fixed-size ring of recent
+message times. A check pushes one timestamp and compares it with the entry a
+fixed number of messages back, so every message costs O(1) whatever the
+thresholds are. Nothing here touches the database. The moderation cog
+only looks up settings and acts when a rule trips.
+
+Member rules: ``flood`` (too many messages in a short window), ``duplicate``
+(the same text repeated back to back) and ``mentions`` (too many mentions in
+one message). Channel rules: ``slowmode`` and, for a heavier burst, ``lock``.
+"""
+import time
+
+from cachetools import LRUCache
+
+import config
+
+
+class Ring:
+    """The last ``size`` timestamps, oldest overwritten first."""
+
+    __slots__ = ("_items", "_next", "count")
+
+    def __init__(self, size: int):
+        self._items = [0.0] * size
+        self._next = 0
+        self.count = 0
+
+    def push(self, value: float):
+        self._items[self._next] = value
+        self._next = (self._next + 1) % len(self._items)
+        self.count += 1
+
+    def back(self, n: int) -> float | None:
+        """The entry pushed ``n`` pushes ago (1 is the latest), or None if there is none yet."""
+        if n > min(self.count, len(self._items)):
+            return None
+        return self._items[(self._next - n) % len(self._items)]
+
+
+class _MemberWindow:
+    __slots__ = ("times", "last_text", "streak", "streak_started", "acted_at")
+
+    def __init__(self, size: int):
+        self.times = Ring(size)
+        self.last_text = None
+        self.streak = 0
+        self.streak_started = 0.0
+        self.acted_at = float("-inf")
+
+
+class _ChannelWindow:
+    __slots__ = ("times", "acted_at", "acted")
+
+    def __init__(self, size: int):
+        self.times = Ring(size)
+        self.acted_at = float("-inf")
+        self.acted = None
+
+
+class Automod:
+    def __init__(self, settings):
+        self.settings = settings
+        self._members: LRUCache = LRUCache(maxsize=settings.tracked)
+        self._channels: LRUCache = LRUCache(maxsize=settings.tracked)
+
+    def _member_rule(self, message, now: float) -> str | None:
+        s = self.settings
+        key = (message.guild.id, message.author.id)
+        window = self._members.get(key)
+        if window is None:
+            window = self._members[key] = _MemberWindow(s.flood_messages)
+        window.times.push(now)
+
+        text = message.content.strip().lower()
+        if text and text == window.last_text and now - window.streak_started <= s.duplicate_seconds:
+            window.streak += 1
+        else:
+            window.last_text, window.streak, window.streak_started = text or None, 1, now
+
+        if now - window.acted_at < s.cooldown:
+            return None
+        rule = None
+        if len(message.mentions) + len(getattr(message, "role_mentions", ())) >= s.mention_limit:
+            rule = "mentions"
+        elif window.streak >= s.duplicate_messages:
+            rule = "duplicate"
+        else:
+            oldest = window.times.back(s.flood_messages)
+            if oldest is not None and now - oldest <= s.flood_seconds:
+                rule = "flood"
+        if rule is not None:
+            window.acted_at = now
+        return rule
+
+    def _channel_rule(self, message, now: float) -> str | None:
+        s = self.settings
+        window = self._channels.get(message.channel.id)
+        if window is None:
+            window = self._channels[message.channel.id] = _ChannelWindow(s.lock_messages)
+        window.times.push(now)
+        rule = None
+        oldest = window.times.back(s.lock_messages)
+        if oldest is not None and now - oldest <= s.channel_seconds:
+            rule = "lock"
+        else:
+            oldest = window.times.back(s.slowmode_messages)
+            if oldest is not None and now - oldest <= s.channel_seconds:
+                rule = "slowmode"
+        # A burst that keeps growing past slowmode still gets locked within the cooldown.
+        if rule is None or (now - window.acted_at < s.cooldown and (rule, window.acted) != ("lock", "slowmode")):
+            return None
+        window.acted_at, window.acted = now, rule
+        return rule
+
+    def check(self, message, now: float | None = None) -> tuple[str | None, str | None]:
+        """The member rule and the channel rule ``message`` trips, each possibly None."""
+        now = time.monotonic() if now is None else now
+        return self._member_rule(message, now), self._channel_rule(message, now)
+
+
+_automod: Automod | None = None
+
+
+def get_automod() -> Automod:
+    global _automod
+    settings = config.config_data.automod
+    # After /reloadconfig, start over with the new thresholds and ring sizes.
+    if _automod is None or _automod.settings is not settings:
+        _automod = Automod(settings)
+    return _automod
+
+
+def reset() -> None:
+    global _automod
+    _automod = None
+
+
+class AutomodContext:
+    """Stands in for a command context when automod acts as the bot itself."""
+
+    __slots__ = ("guild", "channel", "author", "message")
+
+    def __init__(self, message):
+        self.guild = message.guild
+        self.channel = message.channel
+        self.author = message.guild.me
+        # Keeps the offending message's attachments out of the warning.
+        self.message = None
+
+    async def send(self, *args, **kwargs):
+        return await self.channel.send(*args, **kwargs)
@@ -0,0 +1,90 @@
+"""Run the offline benchmarks: ``python -m benchmarks [workload ...]``."""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from benchmarks.harness import Harness
+from benchmarks.workloads import WORKLOADS
+
+_COLUMNS = ("calls", "ops/s", "p50 ms", "p95 ms", "p99 ms", "db ops", "db max", "budget", "over", "api", "errors")
+
+
+def _format(name: str, elapsed: float, summaries: list[dict]) -> str:
+    total = sum(s["calls"] for s in summaries)
+    lines = [f"{name}: {total} handler runs in {elapsed:.2f}s ({total / elapsed:.0f}/s)"]
+    width = max([len(s["name"]) for s in summaries] + [7])
+    lines.append("  " + "handler".ljust(width) + "".join(c.rjust(9) for c in _COLUMNS))
+    for s in summaries:
+        row = (
+            s["calls"], f"{s['throughput']:.0f}", f"{s['p50_ms']:.2f}", f"{s['p95_ms']:.2f}",
+            f"{s['p99_ms']:.2f}", f"{s['db_ops']:.1f}", s["db_ops_max"],
+            "-" if s["db_budget"] is None else s["db_budget"], s["over_budget"], f"{s['api_calls']:.1f}", s["errors"],
+        )
+        lines.append("  " + s["name"].ljust(width) + "".join(str(v).rjust(9) for v in row))
+    return "\n".join(lines)
+
+
+def _redis_client(url: str | None):
+    if not url:
+        return None
+    import redis
+    return redis.Redis.from_url(url, decode_responses=True)
+
+
+async def run(names, count, db_latency, api_latency, seed, redis_url=None, storage="mongo") -> dict:
+    results = {}
+    for name in names:
+        workload, default_count = WORKLOADS[name]
+        async with Harness(db_latency=db_latency, api_latency=api_latency, redis=_redis_client(redis_url),
+                           storage=storage) as h:
+            started = time.perf_counter()
+            await workload(h, count or default_count, random.Random(seed))
+            elapsed = time.perf_counter() - started
+            summaries = [stats.summary() for stats in h.stats.values()]
+        results[name] = {"elapsed": elapsed, "handlers": summaries}
+        print(_format(name, elapsed, summaries))
+        print()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scripted workloads against the cogs with fake Discord and MongoDB")
+    parser.add_argument("workloads", nargs="*", choices=[[], *WORKLOADS], metavar="workload",
+                        help=f"one or more of: {', '.join(WORKLOADS)} (default: all)")
+    parser.add_argument("-n", "--count", type=int, default=0, help="workload size (default: per workload)")
+    parser.add_argument("--storage", choices=("mongo", "sqlite"), default="mongo",
+                        help="in-memory MongoDB stand-in, or the embedded store on a temporary SQLite file")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated round-trip per database operation")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="simulated round-trip per Discord API call")
+    parser.add_argument("--redis-url", help="run the shared cache against this Redis instead of the in-process fake")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--check-budgets", action="store_true",
+                        help="exit with status 1 if any handler exceeded its database round-trip budget")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(
+        args.workloads or list(WORKLOADS), args.count,
+        args.db_latency_ms / 1000, args.api_latency_ms / 1000, args.seed, args.redis_url, args.storage,
+    ))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.check_budgets:
+        over = [
+            f"{name}: {s['name']} exceeded {s['db_budget']} round-trips in {s['over_budget']} run(s), worst {s['db_ops_max']}"
+            for name, result in results.items()
+            for s in result["handlers"]
+            if s["over_budget"]
+        ]
+        for line in over:
+            print(line)
+        if over:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Message firehose through the registered on_message listeners.
+
+``python -m benchmarks.firehose`` replays synthetic guild chatter. By default each
+message is handled before the next one is sent, which measures peak throughput.
+With ``--rate`` messages arrive on a fixed schedule, one task each like the gateway
+dispatches them. Latency is then counted from the scheduled arrival, so the
+reported rate and p99 show whether that rate is sustainable.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+
+import health
+from benchmarks.harness import Harness
+from fakes.discord_objects import FakeMessage
+
+_WORDS = ("lol", "anyone", "up", "for", "a", "game", "tonight", "did", "you", "see", "the", "patch",
+          "notes", "gg", "brb", "that", "was", "wild", "ok", "thanks", "nice", "what", "time", "is", "it")
+
+
+@dataclass(frozen=True, slots=True)
+class FirehoseConfig:
+    guilds: int = 5
+    members: int = 200
+    channels: int = 5
+    afk_ratio: float = 0.1
+    mention_density: float = 0.3
+    max_mentions: int = 3
+    bot_ratio: float = 0.05
+    command_ratio: float = 0.02
+
+
+class Firehose:
+    """Builds guilds in the harness's fake Discord and yields messages for them.
+
+    AFK members are marked in the database up front and only ever get mentioned.
+    Authors are never AFK, so the AFK ratio holds for the whole run.
+    """
+
+    def __init__(self, harness: Harness, settings: FirehoseConfig, rng: random.Random):
+        self.settings = settings
+        self.rng = rng
+        self.guilds = []
+        afk_docs = []
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for i in range(settings.guilds):
+            guild = harness.world.guild(f"Guild {i}", members=settings.members, channels=settings.channels)
+            regulars = [m for m in guild.members if m.name.startswith("member")]
+            away = set(rng.sample(regulars, round(len(regulars) * settings.afk_ratio)))
+            afk_docs.extend({"user_id": m.id, "message": "brb", "set_at": now} for m in away)
+            authors = [m for m in regulars if m not in away]
+            self.guilds.append((guild, authors, regulars, guild.add_member("webhook", bot=True)))
+        if afk_docs:
+            harness.db.afk.insert_many(afk_docs)
+        self.afk_members = len(afk_docs)
+
+    def message(self) -> FakeMessage:
+        rng, settings = self.rng, self.settings
+        guild, authors, regulars, bot = rng.choice(self.guilds)
+        author = bot if rng.random() < settings.bot_ratio else rng.choice(authors)
+        words = rng.choices(_WORDS, k=rng.randint(1, 12))
+        if rng.random() < settings.command_ratio:
+            words.insert(0, "a.rep")
+        mentions = []
+        if rng.random() < settings.mention_density:
+            mentions = rng.sample(regulars, rng.randint(1, settings.max_mentions))
+            words.extend(m.mention for m in mentions)
+        return FakeMessage(rng.choice(guild.channels), author, " ".join(words), mentions=mentions)
+
+
+async def run_closed(h: Harness, firehose: Firehose, count: int) -> list[float]:
+    for _ in range(count):
+        await h.dispatch("message", firehose.message())
+    return h.stats["on_message"].latencies
+
+
+async def run_open(h: Harness, firehose: Firehose, count: int, rate: float) -> list[float]:
+    loop = asyncio.get_running_loop()
+    listeners = h.listeners("message")
+    latencies: list[float] = []
+
+    async def handle(message, scheduled):
+        for method in listeners:
+            await method(message)
+        latencies.append(loop.time() - scheduled)
+
+    tasks = []
+    start = loop.time()
+    for i in range(count):
+        scheduled = start + i / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handle(firehose.message(), scheduled)))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+async def run(settings: FirehoseConfig, count: int, rate: float, db_latency: float, seed: int,
+              storage: str = "mongo") -> dict:
+    async with Harness(db_latency=db_latency, storage=storage) as h:
+        firehose = Firehose(h, settings, random.Random(seed))
+        db_before, api_before = h.db.operations, h.world.api_calls
+        started = time.perf_counter()
+        if rate:
+            latencies = await run_open(h, firehose, count, rate)
+        else:
+            latencies = await run_closed(h, firehose, count)
+        elapsed = time.perf_counter() - started
+        db_ops, api_calls = h.db.operations - db_before, h.world.api_calls - api_before
+    p50, p95, p99 = (health.percentile(latencies, q) * 1000 for q in (50, 95, 99))
+    return {
+        "settings": asdict(settings),
+        "storage": storage,
+        "messages": count,
+        "target_rate": rate or None,
+        "elapsed": elapsed,
+        "messages_per_second": count / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": max(latencies) * 1000,
+        "db_ops_per_message": db_ops / count,
+        "api_calls_per_message": api_calls / count,
+        "afk_members": firehose.afk_members,
+    }
+
+
+def main():
+    defaults = FirehoseConfig()
+    parser = argparse.ArgumentParser(description="Drive the on_message listeners with synthetic guild traffic")
+    parser.add_argument("-n", "--messages", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=0.0, help="arrivals per second (default: as fast as handled)")
+    parser.add_argument("--guilds", type=int, default=defaults.guilds)
+    parser.add_argument("--members", type=int, default=defaults.members, help="members per guild")
+    parser.add_argument("--channels", type=int, default=defaults.channels, help="channels per guild")
+    parser.add_argument("--afk-ratio", type=float, default=defaults.afk_ratio, help="fraction of members marked AFK")
+    parser.add_argument("--mention-density", type=float, default=defaults.mention_density,
+                        help="fraction of messages that mention someone")
+    parser.add_argument("--max-mentions", type=int, default=defaults.max_mentions)
+    parser.add_argument("--bot-ratio", type=float, default=defaults.bot_ratio, help="fraction of messages sent by bots")
+    parser.add_argument("--command-ratio", type=float, default=defaults.command_ratio,
+                        help="fraction of messages that are prefix commands")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated round-trip per database operation")
+    parser.add_argument("--storage", choices=("mongo", "sqlite"), default="mongo")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    settings = FirehoseConfig(
+        guilds=args.guilds, members=args.members, channels=args.channels, afk_ratio=args.afk_ratio,
+        mention_density=args.mention_density, max_mentions=args.max_mentions,
+        bot_ratio=args.bot_ratio, command_ratio=args.command_ratio,
+    )
+    result = asyncio.run(run(settings, args.messages, args.rate, args.db_latency_ms / 1000, args.seed, args.storage))
+    target = f" (target {result['target_rate']:.0f}/s)" if result["target_rate"] else ""
+    print(f"{result['messages']} messages in {result['elapsed']:.2f}s: {result['messages_per_second']:.0f} msg/s{target}")
+    print(f"latency p50 {result['p50_ms']:.2f}ms  p95 {result['p95_ms']:.2f}ms  "
+          f"p99 {result['p99_ms']:.2f}ms  max {result['max_ms']:.2f}ms")
+    print(f"{result['db_ops_per_message']:.2f} database operations and "
+          f"{result['api_calls_per_message']:.2f} API calls per message, {result['afk_members']} AFK members")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import dataclasses
+import os
+import tempfile
+import time
+import uuid
+
+import discord
+from discord.ext import commands
+
+import activity
+import automod
+import config
+import database
+import health
+import http_client
+import leaderboard
+import metrics
+import pipeline
+import shared_cache
+import translation
+import write_buffer
+from fakes import meme_api
+from fakes.discord_objects import FakeContext, FakeDiscord
+from fakes.mongo import MemoryDatabase
+from fakes.redis import FakeRedis
+from fakes.translator import StubTranslator
+
+COGS = ("qol", "moderation", "language", "fun", "utilities")
+
+
+class _BenchBot(commands.Bot):
+    # Never connects, so there is no gateway heartbeat to measure.
+    latency = 0.0
+
+
+class Stats:
+    """Samples for one command or listener within a workload."""
+
+    __slots__ = ("name", "budget", "latencies", "db_ops", "api_calls", "errors", "over_budget")
+
+    def __init__(self, name: str, budget: int | None = None):
+        self.name = name
+        self.budget = budget
+        self.latencies: list[float] = []
+        self.db_ops: list[int] = []
+        self.api_calls: list[int] = []
+        self.errors = 0
+        self.over_budget = 0
+
+    @property
+    def calls(self) -> int:
+        return len(self.latencies)
+
+    def summary(self) -> dict:
+        busy = sum(self.latencies)
+        p50, p95, p99 = (health.percentile(self.latencies, q) for q in (50, 95, 99))
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "throughput": self.calls / busy if busy else 0.0,
+            "p50_ms": (p50 or 0.0) * 1000,
+            "p95_ms": (p95 or 0.0) * 1000,
+            "p99_ms": (p99 or 0.0) * 1000,
+            "db_ops": sum(self.db_ops) / self.calls if self.calls else 0.0,
+            "db_ops_max": max(self.db_ops, default=0),
+            "db_budget": self.budget,
+            "over_budget": self.over_budget,
+            "api_calls": sum(self.api_calls) / self.calls if self.calls else 0.0,
+        }
+
+
+class Harness:
+    """Loads the cogs into a bot that never logs in, backed by fakes.
+
+    The bot uses a local meme API stub, the stub translator and, depending on
+    ``storage``, either an in-memory MongoDB stand-in or the embedded SQLite store
+    in a temporary file.
+    The shared cache runs on a fake Redis unless a real ``redis`` client is passed.
+    Command callbacks are called directly, so permission checks and argument
+    conversion are skipped. What is measured is the handler body.
+    """
+
+    def __init__(self, db_latency: float = 0.0, api_latency: float = 0.0, cogs=COGS, redis=None,
+                 storage: str = "mongo"):
+        self._tempdir = tempfile.TemporaryDirectory() if storage == "sqlite" else None
+        path = os.path.join(self._tempdir.name, "bench.sqlite3") if self._tempdir else None
+        self.db = MemoryDatabase(latency=db_latency, path=path)
+        self.redis = redis if redis is not None else FakeRedis()
+        self.world = FakeDiscord(api_latency=api_latency)
+        self.cogs = cogs
+        self.bot: commands.Bot | None = None
+        self.stats: dict[str, Stats] = {}
+        self._meme_runner = None
+        self._saved = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    async def start(self):
+        self._saved = (database._database, config.config_data)
+        self._meme_runner, meme_url = await meme_api.start()
+        compiled = config.config_data
+        config.config_data = dataclasses.replace(
+            compiled,
+            meme=dataclasses.replace(compiled.meme, api_url=meme_url, subreddits=()),
+            # Fake ids repeat between runs, so keep each run's keys apart on a real Redis.
+            shared_cache=dataclasses.replace(compiled.shared_cache, prefix=f"arbor-bench-{uuid.uuid4().hex[:8]}"),
+        )
+        database._database = self.db
+        database.ensure_indexes(self.db)
+        shared_cache.set_client(self.redis)
+        leaderboard.reset()
+        automod.reset()
+        translation.set_backend(StubTranslator())
+        write_buffer.start()
+        activity.start()
+        self.bot = _BenchBot(command_prefix=pipeline.PREFIX, intents=discord.Intents.none(), help_command=None)
+        await self.bot.__aenter__()
+        for name in self.cogs:
+            await self.bot.load_extension(f"cogs.{name}")
+
+    async def stop(self):
+        if self.bot is not None:
+            for name in list(self.bot.extensions):
+                await self.bot.unload_extension(name)
+            await self.bot.close()
+        await write_buffer.stop()
+        await activity.stop()
+        await http_client.close_session()
+        if self._meme_runner is not None:
+            await self._meme_runner.cleanup()
+        if self._saved is not None:
+            shared_cache.close()
+            database._database, config.config_data = self._saved
+            translation.set_backend(None)
+        leaderboard.reset()
+        automod.reset()
+        self.db.close()
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def context(self, author, channel, attachments=None) -> FakeContext:
+        return FakeContext(self.bot, author, channel, attachments=attachments)
+
+    def reset(self):
+        self.stats = {}
+
+    def _stats(self, name: str, budget: int | None) -> Stats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = Stats(name, budget)
+        return stats
+
+    def budget_violations(self) -> list[Stats]:
+        return [stats for stats in self.stats.values() if stats.over_budget]
+
+    async def invoke(self, name: str, ctx: FakeContext, *args, **kwargs):
+        """Run the callback of the command ``name`` (qualified, e.g. ``"remind set"``) under ``ctx``."""
+        command = self.bot.get_command(name)
+        if command is None:
+            raise LookupError(f"no command named {name!r}")
+        ctx.command = command
+        budget = metrics.budget_of(command.callback)
+        invocation = metrics.begin("command", command.qualified_name, budget)
+        coro = command.callback(command.cog, ctx, *args, **kwargs)
+        await self._measure(command.qualified_name, coro, invocation, budget)
+
+    def listeners(self, event: str) -> list:
+        listeners = [
+            method
+            for cog in self.bot.cogs.values()
+            for name, method in cog.get_listeners()
+            if name == f"on_{event}"
+        ]
+        if event == "message":
+            # The bot listens with the pipeline, which carries its stages' budgets.
+            listeners.append(pipeline.get_pipeline())
+        return listeners
+
+    async def dispatch(self, event: str, *args):
+        """Run every listener for ``event`` in turn, timed as one handler.
+
+        The budget is the sum of the listeners' budgets, or None if any listener has none.
+        """
+        listeners = self.listeners(event)
+        budgets = [metrics.budget_of(method) for method in listeners]
+        budget = None if None in budgets else sum(budgets)
+
+        async def run():
+            for method in listeners:
+                await method(*args)
+
+        await self._measure(f"on_{event}", run(), None, budget)
+
+    async def _measure(self, name: str, coro, invocation, budget: int | None):
+        stats = self._stats(name, budget)
+        db_before, api_before = self.db.operations, self.world.api_calls
+        failed = False
+        started = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            failed = True
+            stats.errors += 1
+            print(f"{name} raised {type(e).__name__}: {e}")
+        finally:
+            stats.latencies.append(time.perf_counter() - started)
+            db_ops = self.db.operations - db_before
+            stats.db_ops.append(db_ops)
+            if budget is not None and db_ops > budget:
+                stats.over_budget += 1
+            stats.api_calls.append(self.world.api_calls - api_before)
+            metrics.finish(invocation, failed)
@@ -0,0 +1,77 @@
+"""Micro-benchmark for the shared time parser.
+
+``python -m benchmarks.timeparse`` parses a mix of the expressions users type for
+reminders, schedules, locks and slowmode. It reports the cost per call with
+every text compiled fresh (memo cleared) and with the memo warm, as it is once
+the same few phrases keep coming back.
+"""
+import argparse
+import json
+import random
+import time
+
+import timeparse
+
+_WHEN = (
+    "10m", "1h30m", "2 hours 15 minutes", "in 2 hours", "in 45 minutes", "tomorrow 9:00", "tomorrow at 9am",
+    "21:00", "9pm", "noon", "friday 18:00", "next monday at 10:30", "12/31/2026 18:00", "2026-12-31 18:00",
+    "1d", "in 1 week", "hello", "tomorrow 9",
+)
+_DURATIONS = ("10m", "2h", "1h30m", "1d", "1:30", "30s", "2 hours", "5 minutes 30 seconds", "off")
+
+
+def _time(calls: list, clear: bool) -> float:
+    started = time.perf_counter()
+    for fn, args in calls:
+        if clear:
+            timeparse._compile_when.cache_clear()
+            timeparse._compile_duration.cache_clear()
+        fn(*args)
+    return time.perf_counter() - started
+
+
+def run(count: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    zones = [timeparse.UTC, timeparse.zone("Europe/Berlin"), timeparse.zone("America/New_York")]
+    calls = [
+        (timeparse.parse_when, (rng.choice(_WHEN), rng.choice(zones))) if rng.random() < 0.7
+        else (timeparse.parse_duration, (rng.choice(_DURATIONS),))
+        for _ in range(count)
+    ]
+    # The clearing itself is timed on its own and subtracted from the cold run.
+    started = time.perf_counter()
+    for _ in calls:
+        timeparse._compile_when.cache_clear()
+        timeparse._compile_duration.cache_clear()
+    clearing = time.perf_counter() - started
+    cold = _time(calls, clear=True) - clearing
+    _time(calls, clear=False)
+    warm = _time(calls, clear=False)
+    info = timeparse._compile_when.cache_info()
+    return {
+        "calls": count,
+        "cold_us": cold / count * 1e6,
+        "warm_us": warm / count * 1e6,
+        "speedup": cold / warm if warm else 0.0,
+        "memo_hits": info.hits,
+        "memo_misses": info.misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the shared time-expression parser with and without its memo")
+    parser.add_argument("-n", "--calls", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the result as JSON")
+    args = parser.parse_args()
+
+    result = run(args.calls, args.seed)
+    print(f"{result['calls']} parses: {result['cold_us']:.2f}us each uncached, "
+          f"{result['warm_us']:.2f}us memoized ({result['speedup']:.1f}x)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Scripted workloads. Each takes a started Harness, a size and a seeded Random."""
+import random
+
+from benchmarks.firehose import Firehose, FirehoseConfig
+from benchmarks.harness import Harness
+from fakes.discord_objects import FakeMessage
+
+
+def _member(guild, name: str):
+    return next(m for m in guild.members if m.name == name)
+
+
+def _regulars(guild):
+    return [m for m in guild.members if m.name.startswith("member")]
+
+
+async def warn_storm(h: Harness, count: int, rng: random.Random):
+    """A moderator warns members in quick succession, then reviews their history."""
+    guild = h.world.guild(members=25)
+    moderator = _member(guild, "moderator")
+    channel = guild.channels[0]
+    targets = _regulars(guild)
+    for i in range(count):
+        await h.invoke("warn", h.context(moderator, channel), rng.choice(targets), f"spam #{i}")
+    for member in targets[:10]:
+        await h.invoke("warnings", h.context(moderator, channel), member)
+
+
+async def reminder_burst(h: Harness, count: int, rng: random.Random):
+    """Many users set reminders at once, list them and cancel some."""
+    guild = h.world.guild(members=50)
+    channel = guild.channels[0]
+    users = _regulars(guild)
+    for i in range(count):
+        when = f"{rng.randint(1, 120)}m"
+        await h.invoke("remind set", h.context(rng.choice(users), channel), when, what=f"task {i}")
+    for user in users:
+        await h.invoke("remind list", h.context(user, channel))
+    for doc in list(h.db.reminders.docs[: count // 4]):
+        author = guild.get_member(doc["user_id"])
+        await h.invoke("remind cancel", h.context(author, channel), str(doc["_id"]))
+
+
+async def message_firehose(h: Harness, count: int, rng: random.Random):
+    """Guild chatter through the message listeners with the default firehose mix."""
+    firehose = Firehose(h, FirehoseConfig(), rng)
+    for _ in range(count):
+        await h.dispatch("message", firehose.message())
+
+
+async def automod_raid(h: Harness, count: int, rng: random.Random):
+    """Raiders flood, repeat and mass-mention in a guild that turned automod on."""
+    guild = h.world.guild(members=40, channels=3)
+    h.db.moderation_settings.insert_one({"guild_id": guild.id, "automod": True})
+    raiders = _regulars(guild)
+    for i in range(count):
+        author = rng.choice(raiders)
+        if rng.random() < 0.3:
+            message = FakeMessage(rng.choice(guild.channels), author, "join my server")
+        elif rng.random() < 0.1:
+            message = FakeMessage(rng.choice(guild.channels), author, "hey", mentions=rng.sample(raiders, 8))
+        else:
+            message = FakeMessage(rng.choice(guild.channels), author, f"spam {i}")
+        await h.dispatch("message", message)
+
+
+async def command_mix(h: Harness, count: int, rng: random.Random):
+    """A spread of everyday commands from ordinary members and a moderator."""
+    guild = h.world.guild(members=50)
+    moderator = _member(guild, "moderator")
+    channel = guild.channels[0]
+    users = _regulars(guild)
+    for _ in range(count):
+        user = rng.choice(users)
+        ctx = h.context(user, channel)
+        other = rng.choice(users)
+        step = rng.randrange(10)
+        if step == 0:
+            await h.invoke("userinfo", ctx, other)
+        elif step == 1:
+            await h.invoke("rep", ctx, other)
+        elif step == 2:
+            await h.invoke("language", ctx, rng.choice(("en", "de", "fr", None)))
+        elif step == 3:
+            await h.invoke("information", ctx)
+        elif step == 4:
+            await h.invoke("coinflip", ctx)
+        elif step == 5:
+            await h.invoke("8ball", ctx, question="will it ship?")
+        elif step == 6:
+            await h.invoke("meme", ctx)
+        elif step == 7:
+            await h.invoke("avatar", ctx, other)
+        elif step == 8:
+            await h.invoke("lock", h.context(moderator, channel), "10m", reason="raid")
+            await h.invoke("unlock", h.context(moderator, channel), reason="calm")
+        else:
+            await h.invoke("slowmode", h.context(moderator, channel), rng.choice(("off", "10s", "2m")))
+
+
+WORKLOADS = {
+    "warn_storm": (warn_storm, 500),
+    "reminder_burst": (reminder_burst, 500),
+    "message_firehose": (message_firehose, 5000),
+    "automod_raid": (automod_raid, 1000),
+    "command_mix": (command_mix, 1000),
+}
@@ -1,37 +1,155 @@
+import time
+
+_BOOT_STARTED = time.perf_counter()
+
 import discord
 from discord.ext import commands
+import asyncio
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
+import activity
+import cluster
 import config
+import database
+import diagnostics
+import health
+import http_client
 import i18n
+import metrics
+import pipeline
+import shared_cache
+import write_buffer
 
 load_dotenv()
 
 token = os.getenv('prodtoken')
 
-if token:
-    client = commands.Bot(command_prefix='a.', intents=discord.Intents.all(), help_command=None)
-    
-    async def load_cogs():
-        for filename in os.listdir('./cogs'):
-            if filename.endswith('.py'):
-                await client.load_extension(f'cogs.{filename[:-3]}')
-    
-    @client.event
-    async def on_ready():
+_TREE_HASH_PATH = os.path.join(os.path.dirname(__file__), '.command_tree_hash')
+
+
+class Arbor(commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.database_task: asyncio.Task | None = None
+        self.cold_start_ms: int | None = None
+        self.metrics_runner = None
+        self.cluster_reporter: cluster.ClusterReporter | None = None
+        metrics.install(self)
+        self.add_listener(pipeline.dispatch, 'on_message')
+
+    async def setup_hook(self):
+        # Runs in the background so the gateway handshake does not wait on MongoDB.
+        self.database_task = asyncio.create_task(self.connect_database())
+        http_client.get_session()
         i18n.load_locales()
-        await load_cogs()
+        await self.load_cogs()
+        # Every cluster shares one command tree; syncing it once is enough.
+        if cluster.is_primary():
+            await self.sync_tree()
+        health.start()
+        write_buffer.start()
+        activity.start()
+        self.cluster_reporter = cluster.ClusterReporter(self, config.config_data.sharding.status_interval)
+        self.cluster_reporter.start()
+        if config.config_data.watchdog.enabled:
+            diagnostics.start_watchdog(config.config_data.watchdog.threshold, config.config_data.watchdog.interval)
+        settings = config.config_data.metrics
+        if settings.enabled:
+            port = settings.port + cluster.get_cluster().id
+            self.metrics_runner = await metrics.start_server(settings.host, port)
+            print(f'Serving metrics on http://{settings.host}:{port}/metrics')
+
+    async def connect_database(self):
+        started = time.perf_counter()
         try:
-            synced = await client.tree.sync()
+            await asyncio.to_thread(database.connect_database)
+        except Exception as e:
+            print(f'Database unavailable: {e}')
+            return
+        connected_ms = round((time.perf_counter() - started) * 1000)
+        ping = await asyncio.to_thread(database.ping_database)
+        print(f'Database connected in {connected_ms}ms, ping: {ping}ms')
+
+    async def load_cogs(self):
+        cogs_dir = os.path.join(os.path.dirname(__file__), 'cogs')
+        names = [f'cogs.{filename[:-3]}' for filename in sorted(os.listdir(cogs_dir)) if filename.endswith('.py')]
+        results = await asyncio.gather(*(self.load_extension(name) for name in names), return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f'Failed to load {name}: {result}')
+
+    def tree_hash(self) -> str:
+        payload = {
+            'application_id': self.application_id,
+            'commands': sorted(
+                (command.to_dict(self.tree) for command in self.tree.get_commands()),
+                key=lambda c: (c.get('type', 1), c['name']),
+            ),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    async def sync_tree(self):
+        current = self.tree_hash()
+        try:
+            with open(_TREE_HASH_PATH, 'r', encoding='utf-8') as f:
+                stored = f.read().strip()
+        except OSError:
+            stored = None
+        if current == stored:
+            print('Command tree unchanged, skipping sync')
+            return
+        try:
+            synced = await self.tree.sync()
             print(f'Synced {len(synced)} command(s)')
         except Exception as e:
             print(f'Failed to sync commands: {e}')
+            return
+        with open(_TREE_HASH_PATH, 'w', encoding='utf-8') as f:
+            f.write(current)
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            if self.cluster_reporter is not None:
+                await self.cluster_reporter.stop()
+            await write_buffer.stop()
+            await activity.stop()
+            await health.stop()
+            diagnostics.stop_watchdog()
+            if self.metrics_runner is not None:
+                await self.metrics_runner.cleanup()
+            await http_client.close_session()
+            shared_cache.close()
+
+
+class ShardedArbor(Arbor, commands.AutoShardedBot):
+    pass
+
+
+if token:
+    cluster_info = cluster.get_cluster()
+    client = (ShardedArbor if cluster_info.sharded else Arbor)(
+        command_prefix=pipeline.PREFIX,
+        **config.config_data.cache.client_options(config.config_data.intents.intents),
+        **cluster_info.client_options(),
+        help_command=None,
+        activity=discord.CustomActivity(name="in development"),
+    )
+
+    @client.event
+    async def on_ready():
+        if client.cold_start_ms is None:
+            client.cold_start_ms = round((time.perf_counter() - _BOOT_STARTED) * 1000)
+            print(f'Cold start took {client.cold_start_ms}ms')
         print(f'{config.config_data.bot.name} has got a connection to discord')
+        if cluster_info.sharded:
+            print(f'running as {cluster_info.label()}')
         print(f'bot id is: {client.user.id}')
         print(f'connected to {len(client.guilds)} servers')
 
-        await client.change_presence(activity=discord.CustomActivity(name="in development"))
-    
     client.run(token)
 else:
     print('set token in .env lol')
@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import os
+
+import config
+import database
+import health
+
+# Set by launcher.py for each worker process.
+_ENV_CLUSTER_ID = 'ARBOR_CLUSTER_ID'
+_ENV_CLUSTER_COUNT = 'ARBOR_CLUSTER_COUNT'
+_ENV_SHARD_IDS = 'ARBOR_SHARD_IDS'
+_ENV_SHARD_COUNT = 'ARBOR_SHARD_COUNT'
+
+
+class ClusterInfo:
+    """Which slice of the bot this process runs. Cluster 0 is the primary."""
+
+    __slots__ = ('id', 'count', 'shard_ids', 'shard_count')
+
+    def __init__(self, cluster_id: int = 0, count: int = 1, shard_ids: list[int] | None = None,
+                 shard_count: int | None = None):
+        self.id = cluster_id
+        self.count = count
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+
+    @property
+    def primary(self) -> bool:
+        return self.id == 0
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_ids is not None or config.config_data.sharding.enabled
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """Whether this cluster's shards receive events for ``guild_id``."""
+        if self.shard_ids is None or not self.shard_count:
+            return True
+        return (int(guild_id) >> 22) % self.shard_count in self.shard_ids
+
+    def client_options(self) -> dict:
+        if not self.sharded:
+            return {}
+        shard_count = self.shard_count or config.config_data.sharding.shard_count or None
+        options = {'shard_count': shard_count}
+        if self.shard_ids is not None:
+            options['shard_ids'] = self.shard_ids
+        return options
+
+    def label(self) -> str:
+        if self.shard_ids is None:
+            return f'cluster {self.id}/{self.count}'
+        return f'cluster {self.id}/{self.count}, shards {format_shards(self.shard_ids)} of {self.shard_count}'
+
+
+def format_shards(shard_ids: list[int]) -> str:
+    if not shard_ids:
+        return '-'
+    if shard_ids == list(range(shard_ids[0], shard_ids[-1] + 1)):
+        return str(shard_ids[0]) if len(shard_ids) == 1 else f'{shard_ids[0]}-{shard_ids[-1]}'
+    return ','.join(map(str, shard_ids))
+
+
+def _from_env() -> ClusterInfo:
+    shard_ids = os.getenv(_ENV_SHARD_IDS)
+    shard_count = os.getenv(_ENV_SHARD_COUNT)
+    return ClusterInfo(
+        cluster_id=int(os.getenv(_ENV_CLUSTER_ID, '0')),
+        count=int(os.getenv(_ENV_CLUSTER_COUNT, '1')),
+        shard_ids=[int(s) for s in shard_ids.split(',') if s] if shard_ids else None,
+        shard_count=int(shard_count) if shard_count else None,
+    )
+
+
+def worker_env(cluster_id: int, count: int, shard_ids: list[int], shard_count: int) -> dict[str, str]:
+    return {
+        _ENV_CLUSTER_ID: str(cluster_id),
+        _ENV_CLUSTER_COUNT: str(count),
+        _ENV_SHARD_IDS: ','.join(map(str, shard_ids)),
+        _ENV_SHARD_COUNT: str(shard_count),
+    }
+
+
+_cluster: ClusterInfo | None = None
+
+
+def get_cluster() -> ClusterInfo:
+    global _cluster
+    if _cluster is None:
+        _cluster = _from_env()
+    return _cluster
+
+
+def is_primary() -> bool:
+    """Singleton background work (reminders, schedules) runs only on the primary cluster."""
+    return get_cluster().primary
+
+
+def owns_guild(guild_id: int) -> bool:
+    return get_cluster().owns_guild(guild_id)
+
+
+class ClusterReporter:
+    """Writes this cluster's health to the cluster_status collection on an interval."""
+
+    def __init__(self, bot, interval: float):
+        self.bot = bot
+        self.interval = interval
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self) -> dict:
+        info = get_cluster()
+        latencies = getattr(self.bot, 'latencies', None) or [(info.shard_ids[0] if info.shard_ids else 0, self.bot.latency)]
+        _, lag_p99 = health.get_sampler().loop_lag.percentiles(50, 99)
+        return {
+            '_id': info.id,
+            'cluster_id': info.id,
+            'cluster_count': info.count,
+            'pid': os.getpid(),
+            'shard_ids': info.shard_ids,
+            'shard_count': info.shard_count or getattr(self.bot, 'shard_count', None),
+            'guilds': len(self.bot.guilds),
+            'latencies': {str(shard): round(latency * 1000) for shard, latency in latencies if latency == latency},
+            'loop_lag_p99': lag_p99,
+            'ready': self.bot.is_ready(),
+            'started_at': self.started_at,
+            'updated_at': datetime.datetime.now(datetime.timezone.utc),
+        }
+
+    def _write(self, doc: dict):
+        database.get_database().cluster_status.replace_one({'_id': doc['_id']}, doc, upsert=True)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await asyncio.to_thread(self._write, self.snapshot())
+            except Exception as e:
+                print(f'Failed to report cluster status: {e}')
+            await asyncio.sleep(self.interval)
+
+
+def read_statuses() -> list[dict]:
+    return list(database.get_database().cluster_status.find().sort('cluster_id', 1))
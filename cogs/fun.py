@@ -3,14 +3,41 @@ from discord.ext import commands
 import random
 from typing import Optional
 import aiohttp
+import config
 import i18n
+import metrics
+import memes
 
 class FunCog(commands.Cog):
 
     def __init__(self, client):
         self.client = client
+        self.meme_buffer = memes.MemeBuffer(
+            config.config_data.meme.api_url,
+            batch_size=config.config_data.meme.batch_size,
+            capacity=config.config_data.meme.buffer_size,
+        )
+        self.reddit_feed = None
+        if config.config_data.meme.subreddits:
+            self.reddit_feed = memes.RedditFeed(
+                config.config_data.meme.subreddits,
+                listing=config.config_data.meme.reddit_listing,
+                batch_size=config.config_data.meme.reddit_batch_size,
+                refresh_seconds=config.config_data.meme.reddit_refresh_seconds,
+            )
+
+    async def cog_load(self):
+        self.meme_buffer.start()
+        if self.reddit_feed is not None:
+            self.reddit_feed.start()
+
+    async def cog_unload(self):
+        await self.meme_buffer.stop()
+        if self.reddit_feed is not None:
+            await self.reddit_feed.stop()
 
     @commands.hybrid_command(name="coinflip", description="Flip a coin - heads or tails!")
+    @metrics.db_budget(3)
     async def coinflip(self, ctx):
         label = random.choice([
             i18n.t(ctx.author.id, "fun.coin_heads"),
@@ -19,11 +46,13 @@ class FunCog(commands.Cog):
         await ctx.send(i18n.t(ctx.author.id, "fun.coinflip_result", result=label))
 
     @commands.hybrid_command(name="dice", description="Roll a dice - 1-6!")
+    @metrics.db_budget(1)
     async def dice(self, ctx):
         result = random.randint(1, 6)
         await ctx.send(i18n.t(ctx.author.id, "fun.dice_result", result=result))
 
     @commands.hybrid_command(name="8ball", description="Ask the magic 8-ball a yes/no question")
+    @metrics.db_budget(2)
     async def eight_ball(self, ctx, *, question: str):
         responses = i18n.tr(ctx.author.id, "fun.8ball_responses")
         if not isinstance(responses, list) or not responses:
@@ -32,19 +61,22 @@ class FunCog(commands.Cog):
         await ctx.send(i18n.t(ctx.author.id, "fun.8ball_format", question=question, answer=answer))
 
     @commands.hybrid_command(name="meme", description="Get a random meme from the internet")
+    @metrics.db_budget(1)
     async def meme(self, ctx):
+        meme_url = self.reddit_feed.pop() if self.reddit_feed is not None else None
+        if not meme_url:
+            meme_url = self.meme_buffer.pop()
+        if meme_url:
+            await ctx.send(meme_url)
+            return
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get("https://meme-api.com/gimme") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        meme_url = data.get("url")
-                        if meme_url:
-                            await ctx.send(meme_url)
-                        else:
-                            await ctx.send(i18n.t(ctx.author.id, "fun.meme_parse_fail"))
-                    else:
-                        await ctx.send(i18n.t(ctx.author.id, "fun.meme_api_status", status=response.status))
+            urls = await memes.fetch_memes(self.meme_buffer.api_url, 1)
+            if urls:
+                await ctx.send(urls[0])
+            else:
+                await ctx.send(i18n.t(ctx.author.id, "fun.meme_parse_fail"))
+        except memes.MemeAPIError as e:
+            await ctx.send(i18n.t(ctx.author.id, "fun.meme_api_status", status=e.status))
         except aiohttp.ClientError:
             await ctx.send(i18n.t(ctx.author.id, "fun.meme_client_error"))
         except Exception as e:
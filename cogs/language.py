@@ -1,9 +1,13 @@
+import datetime
+
 import discord
 from discord.ext import commands
 from discord import app_commands
 
 import i18n
+import metrics
 import config
+import timeparse
 
 
 class Language(commands.Cog):
@@ -15,10 +19,11 @@ class Language(commands.Cog):
         code="Language code (e.g., en, es). If omitted, shows your current setting.",
         show_all="If true, list all available languages"
     )
+    @metrics.db_budget(6)
     async def language(self, ctx, code: str | None = None, show_all: bool = False):
         user_id = ctx.author.id
         emojis = config.config_data.emojis
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
 
         # Show current setting UI
         if code is None:
@@ -80,6 +85,47 @@ class Language(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name="timezone", description="Set the timezone used for times you type")
+    @app_commands.describe(zone="e.g. Europe/Berlin, America/New_York or UTC+2. If omitted, shows your current setting.")
+    @metrics.db_budget(3)
+    async def timezone(self, ctx, zone: str | None = None):
+        user_id = ctx.author.id
+        emojis = config.config_data.emojis
+        color = config.config_data.colors.embed_color
+
+        if zone is None:
+            tz = i18n.get_user_timezone(user_id)
+            embed = discord.Embed(
+                title=f"{emojis.menu} " + i18n.t(user_id, "language.timezone_title"),
+                color=color
+            )
+            embed.add_field(
+                name=f"{emojis.tick} " + i18n.t(user_id, "language.timezone_current_field"),
+                value=f"`{timeparse.zone_name(tz)}` ({datetime.datetime.now(tz):%H:%M})",
+                inline=False
+            )
+            embed.set_footer(text=i18n.t(user_id, "language.timezone_hint"))
+            await ctx.send(embed=embed)
+            return
+
+        tz = timeparse.zone(zone)
+        if tz is None:
+            embed = discord.Embed(
+                title=f"{emojis.error} " + i18n.t(user_id, "language.timezone_title"),
+                description=i18n.t(user_id, "language.timezone_unknown", zone=zone),
+                color=color
+            )
+            await ctx.send(embed=embed)
+            return
+        name = timeparse.zone_name(tz)
+        i18n.set_user_timezone(user_id, name)
+        embed = discord.Embed(
+            title=f"{emojis.tick} " + i18n.t(user_id, "language.timezone_title"),
+            description=i18n.t(user_id, "language.timezone_set", zone=name, time=f"{datetime.datetime.now(tz):%H:%M}"),
+            color=color
+        )
+        await ctx.send(embed=embed)
+
 
 async def setup(client):
     await client.add_cog(Language(client))
@@ -2,11 +2,18 @@ import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 import datetime
-import re
+import automod
+import cluster
 import database
 from pymongo import ReturnDocument
 import config
 import i18n
+import metrics
+import pipeline
+import records
+import shared_cache
+import timeparse
+import write_buffer
 
 class Moderation(commands.Cog):
     def __init__(self, client):
@@ -17,50 +24,26 @@ class Moderation(commands.Cog):
         if not self.check_expired_locks.is_running():
             self.check_expired_locks.start()
 
-    def parse_time(self, time_str):
-        if not time_str:
-            return None
-        now = datetime.datetime.now(datetime.timezone.utc)
-        patterns = [
-            (r"^(\d+)s$", lambda m: datetime.timedelta(seconds=int(m.group(1)))),
-            (r"^(\d+)m$", lambda m: datetime.timedelta(minutes=int(m.group(1)))),
-            (r"^(\d+)h$", lambda m: datetime.timedelta(hours=int(m.group(1)))),
-            (r"^(\d+)d$", lambda m: datetime.timedelta(days=int(m.group(1)))),
-            (r"^(\d+):(\d+)$", lambda m: datetime.timedelta(hours=int(m.group(1)), minutes=int(m.group(2)))),
-        ]
-        for pat, conv in patterns:
-            m = re.match(pat, time_str.strip())
-            if m:
-                delta = conv(m)
-                return now + delta if isinstance(delta, datetime.timedelta) else delta
-        return None
-
     def _get_db(self):
         return database.get_database()
 
-    def _get_settings(self, guild_id: int) -> dict:
-        db = self._get_db()
-        doc = db.moderation_settings.find_one({"guild_id": guild_id}) or {}
-        default = {
-            "guild_id": guild_id,
-            "logs_channel_id": None,
-            "log_warnings": True,
-            "log_locks": True,
-            "log_slowmode": True,
-            "notify_dm": True,
-        }
-        default.update({k: doc.get(k, default[k]) for k in default.keys()})
-        return default
+    def _load_settings(self, guild_id: int) -> dict:
+        return self._get_db().moderation_settings.find_one({"guild_id": guild_id}, records.Settings.PROJECTION) or {}
+
+    def _get_settings(self, guild_id: int) -> records.Settings:
+        doc = shared_cache.get_cache("moderation_settings").get(guild_id, lambda: self._load_settings(guild_id))
+        return records.Settings.from_doc(guild_id, doc)
 
     def _save_settings(self, guild_id: int, **updates):
         db = self._get_db()
         db.moderation_settings.update_one(
             {"guild_id": guild_id}, {"$set": updates}, upsert=True
         )
+        shared_cache.get_cache("moderation_settings").invalidate(guild_id)
 
     def _get_logs_channel(self, guild: discord.Guild) -> discord.TextChannel | None:
         settings = self._get_settings(guild.id)
-        ch_id = settings.get("logs_channel_id")
+        ch_id = settings.logs_channel_id
         if ch_id:
             ch = guild.get_channel(int(ch_id))
             if isinstance(ch, discord.TextChannel):
@@ -93,28 +76,28 @@ class Moderation(commands.Cog):
         if member.id == ctx.author.id:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.cannot_warn_self"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await ctx.send(embed=embed)
             return
         if member.bot:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.cannot_warn_bot"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await ctx.send(embed=embed)
             return
         if ctx.guild.owner_id == member.id:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.cannot_warn_owner"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await ctx.send(embed=embed)
             return
         if ctx.author != ctx.guild.owner and member.top_role >= ctx.author.top_role:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.cannot_warn_higher"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await ctx.send(embed=embed)
             return
@@ -122,7 +105,7 @@ class Moderation(commands.Cog):
         if isinstance(me, discord.Member) and member.top_role >= me.top_role:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.bot_cannot_warn_higher"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await ctx.send(embed=embed)
             return
@@ -153,7 +136,7 @@ class Moderation(commands.Cog):
         }
         db.warnings.insert_one(doc)
         total = db.warnings.count_documents({"guild_id": ctx.guild.id, "user_id": member.id})
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         try:
             dm = discord.Embed(
                 title=f"{config.config_data.emojis.warning} " + i18n.t(member.id, "moderation.warning_dm_title"),
@@ -181,7 +164,7 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         try:
             settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_warnings"):
+            if settings.log_warnings:
                 log = discord.Embed(
                     title=f"{config.config_data.emojis.moderation} " + i18n.t(ctx.author.id, "moderation.warn_success_title"),
                     color=color
@@ -225,22 +208,23 @@ class Moderation(commands.Cog):
     async def _apply_unlock(self, channel: discord.TextChannel, reason: str, moderator: discord.Member):
         db = self._get_db()
         coll = db.channel_locks
-        active = coll.find_one({"channel_id": channel.id, "guild_id": channel.guild.id, "active": True})
+        doc = coll.find_one({"channel_id": channel.id, "guild_id": channel.guild.id, "active": True}, records.Lock.PROJECTION)
+        active = records.Lock.from_doc(doc) if doc else None
         restored = False
-        if active is not None and active.get("previous_overwrites"):
-            for entry in active["previous_overwrites"]:
-                role = channel.guild.get_role(entry["role_id"])
+        if active is not None and active.previous_overwrites:
+            for role_id, prev in active.previous_overwrites:
+                role = channel.guild.get_role(role_id)
                 if role is None:
                     continue
-                await channel.set_permissions(role, send_messages=entry.get("prev", None), reason=reason or "Channel unlocked")
+                await channel.set_permissions(role, send_messages=prev, reason=reason or "Channel unlocked")
             restored = True
         if not restored:
             default_role = channel.guild.default_role
-            prev = active.get("previous_send_messages", None) if active else None
+            prev = active.previous_send_messages if active else None
             await channel.set_permissions(default_role, send_messages=prev, reason=reason or "Channel unlocked")
         if active is not None:
-            coll.update_one({"_id": active["_id"]}, {"$set": {"active": False, "released_at": datetime.datetime.now(datetime.timezone.utc)}})
-        coll.insert_one({
+            coll.update_one({"_id": active.id}, {"$set": {"active": False, "released_at": datetime.datetime.now(datetime.timezone.utc)}})
+        write_buffer.get_buffer().insert("channel_locks", {
             "guild_id": channel.guild.id,
             "channel_id": channel.id,
             "moderator_id": moderator.id,
@@ -249,24 +233,11 @@ class Moderation(commands.Cog):
             "created_at": datetime.datetime.now(datetime.timezone.utc),
         })
 
-    @commands.hybrid_command(name="lock", description="Lock the current channel with optional duration and reason")
-    @app_commands.describe(duration="e.g. 10m, 2h, 1d", reason="Reason for locking")
-    @commands.has_permissions(manage_channels=True, manage_roles=True)
-    @commands.bot_has_permissions(manage_channels=True, manage_roles=True)
-    async def lock(self, ctx, duration: str = None, *, reason: str = None):
-        target = ctx.channel
-        expires_at = self.parse_time(duration) if duration else None
-        if duration and not expires_at:
-            if reason is None:
-                reason = duration
-                duration = None
-            else:
-                await ctx.send(i18n.t(ctx.author.id, "errors.invalid_duration_format"))
-                return
-        prev = await self._apply_lock(target, reason, ctx.author, expires_at)
+    async def _lock_channel(self, ctx, target: discord.TextChannel, reason: str | None, expires_at: datetime.datetime | None):
+        await self._apply_lock(target, reason, ctx.author, expires_at)
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "moderation.channel_locked"),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         embed.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
         if reason:
@@ -276,10 +247,10 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         try:
             settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_locks"):
+            if settings.log_locks:
                 log = discord.Embed(
                     title=i18n.t(ctx.author.id, "moderation.channel_locked"),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
+                    color=config.config_data.colors.embed_color
                 )
                 log.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
                 if reason:
@@ -291,16 +262,71 @@ class Moderation(commands.Cog):
         except Exception:
             pass
 
+    async def _set_slowmode(self, ctx, target: discord.TextChannel, seconds: int, reason: str | None) -> bool:
+        """Apply and announce the slowmode; False, with nothing sent, if Discord refused it."""
+        seconds = min(max(seconds, 0), 21600)
+        try:
+            await target.edit(slowmode_delay=seconds, reason=reason or "Slowmode updated")
+        except Exception as e:
+            print(f"Failed to set slowmode in {target.id}: {e}")
+            return False
+
+        embed = discord.Embed(
+            title=i18n.t(ctx.author.id, "moderation.slowmode_set"),
+            color=config.config_data.colors.embed_color
+        )
+        embed.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
+        sm_value = i18n.t(ctx.author.id, "moderation.slowmode_off") if seconds == 0 else f"{seconds}s"
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.slowmode_label"), value=sm_value, inline=True)
+        if reason:
+            embed.add_field(name=i18n.t(ctx.author.id, "generic.reason"), value=reason, inline=True)
+        await ctx.send(embed=embed)
+        try:
+            settings = self._get_settings(ctx.guild.id)
+            if settings.log_slowmode:
+                log = discord.Embed(
+                    title=i18n.t(ctx.author.id, "moderation.slowmode_set"),
+                    color=config.config_data.colors.embed_color
+                )
+                log.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
+                log.add_field(name=i18n.t(ctx.author.id, "moderation.slowmode_label"), value=sm_value, inline=True)
+                if reason:
+                    log.add_field(name=i18n.t(ctx.author.id, "generic.reason"), value=reason, inline=True)
+                log.add_field(name=i18n.t(ctx.author.id, "generic.moderator"), value=str(ctx.author), inline=True)
+                await self._log(ctx.guild, log)
+        except Exception:
+            pass
+        return True
+
+    @commands.hybrid_command(name="lock", description="Lock the current channel with optional duration and reason")
+    @app_commands.describe(duration="e.g. 10m, 2h, 1d", reason="Reason for locking")
+    @commands.has_permissions(manage_channels=True, manage_roles=True)
+    @commands.bot_has_permissions(manage_channels=True, manage_roles=True)
+    @metrics.db_budget(4)
+    async def lock(self, ctx, duration: str = None, *, reason: str = None):
+        target = ctx.channel
+        delta = timeparse.parse_duration(duration)
+        expires_at = datetime.datetime.now(datetime.timezone.utc) + delta if delta else None
+        if duration and not expires_at:
+            if reason is None:
+                reason = duration
+                duration = None
+            else:
+                await ctx.send(i18n.t(ctx.author.id, "errors.invalid_duration_format"))
+                return
+        await self._lock_channel(ctx, target, reason, expires_at)
+
     @commands.hybrid_command(name="unlock", description="Unlock the current channel and optionally state a reason")
     @app_commands.describe(reason="Reason for unlocking")
     @commands.has_permissions(manage_channels=True, manage_roles=True)
     @commands.bot_has_permissions(manage_channels=True, manage_roles=True)
+    @metrics.db_budget(5)
     async def unlock(self, ctx, *, reason: str = None):
         target = ctx.channel
         await self._apply_unlock(target, reason, ctx.author)
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "moderation.channel_unlocked"),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         embed.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
         if reason:
@@ -310,17 +336,17 @@ class Moderation(commands.Cog):
             note = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.channel_unlocked"),
                 description=i18n.t(ctx.author.id, "moderation.unlocked_note"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await target.send(embed=note)
         except Exception:
             pass
         try:
             settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_locks"):
+            if settings.log_locks:
                 log = discord.Embed(
                     title=i18n.t(ctx.author.id, "moderation.channel_unlocked"),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
+                    color=config.config_data.colors.embed_color
                 )
                 log.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
                 if reason:
@@ -334,6 +360,7 @@ class Moderation(commands.Cog):
     @app_commands.describe(duration="e.g. off, 0, 10s, 2m, 1h", reason="Reason for changing slowmode")
     @commands.has_permissions(manage_channels=True)
     @commands.bot_has_permissions(manage_channels=True)
+    @metrics.db_budget(3)
     async def slowmode(self, ctx, duration: str, *, reason: str = None):
         target: discord.TextChannel = ctx.channel
 
@@ -345,61 +372,20 @@ class Moderation(commands.Cog):
                 return 0
             if s.isdigit():
                 return int(s)
-            m = re.match(r"^(\d+)s$", s)
-            if m:
-                return int(m.group(1))
-            m = re.match(r"^(\d+)m$", s)
-            if m:
-                return int(m.group(1)) * 60
-            m = re.match(r"^(\d+)h$", s)
-            if m:
-                return int(m.group(1)) * 3600
-            return None
+            delta = timeparse.parse_duration(s)
+            return int(delta.total_seconds()) if delta is not None else None
 
         seconds = parse_slowmode(duration)
         if seconds is None:
             await ctx.send(i18n.t(ctx.author.id, "errors.invalid_duration_format"))
             return
-        if seconds < 0:
-            seconds = 0
-        if seconds > 21600:
-            seconds = 21600
-
-        try:
-            await target.edit(slowmode_delay=seconds, reason=reason or "Slowmode updated")
-        except Exception:
+        if not await self._set_slowmode(ctx, target, seconds, reason):
             await ctx.send(i18n.t(ctx.author.id, "errors.invalid_duration_format"))
-            return
-
-        embed = discord.Embed(
-            title=i18n.t(ctx.author.id, "moderation.slowmode_set"),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
-        )
-        embed.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
-        sm_value = i18n.t(ctx.author.id, "moderation.slowmode_off") if seconds == 0 else f"{seconds}s"
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.slowmode_label"), value=sm_value, inline=True)
-        if reason:
-            embed.add_field(name=i18n.t(ctx.author.id, "generic.reason"), value=reason, inline=True)
-        await ctx.send(embed=embed)
-        try:
-            settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_slowmode"):
-                log = discord.Embed(
-                    title=i18n.t(ctx.author.id, "moderation.slowmode_set"),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
-                )
-                log.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target.mention, inline=True)
-                log.add_field(name=i18n.t(ctx.author.id, "moderation.slowmode_label"), value=sm_value, inline=True)
-                if reason:
-                    log.add_field(name=i18n.t(ctx.author.id, "generic.reason"), value=reason, inline=True)
-                log.add_field(name=i18n.t(ctx.author.id, "generic.moderator"), value=str(ctx.author), inline=True)
-                await self._log(ctx.guild, log)
-        except Exception:
-            pass
 
     @commands.hybrid_command(name="warn", description="Warn a member with a reason")
     @app_commands.describe(member="Member to warn", reason="Reason for the warning", evidence="Optional attachment evidence")
     @commands.has_permissions(moderate_members=True)
+    @metrics.db_budget(7)
     async def warn(self, ctx, member: discord.Member, reason: str, evidence: discord.Attachment | None = None):
         await self._issue_warning(ctx, member, reason, evidence)
 
@@ -408,12 +394,17 @@ class Moderation(commands.Cog):
     @commands.hybrid_group(name="warnings", description="View warnings", invoke_without_command=True)
     @app_commands.describe(user="User to view warnings for")
     @commands.has_permissions(moderate_members=True)
+    @metrics.db_budget(4)
     async def warnings(self, ctx, user: discord.Member | None = None):
         target = user or ctx.author
         db = self._get_db()
-        cursor = db.warnings.find({"guild_id": ctx.guild.id, "user_id": target.id}).sort("created_at", -1)
-        items = list(cursor)
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        query = {"guild_id": ctx.guild.id, "user_id": target.id}
+        limit = 10
+        items = [
+            records.Warning.from_doc(doc)
+            for doc in db.warnings.find(query, records.Warning.LIST_PROJECTION).sort("created_at", -1).limit(limit)
+        ]
+        color = config.config_data.colors.embed_color
         embed = discord.Embed(
             title=f"{config.config_data.emojis.moderation} " + i18n.t(ctx.author.id, "moderation.warnings_for_title", user=str(target)),
             color=color
@@ -423,16 +414,16 @@ class Moderation(commands.Cog):
             await ctx.send(embed=embed)
             return
         lines = []
-        for idx, w in enumerate(items[:10], start=1):
-            ts = int(w["created_at"].timestamp()) if isinstance(w.get("created_at"), datetime.datetime) else int(datetime.datetime.now(datetime.timezone.utc).timestamp())
-            mod = ctx.guild.get_member(w.get("moderator_id"))
-            mod_name = mod.mention if isinstance(mod, discord.Member) else str(w.get("moderator_id"))
-            reason = w.get("reason", "")
+        for idx, w in enumerate(items, start=1):
+            ts = int((w.created_at or datetime.datetime.now(datetime.timezone.utc)).timestamp())
+            mod = ctx.guild.get_member(w.moderator_id)
+            mod_name = mod.mention if isinstance(mod, discord.Member) else str(w.moderator_id)
+            reason = w.reason
             if len(reason) > 128:
                 reason = reason[:125] + "..."
-            lines.append(f"{config.config_data.emojis.right} `#{w.get('case_id')}` • <t:{ts}:R> • {i18n.t(ctx.author.id, 'generic.moderator')}: {mod_name}\n{i18n.t(ctx.author.id, 'generic.reason')}: {reason}")
+            lines.append(f"{config.config_data.emojis.right} `#{w.case_id}` • <t:{ts}:R> • {i18n.t(ctx.author.id, 'generic.moderator')}: {mod_name}\n{i18n.t(ctx.author.id, 'generic.reason')}: {reason}")
         embed.description = "\n\n".join(lines)
-        total = len(items)
+        total = db.warnings.count_documents(query) if len(items) == limit else len(items)
         embed.add_field(name=i18n.t(ctx.author.id, "moderation.total_warnings"), value=str(total), inline=True)
         embed.set_footer(text=i18n.t(ctx.author.id, "generic.requested_by", name=str(ctx.author)))
         await ctx.send(embed=embed)
@@ -442,8 +433,8 @@ class Moderation(commands.Cog):
     @commands.has_permissions(moderate_members=True)
     async def warnings_case(self, ctx, case_id: int):
         db = self._get_db()
-        doc = db.warnings.find_one({"guild_id": ctx.guild.id, "case_id": int(case_id)})
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        doc = db.warnings.find_one({"guild_id": ctx.guild.id, "case_id": int(case_id)}, records.Warning.PROJECTION)
+        color = config.config_data.colors.embed_color
         if not doc:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.warnings_case_not_found"),
@@ -451,33 +442,34 @@ class Moderation(commands.Cog):
             )
             await ctx.send(embed=embed)
             return
-        user = ctx.guild.get_member(doc.get("user_id"))
-        mod = ctx.guild.get_member(doc.get("moderator_id"))
-        when = doc.get("created_at")
-        ts = int(when.timestamp()) if isinstance(when, datetime.datetime) else int(datetime.datetime.now(datetime.timezone.utc).timestamp())
+        warning = records.Warning.from_doc(doc)
+        user = ctx.guild.get_member(warning.user_id)
+        mod = ctx.guild.get_member(warning.moderator_id)
+        ts = int((warning.created_at or datetime.datetime.now(datetime.timezone.utc)).timestamp())
         embed = discord.Embed(
-            title=f"{config.config_data.emojis.moderation} " + i18n.t(ctx.author.id, "moderation.warnings_case_title", case=str(doc.get("case_id"))),
+            title=f"{config.config_data.emojis.moderation} " + i18n.t(ctx.author.id, "moderation.warnings_case_title", case=str(warning.case_id)),
             color=color
         )
-        embed.add_field(name=i18n.t(ctx.author.id, "generic.user"), value=f"{user.mention if isinstance(user, discord.Member) else doc.get('user_id')}", inline=True)
-        embed.add_field(name=i18n.t(ctx.author.id, "generic.moderator"), value=f"{mod.mention if isinstance(mod, discord.Member) else doc.get('moderator_id')}", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "generic.user"), value=f"{user.mention if isinstance(user, discord.Member) else warning.user_id}", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "generic.moderator"), value=f"{mod.mention if isinstance(mod, discord.Member) else warning.moderator_id}", inline=True)
         embed.add_field(name=i18n.t(ctx.author.id, "generic.when"), value=f"<t:{ts}:R>", inline=True)
-        embed.add_field(name=i18n.t(ctx.author.id, "generic.reason"), value=doc.get("reason", ""), inline=False)
-        att = doc.get("attachment")
-        if isinstance(att, dict) and att.get("url"):
-            embed.add_field(name=i18n.t(ctx.author.id, "generic.attachment"), value=f"[\u200b]({att['url']})", inline=False)
-        embed.set_footer(text=f"#{doc.get('case_id')}")
+        embed.add_field(name=i18n.t(ctx.author.id, "generic.reason"), value=warning.reason, inline=False)
+        if warning.attachment_url:
+            embed.add_field(name=i18n.t(ctx.author.id, "generic.attachment"), value=f"[\u200b]({warning.attachment_url})", inline=False)
+        embed.set_footer(text=f"#{warning.case_id}")
         await ctx.send(embed=embed)
 
     @warnings.command(name="add", description="Add a warning to a member")
     @app_commands.describe(member="Member to warn", reason="Reason for the warning", evidence="Optional attachment evidence")
     @commands.has_permissions(moderate_members=True)
+    @metrics.db_budget(7)
     async def warnings_add(self, ctx, member: discord.Member, reason: str, evidence: discord.Attachment | None = None):
         await self._issue_warning(ctx, member, reason, evidence)
 
     @warnings.command(name="list", description="List warnings for a user")
     @app_commands.describe(user="User to list warnings for")
     @commands.has_permissions(moderate_members=True)
+    @metrics.db_budget(4)
     async def warnings_list(self, ctx, user: discord.Member | None = None):
         await self.warnings(ctx, user)
 
@@ -487,7 +479,7 @@ class Moderation(commands.Cog):
     async def warnings_remove(self, ctx, case_id: int):
         db = self._get_db()
         res = db.warnings.find_one_and_delete({"guild_id": ctx.guild.id, "case_id": int(case_id)})
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         if not res:
             embed = discord.Embed(
                 title=f"{config.config_data.emojis.warning} " + i18n.t(ctx.author.id, "moderation.warnings_case_not_found"),
@@ -503,7 +495,7 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         try:
             settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_warnings"):
+            if settings.log_warnings:
                 log = discord.Embed(
                     title=i18n.t(ctx.author.id, "moderation.warnings_removed_title"),
                     description=i18n.t(ctx.author.id, "moderation.warnings_removed_description", case=str(case_id)),
@@ -520,7 +512,7 @@ class Moderation(commands.Cog):
     async def warnings_clear(self, ctx, user: discord.Member):
         db = self._get_db()
         res = db.warnings.delete_many({"guild_id": ctx.guild.id, "user_id": user.id})
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         embed = discord.Embed(
             title=f"{config.config_data.emojis.moderation} " + i18n.t(ctx.author.id, "moderation.warnings_cleared_title"),
             description=i18n.t(ctx.author.id, "moderation.warnings_cleared_description", user=str(user), count=str(res.deleted_count)),
@@ -529,7 +521,7 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         try:
             settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_warnings"):
+            if settings.log_warnings:
                 log = discord.Embed(
                     title=i18n.t(ctx.author.id, "moderation.warnings_cleared_title"),
                     description=i18n.t(ctx.author.id, "moderation.warnings_cleared_description", user=str(user), count=str(res.deleted_count)),
@@ -553,7 +545,7 @@ class Moderation(commands.Cog):
             {"$set": {"reason": reason}},
             return_document=ReturnDocument.AFTER
         )
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         if not res:
             embed = discord.Embed(
                 title=f"{config.config_data.emojis.warning} " + i18n.t(ctx.author.id, "moderation.warnings_case_not_found"),
@@ -570,7 +562,7 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
         try:
             settings = self._get_settings(ctx.guild.id)
-            if settings.get("log_warnings"):
+            if settings.log_warnings:
                 log = discord.Embed(
                     title=i18n.t(ctx.author.id, "moderation.warnings_edited_title"),
                     description=i18n.t(ctx.author.id, "moderation.warnings_edited_description", case=str(case_id)),
@@ -586,7 +578,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(manage_guild=True)
     async def moderation(self, ctx):
         settings = self._get_settings(ctx.guild.id)
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         emojis = config.config_data.emojis
         ch = self._get_logs_channel(ctx.guild)
         embed = discord.Embed(
@@ -598,9 +590,10 @@ class Moderation(commands.Cog):
             value=ch.mention if ch else i18n.t(ctx.author.id, "moderation.not_configured"),
             inline=False
         )
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_warnings"), value="On" if settings.get("log_warnings") else "Off", inline=True)
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_locks"), value="On" if settings.get("log_locks") else "Off", inline=True)
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_slowmode"), value="On" if settings.get("log_slowmode") else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_warnings"), value="On" if settings.log_warnings else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_locks"), value="On" if settings.log_locks else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_slowmode"), value="On" if settings.log_slowmode else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.automod"), value="On" if settings.automod else "Off", inline=True)
         await ctx.send(embed=embed)
 
     @moderation.command(name="setup", description="Configure moderation logging and options")
@@ -611,7 +604,8 @@ class Moderation(commands.Cog):
         category="Category to place the new channel in",
         log_warnings="Log warning actions",
         log_locks="Log locks/unlocks",
-        log_slowmode="Log slowmode changes"
+        log_slowmode="Log slowmode changes",
+        automod="Warn spammers and slow down or lock flooded channels"
     )
     @commands.has_permissions(manage_guild=True)
     async def moderation_setup(
@@ -624,8 +618,9 @@ class Moderation(commands.Cog):
         log_warnings: bool | None = None,
         log_locks: bool | None = None,
         log_slowmode: bool | None = None,
+        automod: bool | None = None,
     ):
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         target_channel = logs_channel
         if target_channel is None and create_channel:
             perms = ctx.guild.me.guild_permissions if isinstance(ctx.guild.me, discord.Member) else None
@@ -651,6 +646,8 @@ class Moderation(commands.Cog):
             updates["log_locks"] = bool(log_locks)
         if log_slowmode is not None:
             updates["log_slowmode"] = bool(log_slowmode)
+        if automod is not None:
+            updates["automod"] = bool(automod)
         if updates:
             self._save_settings(ctx.guild.id, **updates)
         settings = self._get_settings(ctx.guild.id)
@@ -660,16 +657,17 @@ class Moderation(commands.Cog):
             description=i18n.t(ctx.author.id, "moderation.setup_success_desc", channel=(ch.mention if ch else i18n.t(ctx.author.id, "moderation.not_configured"))),
             color=color
         )
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_warnings"), value="On" if settings.get("log_warnings") else "Off", inline=True)
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_locks"), value="On" if settings.get("log_locks") else "Off", inline=True)
-        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_slowmode"), value="On" if settings.get("log_slowmode") else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_warnings"), value="On" if settings.log_warnings else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_locks"), value="On" if settings.log_locks else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.log_slowmode"), value="On" if settings.log_slowmode else "Off", inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, "moderation.automod"), value="On" if settings.automod else "Off", inline=True)
         await ctx.send(embed=embed)
 
     @moderation.command(name="testlog", description="Send a test message to the logs channel")
     @commands.has_permissions(manage_guild=True)
     async def moderation_testlog(self, ctx):
         ch = self._get_logs_channel(ctx.guild)
-        color = discord.Color.from_str(config.config_data.colors.embeds)
+        color = config.config_data.colors.embed_color
         if ch is None:
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.no_logs_channel"),
@@ -698,7 +696,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -708,7 +706,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.bot_missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
             await ctx.send(embed=embed)
@@ -723,7 +721,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -733,7 +731,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.bot_missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -749,7 +747,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -759,7 +757,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.bot_missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -775,7 +773,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -785,7 +783,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.bot_missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -801,7 +799,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -817,7 +815,7 @@ class Moderation(commands.Cog):
             missing = [p.replace("_", " ").title() for p in getattr(error, "missing_permissions", [])]
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "moderation.missing_permissions"),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.required"), value=", ".join(f"`{p}`" for p in required), inline=False)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.missing"), value=", ".join(f"`{p}`" for p in missing) or "None", inline=False)
@@ -825,30 +823,69 @@ class Moderation(commands.Cog):
             return
         raise error
 
+    @metrics.db_budget(6)
+    async def _automod_stage(self, ctx: pipeline.MessageContext):
+        detector = automod.get_automod()
+        settings = detector.settings
+        if not settings.enabled:
+            return
+        message = ctx.message
+        member_rule, channel_rule = detector.check(message)
+        if member_rule is None and channel_rule is None:
+            return
+        # Only a tripped rule looks up whether the guild opted in.
+        guild, me = ctx.guild, ctx.guild.me
+        if me is None or not self._get_settings(guild.id).automod:
+            return
+        perms = me.guild_permissions
+        mod_ctx = automod.AutomodContext(message)
+        author = ctx.author
+        # Webhook authors are plain users without roles.
+        exempt = (
+            getattr(author, "top_role", None) is None or author.id == guild.owner_id
+            or author.guild_permissions.manage_messages or author.top_role >= me.top_role
+        )
+        if member_rule is not None and not exempt and perms.moderate_members:
+            await self._issue_warning(mod_ctx, author, i18n.t(None, f"moderation.automod_{member_rule}"))
+        if channel_rule is None:
+            return
+        channel = ctx.channel
+        reason = i18n.t(None, f"moderation.automod_{channel_rule}")
+        # Threads have a slowmode but no overwrites to lock.
+        if channel_rule == "lock" and hasattr(channel, "set_permissions") and perms.manage_channels and perms.manage_roles:
+            expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=settings.lock_seconds)
+            await self._lock_channel(mod_ctx, channel, reason, expires_at)
+        elif perms.manage_channels and getattr(channel, "slowmode_delay", settings.slowmode_delay) < settings.slowmode_delay:
+            await self._set_slowmode(mod_ctx, channel, settings.slowmode_delay, reason)
+
     @tasks.loop(minutes=1)
     async def check_expired_locks(self):
         db = self._get_db()
         coll = db.channel_locks
         now = datetime.datetime.now(datetime.timezone.utc)
-        for doc in coll.find({"active": True, "expires_at": {"$ne": None, "$lte": now}}):
-            guild = self.client.get_guild(doc["guild_id"])
+        expired = coll.find({"active": True, "expires_at": {"$ne": None, "$lte": now}}, records.Lock.PROJECTION)
+        for lock in map(records.Lock.from_doc, expired):
+            # Each cluster releases the locks of the guilds on its own shards.
+            if not cluster.owns_guild(lock.guild_id):
+                continue
+            guild = self.client.get_guild(lock.guild_id)
             if not guild:
                 continue
-            channel = guild.get_channel(doc["channel_id"])
+            channel = guild.get_channel(lock.channel_id)
             if not isinstance(channel, discord.TextChannel):
                 continue
             try:
-                if doc.get("previous_overwrites"):
-                    for entry in doc["previous_overwrites"]:
-                        role = guild.get_role(entry["role_id"])
+                if lock.previous_overwrites:
+                    for role_id, prev in lock.previous_overwrites:
+                        role = guild.get_role(role_id)
                         if role is None:
                             continue
-                        await channel.set_permissions(role, send_messages=entry.get("prev", None), reason="Auto unlock: duration expired")
+                        await channel.set_permissions(role, send_messages=prev, reason="Auto unlock: duration expired")
                 else:
                     default_role = guild.default_role
-                    await channel.set_permissions(default_role, send_messages=doc.get("previous_send_messages", None), reason="Auto unlock: duration expired")
-                coll.update_one({"_id": doc["_id"]}, {"$set": {"active": False, "released_at": now, "auto": True}})
-                coll.insert_one({
+                    await channel.set_permissions(default_role, send_messages=lock.previous_send_messages, reason="Auto unlock: duration expired")
+                coll.update_one({"_id": lock.id}, {"$set": {"active": False, "released_at": now, "auto": True}})
+                write_buffer.get_buffer().insert("channel_locks", {
                     "guild_id": guild.id,
                     "channel_id": channel.id,
                     "moderator_id": None,
@@ -860,17 +897,17 @@ class Moderation(commands.Cog):
                     note = discord.Embed(
                         title=i18n.t(None, "moderation.channel_unlocked"),
                         description=i18n.t(None, "moderation.auto_unlocked_note"),
-                        color=discord.Color.from_str(config.config_data.colors.embeds)
+                        color=config.config_data.colors.embed_color
                     )
                     await channel.send(embed=note)
                 except Exception:
                     pass
                 try:
                     settings = self._get_settings(guild.id)
-                    if settings.get("log_locks"):
+                    if settings.log_locks:
                         log = discord.Embed(
                             title=i18n.t(None, "moderation.channel_unlocked"),
-                            color=discord.Color.from_str(config.config_data.colors.embeds)
+                            color=config.config_data.colors.embed_color
                         )
                         log.add_field(name=i18n.t(None, "generic.channel"), value=channel.mention, inline=True)
                         log.add_field(name=i18n.t(None, "generic.reason"), value=i18n.t(None, "moderation.auto_unlocked_note"), inline=True)
@@ -880,9 +917,18 @@ class Moderation(commands.Cog):
             except Exception:
                 continue
 
-    def cog_unload(self):
+    @check_expired_locks.before_loop
+    async def _wait_until_ready(self):
+        await self.client.wait_until_ready()
+
+    async def cog_load(self):
+        pipeline.register("moderation.automod", self._automod_stage, commands=True)
+
+    async def cog_unload(self):
+        pipeline.unregister("moderation.automod")
         if self.check_expired_locks.is_running():
             self.check_expired_locks.cancel()
+        await write_buffer.get_buffer().flush()
 
 async def setup(client):
     await client.add_cog(Moderation(client))
@@ -0,0 +1,218 @@
+import asyncio
+import datetime
+import io
+
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+import cluster
+import config
+import diagnostics
+import i18n
+
+
+def _format_bytes(size: int | None) -> str:
+    if size is None:
+        return "?"
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GiB"
+
+
+class Owner(commands.Cog):
+    def __init__(self, client):
+        self.client = client
+
+    async def cog_check(self, ctx):
+        if ctx.author.id in config.config_data.owners.id_set:
+            return True
+        raise commands.NotOwner()
+
+    async def cog_command_error(self, ctx, error):
+        if isinstance(error, commands.NotOwner):
+            embed = discord.Embed(
+                title=f"{config.config_data.emojis.error} " + i18n.t(ctx.author.id, "owner.not_owner"),
+                color=config.config_data.colors.embed_color
+            )
+            await ctx.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(name="reloadconfig", description="Validate config.toml and apply it without a restart")
+    async def reloadconfig(self, ctx):
+        try:
+            compiled = config.reload_config()
+        except Exception as e:
+            embed = discord.Embed(
+                title=f"{config.config_data.emojis.error} " + i18n.t(ctx.author.id, "owner.config_invalid"),
+                description=f"```{e}```",
+                color=config.config_data.colors.embed_color
+            )
+            await ctx.send(embed=embed, ephemeral=True)
+            return
+        embed = discord.Embed(
+            title=f"{compiled.emojis.tick} " + i18n.t(ctx.author.id, "owner.config_reloaded"),
+            description=i18n.t(ctx.author.id, "owner.config_reloaded_description", name=compiled.bot.name),
+            color=compiled.colors.embed_color
+        )
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(name="loopreport", description="Show where the event loop has been blocked")
+    async def loopreport(self, ctx, reset: bool = False):
+        watchdog = diagnostics.get_watchdog()
+        color = config.config_data.colors.embed_color
+        if watchdog is None:
+            embed = discord.Embed(
+                title=f"{config.config_data.emojis.offline} " + i18n.t(ctx.author.id, "owner.watchdog_disabled"),
+                color=color
+            )
+            await ctx.send(embed=embed, ephemeral=True)
+            return
+        records = watchdog.records()
+        report = watchdog.report()
+        embed = discord.Embed(
+            title=f"{config.config_data.emojis.info} " + i18n.t(ctx.author.id, "owner.loop_report_title"),
+            description=i18n.t(
+                ctx.author.id,
+                "owner.loop_report_summary",
+                stalls=sum(r.count for r in records),
+                sites=len(records),
+                worst=round(watchdog.worst_lag * 1000),
+                threshold=round(watchdog.threshold * 1000),
+            ),
+            color=color
+        )
+        for record in records[:5]:
+            embed.add_field(
+                name=f"{record.count}x • {round(record.worst * 1000)}ms",
+                value=f"`{record.culprit[:1000]}`",
+                inline=False
+            )
+        if reset:
+            watchdog.reset()
+        file = discord.File(io.BytesIO(report.encode("utf-8")), filename="loop-report.txt")
+        await ctx.send(embed=embed, file=file, ephemeral=True)
+
+    @commands.hybrid_command(name="profile", description="Sample the running bot and attach a collapsed-stack profile")
+    @app_commands.describe(seconds="How long to sample (1-120)", interval_ms="Milliseconds between samples")
+    async def profile(self, ctx, seconds: int = 10, interval_ms: int = 5):
+        seconds = max(1, min(seconds, 120))
+        interval_ms = max(1, min(interval_ms, 100))
+        color = config.config_data.colors.embed_color
+        await ctx.defer(ephemeral=True)
+        profiler = await diagnostics.profile(seconds, interval_ms / 1000)
+        if profiler is None:
+            embed = discord.Embed(
+                title=f"{config.config_data.emojis.warning} " + i18n.t(ctx.author.id, "owner.profile_busy"),
+                color=color
+            )
+            await ctx.send(embed=embed, ephemeral=True)
+            return
+        embed = discord.Embed(
+            title=f"{config.config_data.emojis.info} " + i18n.t(ctx.author.id, "owner.profile_title"),
+            description=i18n.t(
+                ctx.author.id,
+                "owner.profile_summary",
+                seconds=seconds,
+                samples=profiler.samples,
+                stacks=len(profiler.stacks),
+            ),
+            color=color
+        )
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d-%H%M%S")
+        file = discord.File(io.BytesIO(profiler.collapsed().encode("utf-8")), filename=f"profile-{stamp}.collapsed")
+        await ctx.send(embed=embed, file=file, ephemeral=True)
+
+    @commands.hybrid_command(name="memory", description="Break down memory use by discord.py cache")
+    async def memory(self, ctx):
+        color = config.config_data.colors.embed_color
+        emojis = config.config_data.emojis
+        usage = diagnostics.memory_report(self.client)
+        intents = self.client.intents
+        cache = config.config_data.cache
+        embed = discord.Embed(
+            title=f"{emojis.info} " + i18n.t(ctx.author.id, "owner.memory_title"),
+            description=i18n.t(
+                ctx.author.id,
+                "owner.memory_summary",
+                rss=_format_bytes(diagnostics.resident_memory()),
+                cached=_format_bytes(sum(u.estimated_bytes for u in usage)),
+            ),
+            color=color
+        )
+        for entry in usage:
+            embed.add_field(
+                name=entry.name,
+                value=i18n.t(ctx.author.id, "owner.memory_cache_value", count=f"{entry.count:,}", size=_format_bytes(entry.estimated_bytes)),
+                inline=True
+            )
+        embed.add_field(
+            name=i18n.t(ctx.author.id, "owner.memory_policy"),
+            value=i18n.t(
+                ctx.author.id,
+                "owner.memory_policy_value",
+                members=cache.members,
+                messages=cache.max_messages,
+                presences=emojis.online if intents.presences else emojis.offline,
+                chunking=emojis.online if cache.chunk_guilds_at_startup and intents.members else emojis.offline,
+            ),
+            inline=False
+        )
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(name="clusters", description="Show the health and latency of every cluster")
+    async def clusters(self, ctx):
+        color = config.config_data.colors.embed_color
+        emojis = config.config_data.emojis
+        try:
+            statuses = await asyncio.to_thread(cluster.read_statuses)
+        except Exception as e:
+            embed = discord.Embed(
+                title=f"{emojis.error} " + i18n.t(ctx.author.id, "owner.clusters_unavailable"),
+                description=f"```{e}```",
+                color=color
+            )
+            await ctx.send(embed=embed, ephemeral=True)
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        stale_after = config.config_data.sharding.status_interval * 3
+        embed = discord.Embed(
+            title=f"{emojis.info} " + i18n.t(ctx.author.id, "owner.clusters_title"),
+            description=i18n.t(
+                ctx.author.id,
+                "owner.clusters_summary",
+                clusters=len(statuses),
+                guilds=f"{sum(doc.get('guilds', 0) for doc in statuses):,}",
+                current=cluster.get_cluster().id,
+            ),
+            color=color
+        )
+        for doc in statuses[:25]:
+            updated = doc["updated_at"]
+            if updated.tzinfo is None:
+                updated = updated.replace(tzinfo=datetime.timezone.utc)
+            healthy = doc.get("ready") and (now - updated).total_seconds() <= stale_after
+            latencies = list((doc.get("latencies") or {}).values())
+            lag = doc.get("loop_lag_p99")
+            embed.add_field(
+                name=f"{emojis.online if healthy else emojis.offline} " + i18n.t(
+                    ctx.author.id, "owner.cluster_name", id=doc["cluster_id"], shards=cluster.format_shards(doc.get("shard_ids") or [0])
+                ),
+                value=i18n.t(
+                    ctx.author.id,
+                    "owner.cluster_value",
+                    guilds=f"{doc.get('guilds', 0):,}",
+                    latency=round(sum(latencies) / len(latencies)) if latencies else "-",
+                    worst=max(latencies) if latencies else "-",
+                    lag="-" if lag is None else f"{lag:.1f}",
+                    pid=doc.get("pid"),
+                    updated=int(updated.timestamp()),
+                ),
+                inline=False
+            )
+        await ctx.send(embed=embed, ephemeral=True)
+
+
+async def setup(client):
+    await client.add_cog(Owner(client))
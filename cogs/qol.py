@@ -3,11 +3,19 @@ from discord.ext import commands, tasks
 from discord import app_commands
 import datetime
 import asyncio
-import re
+import cluster
 import config
 import database
 import i18n
-from pymongo import ASCENDING
+import leaderboard
+import metrics
+import pipeline
+import records
+import shared_cache
+import timeparse
+import write_buffer
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson.objectid import ObjectId
 from bson.errors import InvalidId
 from PIL import Image, ImageDraw, ImageFont
@@ -18,8 +26,19 @@ class QoL(commands.Cog):
         self.client = client
         self.reminder_tasks = {}
         self.schedule_tasks = {}
-        self.check_reminders.start()
-        self.check_schedules.start()
+        if cluster.is_primary():
+            self.check_reminders.start()
+            self.check_schedules.start()
+
+    async def _resolve_channel(self, channel_id):
+        channel = self.client.get_channel(channel_id)
+        if channel is None:
+            # The channel may belong to a guild served by another cluster.
+            try:
+                channel = await self.client.fetch_channel(channel_id)
+            except discord.HTTPException:
+                return None
+        return channel
 
     def _get_afk_duration(self, set_at_time):
         if set_at_time.tzinfo is None:
@@ -29,66 +48,11 @@ class QoL(commands.Cog):
         minutes, _ = divmod(remainder, 60)
         return f"{hours}h {minutes}m"
 
-    @staticmethod
-    def _ensure_utc(dt):
-        if dt is None:
-            return None
-        if dt.tzinfo is None:
-            return dt.replace(tzinfo=datetime.timezone.utc)
-        return dt.astimezone(datetime.timezone.utc)
-
-    def parse_time(self, time_str, user):
-        now = datetime.datetime.now(datetime.timezone.utc)
-
-        abs_date_match = re.search(r'^(\d{1,2})/(\d{1,2})/(\d{4})\s+(\d{1,2}):(\d{2})$', time_str.strip())
-        if abs_date_match:
-            try:
-                dt = datetime.datetime(
-                    int(abs_date_match.group(3)),
-                    int(abs_date_match.group(1)),
-                    int(abs_date_match.group(2)),
-                    int(abs_date_match.group(4)),
-                    int(abs_date_match.group(5)),
-                    tzinfo=datetime.timezone.utc,
-                )
-                return dt
-            except ValueError:
-                return None
-
-        abs_time_match = re.search(r'^(\d{1,2}):(\d{2})$', time_str.strip())
-        if abs_time_match:
-            try:
-                target = now.replace(hour=int(abs_time_match.group(1)), minute=int(abs_time_match.group(2)), second=0, microsecond=0)
-                if target <= now:
-                    target += datetime.timedelta(days=1)
-                return target
-            except ValueError:
-                return None
-
-        matches = re.findall(r'(\d+)\s*([smhd])', time_str.lower())
-        if matches:
-            total = datetime.timedelta()
-            for amount, unit in matches:
-                n = int(amount)
-                if unit == 's':
-                    total += datetime.timedelta(seconds=n)
-                elif unit == 'm':
-                    total += datetime.timedelta(minutes=n)
-                elif unit == 'h':
-                    total += datetime.timedelta(hours=n)
-                elif unit == 'd':
-                    total += datetime.timedelta(days=n)
-            return now + total if total.total_seconds() > 0 else None
-
-        return None
-
     async def _create_reminder(self, ctx, when: str, what: str):
-        reminder_time = self.parse_time(when, ctx.author)
+        reminder_time = timeparse.parse_when(when, i18n.get_user_timezone(ctx.author.id))
         if not reminder_time:
             await ctx.send(i18n.t(ctx.author.id, "errors.invalid_time_format"))
             return
-        if isinstance(reminder_time, datetime.timedelta):
-            reminder_time = datetime.datetime.now(datetime.timezone.utc) + reminder_time
         if reminder_time <= datetime.datetime.now(datetime.timezone.utc):
             await ctx.send(i18n.t(ctx.author.id, "errors.time_must_be_future"))
             return
@@ -111,7 +75,7 @@ class QoL(commands.Cog):
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "reminders.set_title"),
                 description=i18n.t(ctx.author.id, "reminders.set_description", what=what),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.when"), value=f"<t:{int(reminder_time.timestamp())}:R>", inline=True)
             pretty_remaining = (
@@ -134,15 +98,23 @@ class QoL(commands.Cog):
 
     @remind.command(name="set", description="Set a reminder")
     @app_commands.describe(when="When should I remind you?", what="What should I remind you about?")
+    @metrics.db_budget(6)
     async def remind_set(self, ctx, when: str, *, what: str):
         await self._create_reminder(ctx, when, what)
 
     @remind.command(name="list", description="List your reminders")
+    @metrics.db_budget(4)
     async def remind_list(self, ctx):
         try:
             db = database.get_database()
             reminders_collection = db.reminders
-            reminders = list(reminders_collection.find({"user_id": ctx.author.id}).sort("remind_at", ASCENDING))
+            limit = 10
+            query = {"user_id": ctx.author.id}
+            reminders = [
+                records.Reminder.from_doc(doc)
+                for doc in reminders_collection.find(query, records.Reminder.PROJECTION).sort("remind_at", ASCENDING).limit(limit)
+            ]
+            total = reminders_collection.count_documents(query) if len(reminders) == limit else len(reminders)
         except Exception as e:
             await ctx.send(i18n.t(ctx.author.id, "errors.failed_list_reminders", error=str(e)))
             return
@@ -151,19 +123,18 @@ class QoL(commands.Cog):
             return
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "reminders.list_title"),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         lines = []
-        limit = 10
-        for index, reminder in enumerate(reminders[:limit], 1):
-            remind_at = self._ensure_utc(reminder.get("remind_at"))
+        for index, reminder in enumerate(reminders, 1):
+            remind_at = reminder.remind_at
             timestamp = int(remind_at.timestamp()) if remind_at else int(datetime.datetime.now(datetime.timezone.utc).timestamp())
-            channel = self.client.get_channel(reminder.get("channel_id"))
-            channel_text = channel.mention if channel else f"<#{reminder.get('channel_id')}>"
-            message_text = reminder.get("message", "")
+            channel = self.client.get_channel(reminder.channel_id)
+            channel_text = channel.mention if channel else f"<#{reminder.channel_id}>"
+            message_text = reminder.message
             if len(message_text) > 80:
                 message_text = message_text[:77] + "..."
-            identifier = str(reminder.get("_id"))
+            identifier = str(reminder.id)
             lines.append(i18n.t(
                 ctx.author.id,
                 "reminders.list_entry",
@@ -174,12 +145,13 @@ class QoL(commands.Cog):
                 identifier=identifier
             ))
         embed.description = "\n\n".join(lines)
-        if len(reminders) > limit:
-            embed.set_footer(text=i18n.t(ctx.author.id, "reminders.list_footer", count=limit, total=len(reminders)))
+        if total > limit:
+            embed.set_footer(text=i18n.t(ctx.author.id, "reminders.list_footer", count=limit, total=total))
         await ctx.send(embed=embed)
 
     @remind.command(name="cancel", description="Cancel one of your reminders")
     @app_commands.describe(reminder_id="Use the ID from /remind list")
+    @metrics.db_budget(3)
     async def remind_cancel(self, ctx, reminder_id: str):
         try:
             object_id = ObjectId(reminder_id)
@@ -189,34 +161,34 @@ class QoL(commands.Cog):
         try:
             db = database.get_database()
             reminders_collection = db.reminders
-            reminder = reminders_collection.find_one_and_delete({"_id": object_id, "user_id": ctx.author.id})
+            doc = reminders_collection.find_one_and_delete(
+                {"_id": object_id, "user_id": ctx.author.id}, projection=records.Reminder.PROJECTION
+            )
         except Exception as e:
             await ctx.send(i18n.t(ctx.author.id, "errors.failed_cancel_reminder", error=str(e)))
             return
-        if not reminder:
+        if not doc:
             await ctx.send(i18n.t(ctx.author.id, "reminders.cancel_not_found"))
             return
-        remind_at = self._ensure_utc(reminder.get("remind_at"))
+        reminder = records.Reminder.from_doc(doc)
+        remind_at = reminder.remind_at
         timestamp = int(remind_at.timestamp()) if remind_at else int(datetime.datetime.now(datetime.timezone.utc).timestamp())
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "reminders.cancel_title"),
-            description=i18n.t(ctx.author.id, "reminders.cancel_description", what=reminder.get("message", ""), timestamp=timestamp),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            description=i18n.t(ctx.author.id, "reminders.cancel_description", what=reminder.message, timestamp=timestamp),
+            color=config.config_data.colors.embed_color
         )
         await ctx.send(embed=embed)
 
 
     @commands.hybrid_command(name="schedule", description="Create a scheduled event")
     async def schedule(self, ctx, title: str, time: str, channel: discord.TextChannel = None):
-        schedule_time = self.parse_time(time, ctx.author)
+        schedule_time = timeparse.parse_when(time, i18n.get_user_timezone(ctx.author.id))
 
         if not schedule_time:
             await ctx.send(i18n.t(ctx.author.id, "errors.invalid_time_format"))
             return
 
-        if isinstance(schedule_time, datetime.timedelta):
-            schedule_time = datetime.datetime.now(datetime.timezone.utc) + schedule_time
-
         if schedule_time <= datetime.datetime.now(datetime.timezone.utc):
             await ctx.send(i18n.t(ctx.author.id, "errors.schedule_time_must_be_future"))
             return
@@ -244,7 +216,7 @@ class QoL(commands.Cog):
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "schedules.scheduled_title"),
                 description=i18n.t(ctx.author.id, "schedules.scheduled_description", title=title),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "generic.channel"), value=target_channel.mention, inline=True)
             embed.add_field(name=i18n.t(ctx.author.id, "generic.when"), value=f"<t:{int(schedule_time.timestamp())}:R>", inline=True)
@@ -268,7 +240,7 @@ class QoL(commands.Cog):
                 embed = discord.Embed(
                     title=i18n.t(None, "schedules.scheduled_title"),
                     description=i18n.t(None, "schedules.starting_now", title=title),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
+                    color=config.config_data.colors.embed_color
                 )
                 await channel.send("@everyone", embed=embed)
         except Exception as e:
@@ -278,12 +250,13 @@ class QoL(commands.Cog):
             del self.schedule_tasks[task_id]
 
     @commands.hybrid_command(name="avatar", description="Fetches and displays a high-resolution version of a user's profile picture")
+    @metrics.db_budget(1)
     async def avatar(self, ctx, user: discord.Member = None):
         target_user = user or ctx.author
 
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "avatar.title", name=target_user.display_name),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         embed.set_image(url=target_user.display_avatar.url)
 
@@ -346,7 +319,7 @@ class QoL(commands.Cog):
 
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "color.title"),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         embed.set_image(url="attachment://color.png")
 
@@ -367,7 +340,7 @@ class QoL(commands.Cog):
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "firstmessage.title"),
                 description=f"[{i18n.t(ctx.author.id, 'firstmessage.jump')}]({first.jump_url})",
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             embed.add_field(name=i18n.t(ctx.author.id, "firstmessage.author"), value=first.author.mention, inline=True)
             embed.timestamp = first.created_at
@@ -377,49 +350,86 @@ class QoL(commands.Cog):
         except Exception as e:
             await ctx.send(i18n.t(ctx.author.id, "errors.failed_fetch_first_message", error=str(e)))
 
-    @commands.hybrid_command(name="rep", description="Give a reputation point to a user")
+    @commands.hybrid_group(name="rep", description="Give a reputation point to a user", fallback="give", invoke_without_command=True)
     @app_commands.describe(user="The member you want to give a point to", reason="A short message explaining why")
+    @metrics.db_budget(4)
     async def rep(self, ctx, user: discord.Member, *, reason: str = None):
         if user.id == ctx.author.id or user.bot:
             await ctx.send(i18n.t(ctx.author.id, "errors.cannot_give_rep"))
             return
         db = database.get_database()
-        cooldowns = db.rep_cooldowns
-        reputation = db.reputation
         now = datetime.datetime.now(datetime.timezone.utc)
-        cd = cooldowns.find_one({"giver_id": ctx.author.id})
-        if cd:
-            last = cd.get("last_given_at", None)
-            if isinstance(last, datetime.datetime):
-                if last.tzinfo is None:
-                    last = last.replace(tzinfo=datetime.timezone.utc)
-                elapsed = (now - last).total_seconds()
-            else:
-                elapsed = float("inf")
-        else:
-            elapsed = float("inf")
-        if elapsed < 86400:
-            remaining = 86400 - int(elapsed)
+        try:
+            # Matches only an expired cooldown, or inserts one when there is none. An
+            # active cooldown makes the insert hit the unique index on giver_id, so
+            # two concurrent grants cannot both pass.
+            db.rep_cooldowns.update_one(
+                {"giver_id": ctx.author.id, "last_given_at": {"$lte": now - database.REP_COOLDOWN}},
+                {"$set": {"last_given_at": now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            cd = db.rep_cooldowns.find_one({"giver_id": ctx.author.id}, {"_id": 0, "last_given_at": 1})
+            last = cd.get("last_given_at") if cd else None
+            if not isinstance(last, datetime.datetime):
+                last = now
+            elif last.tzinfo is None:
+                last = last.replace(tzinfo=datetime.timezone.utc)
+            remaining = max(0, int((last + database.REP_COOLDOWN - now).total_seconds()))
             hours, rem = divmod(remaining, 3600)
             minutes, _ = divmod(rem, 60)
             await ctx.send(i18n.t(ctx.author.id, "errors.rep_cooldown", hours=hours, minutes=minutes))
             return
-        reputation.update_one({"user_id": user.id}, {"$inc": {"total": 1}}, upsert=True)
-        cooldowns.update_one({"giver_id": ctx.author.id}, {"$set": {"last_given_at": now}}, upsert=True)
+        boards = leaderboard.get_boards()
+        doc = db.reputation.find_one_and_update(
+            {"user_id": user.id}, {"$inc": {"total": 1}}, {"_id": 0, "total": 1},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        boards.record(user.id, doc["total"])
+        if ctx.guild is not None:
+            doc = db.guild_reputation.find_one_and_update(
+                {"guild_id": ctx.guild.id, "user_id": user.id}, {"$inc": {"total": 1}}, {"_id": 0, "total": 1},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+            boards.record(user.id, doc["total"], ctx.guild.id)
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, "rep.given_title"),
             description=i18n.t(ctx.author.id, "rep.given_description", giver=ctx.author.mention, user=user.mention, reason_suffix=(f" for: {reason}" if reason else "")),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         await ctx.send(embed=embed)
 
+    @rep.command(name="leaderboard", description="Show who has the most reputation")
+    @app_commands.describe(everywhere="Rank reputation from every server instead of this one")
+    @metrics.db_budget(2)
+    async def rep_leaderboard(self, ctx, everywhere: bool = False):
+        if ctx.guild is None:
+            everywhere = True
+        # The first view of a board seeds it with a database query.
+        entries = await asyncio.to_thread(leaderboard.get_boards().top, None if everywhere else ctx.guild.id)
+        if everywhere:
+            title = i18n.t(ctx.author.id, "rep.leaderboard_global_title")
+        else:
+            title = i18n.t(ctx.author.id, "rep.leaderboard_title", guild=ctx.guild.name)
+        embed = discord.Embed(title=title, color=config.config_data.colors.embed_color)
+        if entries:
+            embed.description = "\n".join(
+                f"**{rank}.** <@{user_id}> {config.config_data.emojis.right} `{total}`"
+                for rank, (user_id, total) in enumerate(entries, start=1)
+            )
+        else:
+            embed.description = i18n.t(ctx.author.id, "rep.leaderboard_empty")
+        embed.set_footer(text=i18n.t(ctx.author.id, "generic.requested_by", name=str(ctx.author)))
+        await ctx.send(embed=embed)
+
     @commands.hybrid_command(name='userinfo', description='shows user info')
     @app_commands.describe(user='The user to get information about')
+    @metrics.db_budget(3)
     async def userinfo(self, ctx, user: discord.Member = None):
         if user is None:
             user = ctx.author
         db = database.get_database()
-        rep_doc = db.reputation.find_one({"user_id": user.id})
+        rep_doc = db.reputation.find_one({"user_id": user.id}, {"_id": 0, "total": 1})
         rep_total = rep_doc.get("total", 0) if rep_doc else 0
         created_days = (discord.utils.utcnow() - user.created_at).days
         joined_days = (discord.utils.utcnow() - user.joined_at).days if hasattr(user, 'joined_at') else 0
@@ -433,7 +443,7 @@ class QoL(commands.Cog):
         top_roles = roles[:3]
         embed = discord.Embed(
             title=f'{user.display_name}',
-            color=user.color if user.color != discord.Color.default() else discord.Color.from_str(config.config_data.colors.embeds),
+            color=user.color if user.color != discord.Color.default() else config.config_data.colors.embed_color,
             timestamp=discord.utils.utcnow()
         )
         embed.set_thumbnail(url=user.display_avatar.url)
@@ -513,20 +523,23 @@ class QoL(commands.Cog):
         try:
             db = database.get_database()
             afk_collection = db.afk
+            now = datetime.datetime.now(datetime.timezone.utc)
             afk_data = {
                 "user_id": ctx.author.id,
                 "message": message,
-                "set_at": datetime.datetime.now(datetime.timezone.utc)
+                # Stored to the millisecond, so the cached value matches the database.
+                "set_at": now.replace(microsecond=now.microsecond // 1000 * 1000)
             }
             afk_collection.replace_one(
                 {"user_id": ctx.author.id},
                 afk_data,
                 upsert=True
             )
+            shared_cache.get_cache("afk").set(ctx.author.id, records.AfkEntry(message, afk_data["set_at"]).to_doc())
             embed = discord.Embed(
                 title=i18n.t(ctx.author.id, "afk.set_title"),
                 description=i18n.t(ctx.author.id, "afk.set_description", message=message),
-                color=discord.Color.from_str(config.config_data.colors.embeds)
+                color=config.config_data.colors.embed_color
             )
             await ctx.send(embed=embed)
         except Exception as e:
@@ -538,68 +551,54 @@ class QoL(commands.Cog):
             db = database.get_database()
             afk_collection = db.afk
             result = afk_collection.delete_one({"user_id": ctx.author.id})
+            shared_cache.get_cache("afk").set(ctx.author.id, None)
 
             if result.deleted_count > 0:
                 embed = discord.Embed(
                     title=i18n.t(ctx.author.id, "afk.cleared_title"),
                     description=i18n.t(ctx.author.id, "afk.cleared_description"),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
+                    color=config.config_data.colors.embed_color
                 )
                 await ctx.send(embed=embed)
             else:
                 embed = discord.Embed(
                     title=i18n.t(ctx.author.id, "afk.none_title"),
                     description=i18n.t(ctx.author.id, "afk.none_description"),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
+                    color=config.config_data.colors.embed_color
                 )
                 await ctx.send(embed=embed)
         except Exception as e:
             await ctx.send(i18n.t(ctx.author.id, "errors.failed_clear_afk", error=str(e)))
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot or not message.guild or message.interaction_metadata or message.content.startswith('a.'):
-            return
-
-        try:
-            db = database.get_database()
-            afk_collection = db.afk
-
-            author_afk = afk_collection.find_one_and_delete({
-                "user_id": message.author.id
-            })
+    @metrics.db_budget(6)
+    async def _afk_stage(self, ctx: pipeline.MessageContext):
+        # The cache answers "not AFK" for almost every message without a round-trip,
+        # and the cleanup of a returning user is written in the background.
+        author_afk = ctx.afk.get(ctx.author.id)
+        if author_afk is not None:
+            shared_cache.get_cache("afk").set(ctx.author.id, None)
+            # Only this entry: a newer status may be set before the delete is written.
+            write_buffer.get_buffer().delete("afk", {"user_id": ctx.author.id, "set_at": author_afk.set_at})
+            duration = self._get_afk_duration(author_afk.set_at)
+            embed = discord.Embed(
+                title=ctx.t("afk.cleared_title"),
+                description=ctx.t("afk.cleared_back", duration=duration),
+                color=config.config_data.colors.embed_color
+            )
+            await ctx.channel.send(embed=embed, delete_after=10)
 
-            if author_afk:
-                duration = self._get_afk_duration(author_afk["set_at"])
+        mentioned = {user.id: user for user in ctx.message.mentions}
+        for user_id in ctx.mention_ids:
+            mentioned_afk = ctx.afk.get(user_id)
+            if mentioned_afk:
+                duration = self._get_afk_duration(mentioned_afk.set_at)
                 embed = discord.Embed(
-                    title=i18n.t(message.author.id, "afk.cleared_title"),
-                    description=i18n.t(message.author.id, "afk.cleared_back", duration=duration),
-                    color=discord.Color.from_str(config.config_data.colors.embeds)
+                    title=ctx.t("afk.user_is_afk_title", name=mentioned[user_id].display_name),
+                    description=f"**{mentioned_afk.message}**",
+                    color=config.config_data.colors.embed_color
                 )
-                await message.channel.send(embed=embed, delete_after=10)
-
-            if not message.mentions:
-                return
-
-            for user in message.mentions:
-                if user.id == message.author.id:
-                    continue
-
-                mentioned_afk = afk_collection.find_one({
-                    "user_id": user.id
-                })
-
-                if mentioned_afk:
-                    duration = self._get_afk_duration(mentioned_afk["set_at"])
-                    embed = discord.Embed(
-                        title=i18n.t(message.author.id, "afk.user_is_afk_title", name=user.display_name),
-                        description=f"**{mentioned_afk['message']}**",
-                        color=discord.Color.from_str(config.config_data.colors.embeds)
-                    )
-                    embed.set_footer(text=i18n.t(message.author.id, "afk.footer_afk_for", duration=duration))
-                    await message.channel.send(embed=embed)
-        except Exception as e:
-            print(f"Error in AFK on_message listener: {e}")
+                embed.set_footer(text=ctx.t("afk.footer_afk_for", duration=duration))
+                await ctx.channel.send(embed=embed)
 
     @tasks.loop(seconds=5)
     async def check_reminders(self):
@@ -610,25 +609,25 @@ class QoL(commands.Cog):
         due_reminders = reminders_collection.find({
             "remind_at": {"$lte": now},
             "recurring": None
-        })
+        }, records.Reminder.PROJECTION)
 
-        for reminder in due_reminders:
+        for reminder in map(records.Reminder.from_doc, due_reminders):
             try:
-                channel = self.client.get_channel(reminder["channel_id"])
+                channel = await self._resolve_channel(reminder.channel_id)
                 if channel:
-                    user = self.client.get_user(reminder["user_id"])
+                    user = self.client.get_user(reminder.user_id)
                     embed = discord.Embed(
-                        title=i18n.t(reminder.get("user_id"), "reminders.reminder_title"),
-                        description=i18n.t(reminder.get("user_id"), "reminders.reminder_description", message=reminder['message']),
-                        color=discord.Color.from_str(config.config_data.colors.embeds)
+                        title=i18n.t(reminder.user_id, "reminders.reminder_title"),
+                        description=i18n.t(reminder.user_id, "reminders.reminder_description", message=reminder.message),
+                        color=config.config_data.colors.embed_color
                     )
                     if user:
-                        embed.set_footer(text=i18n.t(reminder.get("user_id"), "reminders.footer_for", name=user.display_name))
-                    await channel.send(f"<@{reminder['user_id']}>", embed=embed)
+                        embed.set_footer(text=i18n.t(reminder.user_id, "reminders.footer_for", name=user.display_name))
+                    await channel.send(f"<@{reminder.user_id}>", embed=embed)
             except Exception as e:
                 print(f"Failed to send reminder: {e}")
 
-            reminders_collection.delete_one({"_id": reminder["_id"]})
+            reminders_collection.delete_one({"_id": reminder.id})
 
     @tasks.loop(minutes=1)
     async def check_schedules(self):
@@ -642,12 +641,12 @@ class QoL(commands.Cog):
 
         for schedule in due_schedules:
             try:
-                channel = self.client.get_channel(schedule["channel_id"])
+                channel = await self._resolve_channel(schedule["channel_id"])
                 if channel:
                     embed = discord.Embed(
                         title=i18n.t(schedule.get("user_id"), "schedules.scheduled_title"),
                         description=i18n.t(schedule.get("user_id"), "schedules.starting_now", title=schedule['title']),
-                        color=discord.Color.from_str(config.config_data.colors.embeds)
+                        color=config.config_data.colors.embed_color
                     )
                     await channel.send("@everyone", embed=embed)
             except Exception as e:
@@ -655,13 +654,27 @@ class QoL(commands.Cog):
 
             schedules_collection.delete_one({"_id": schedule["_id"]})
 
-    def cog_unload(self):
+    @check_reminders.before_loop
+    @check_schedules.before_loop
+    async def _wait_until_ready(self):
+        await self.client.wait_until_ready()
+
+    async def cog_load(self):
+        pipeline.register("qol.afk", self._afk_stage)
+        try:
+            await asyncio.to_thread(leaderboard.get_boards().seed)
+        except Exception as e:
+            print(f"Failed to load the reputation leaderboard: {e}")
+
+    async def cog_unload(self):
+        pipeline.unregister("qol.afk")
         for task in self.reminder_tasks.values():
             task.cancel()
         for task in self.schedule_tasks.values():
             task.cancel()
         self.check_reminders.cancel()
         self.check_schedules.cancel()
+        await write_buffer.get_buffer().flush()
 
 async def setup(client):
     await client.add_cog(QoL(client))
@@ -0,0 +1,66 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+import config
+import i18n
+import translation
+
+
+class Translation(commands.Cog):
+    def __init__(self, client):
+        self.client = client
+        self.ctx_menu = app_commands.ContextMenu(name="Translate", callback=self.translate_message)
+        self.client.tree.add_command(self.ctx_menu)
+
+    async def cog_unload(self):
+        self.client.tree.remove_command(self.ctx_menu.name, type=self.ctx_menu.type)
+
+    async def _build_embed(self, user_id: int, text: str) -> discord.Embed:
+        language = i18n.get_user_language(user_id)
+        color = config.config_data.colors.embed_color
+        if not text or not text.strip():
+            return discord.Embed(
+                title=f"{config.config_data.emojis.error} " + i18n.t(user_id, "translation.title"),
+                description=i18n.t(user_id, "translation.empty"),
+                color=color
+            )
+        try:
+            translated = await translation.translate(text, language)
+        except Exception as e:
+            return discord.Embed(
+                title=f"{config.config_data.emojis.error} " + i18n.t(user_id, "translation.title"),
+                description=i18n.t(user_id, "translation.failed", error=str(e)),
+                color=color
+            )
+        if len(translated) > 4000:
+            translated = translated[:3997] + "..."
+        embed = discord.Embed(
+            title=f"{config.config_data.emojis.info} " + i18n.t(user_id, "translation.title"),
+            description=translated,
+            color=color
+        )
+        embed.set_footer(text=i18n.t(user_id, "translation.footer", language=language))
+        return embed
+
+    @commands.hybrid_command(name="translate", description="Translate text into your language")
+    @app_commands.describe(text="The text to translate")
+    async def translate(self, ctx, *, text: str):
+        async with ctx.typing():
+            embed = await self._build_embed(ctx.author.id, text)
+        await ctx.send(embed=embed)
+
+    async def translate_message(self, interaction: discord.Interaction, message: discord.Message):
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        embed = await self._build_embed(interaction.user.id, message.content)
+        if message.content:
+            embed.add_field(
+                name=i18n.t(interaction.user.id, "translation.original"),
+                value=f"[{i18n.t(interaction.user.id, 'firstmessage.jump')}]({message.jump_url})",
+                inline=False
+            )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+
+async def setup(client):
+    await client.add_cog(Translation(client))
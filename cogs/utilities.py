@@ -1,23 +1,44 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import activity
+import cluster
 import config
+import health
 import i18n
+import metrics
+import pipeline
+
+_BARS = ' ▁▂▃▄▅▆▇█'
 
 class Utilities(commands.Cog):
     def __init__(self, client):
         self.client = client
 
+    @metrics.db_budget(0)
+    async def _activity_stage(self, ctx: pipeline.MessageContext):
+        activity.record(ctx.message)
+
+    async def cog_load(self):
+        # Commands count as activity too.
+        pipeline.register("utilities.activity", self._activity_stage, commands=True)
+
+    async def cog_unload(self):
+        pipeline.unregister("utilities.activity")
+
     @commands.hybrid_command(name='information', description='Shows bot and system information')
     @app_commands.describe()
+    @metrics.db_budget(8)
     async def information(self, ctx):
         latency = round(self.client.latency * 1000)
-        db_latency = config.get_database_ping()
+        sampler = health.get_sampler()
+        db_p50, db_p95, db_p99 = sampler.database.percentiles(50, 95, 99)
+        lag_p50, lag_p95, lag_p99 = sampler.loop_lag.percentiles(50, 95, 99)
         
         embed = discord.Embed(
             title=i18n.t(ctx.author.id, 'utilities.title', name=config.config_data.bot.name),
             description=i18n.t(ctx.author.id, 'utilities.description', name=config.config_data.bot.name),
-            color=discord.Color.from_str(config.config_data.colors.embeds)
+            color=config.config_data.colors.embed_color
         )
         
         embed.add_field(
@@ -26,10 +47,10 @@ class Utilities(commands.Cog):
             inline=True
         )
         
-        if db_latency is not None:
+        if db_p50 is not None and sampler.database_available:
             embed.add_field(
                 name=i18n.t(ctx.author.id, 'utilities.database_latency'),
-                value=f'{config.config_data.emojis.info} `{db_latency}ms`',
+                value=f'{config.config_data.emojis.info} ' + i18n.t(ctx.author.id, 'utilities.percentiles', p50=db_p50, p95=db_p95, p99=db_p99),
                 inline=True
             )
         else:
@@ -38,10 +59,75 @@ class Utilities(commands.Cog):
                 value=f"{config.config_data.emojis.offline} `{i18n.t(ctx.author.id, 'utilities.offline')}`",
                 inline=True
             )
-        
+
+        if lag_p50 is not None:
+            embed.add_field(
+                name=i18n.t(ctx.author.id, 'utilities.loop_lag'),
+                value=f'{config.config_data.emojis.info} ' + i18n.t(ctx.author.id, 'utilities.percentiles', p50=f'{lag_p50:.1f}', p95=f'{lag_p95:.1f}', p99=f'{lag_p99:.1f}'),
+                inline=True
+            )
+
+        info = cluster.get_cluster()
+        if info.sharded:
+            shard_id = ctx.guild.shard_id if ctx.guild is not None else 0
+            embed.add_field(
+                name=i18n.t(ctx.author.id, 'utilities.cluster'),
+                value=f'{config.config_data.emojis.info} ' + i18n.t(ctx.author.id, 'utilities.cluster_value', cluster=info.id, clusters=info.count, shard=shard_id),
+                inline=True
+            )
+
         embed.set_footer(text=i18n.t(ctx.author.id, 'utilities.powered_by', name=config.config_data.bot.name))
         
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name='stats', description='Shows message activity in this server')
+    @app_commands.describe(days='How many days to include', member='Also show how active this member was')
+    @commands.guild_only()
+    @metrics.db_budget(2)
+    async def stats(self, ctx, days: int = 7, member: discord.Member = None):
+        days = max(1, min(days, config.config_data.activity.retention_days))
+        bucket = await activity.get_counter().load(ctx.guild.id, days)
+        emojis = config.config_data.emojis
+
+        embed = discord.Embed(
+            title=i18n.t(ctx.author.id, 'utilities.stats_title', guild=ctx.guild.name),
+            description=i18n.t(ctx.author.id, 'utilities.stats_description', days=days),
+            color=config.config_data.colors.embed_color
+        )
+        if not bucket.total:
+            embed.description = i18n.t(ctx.author.id, 'utilities.stats_empty', days=days)
+            await ctx.send(embed=embed)
+            return
+
+        busiest = max(range(24), key=bucket.hours.__getitem__)
+        embed.add_field(name=i18n.t(ctx.author.id, 'utilities.stats_messages'), value=f'{emojis.info} `{bucket.total}`', inline=True)
+        embed.add_field(name=i18n.t(ctx.author.id, 'utilities.stats_busiest_hour'), value=f'{emojis.info} `{busiest:02d}:00`', inline=True)
+        if member is not None:
+            count = bucket.users.get(member.id, 0)
+            embed.add_field(
+                name=i18n.t(ctx.author.id, 'utilities.stats_member', name=member.display_name),
+                value=f'{emojis.info} `{count}` ({count * 100 / bucket.total:.1f}%)',
+                inline=True
+            )
+        embed.add_field(
+            name=i18n.t(ctx.author.id, 'utilities.stats_top_channels'),
+            value='\n'.join(f'{emojis.right} <#{channel_id}> `{count}`' for channel_id, count in bucket.channels.most_common(5)),
+            inline=True
+        )
+        embed.add_field(
+            name=i18n.t(ctx.author.id, 'utilities.stats_top_members'),
+            value='\n'.join(f'{emojis.right} <@{user_id}> `{count}`' for user_id, count in bucket.users.most_common(5)),
+            inline=True
+        )
+        peak = max(bucket.hours)
+        bars = ''.join(_BARS[round(count * (len(_BARS) - 1) / peak)] for count in bucket.hours)
+        embed.add_field(
+            name=i18n.t(ctx.author.id, 'utilities.stats_hours'),
+            value=f'```\n{bars}\n00    06    12    18   23\n```',
+            inline=False
+        )
+        embed.set_footer(text=i18n.t(ctx.author.id, 'generic.requested_by', name=str(ctx.author)))
+        await ctx.send(embed=embed)
+
 async def setup(client):
     await client.add_cog(Utilities(client))
\ No newline at end of file
@@ -1,78 +1,428 @@
 import tomllib
 import os
-from types import SimpleNamespace
+from dataclasses import dataclass, field, fields
 from typing import Dict, Any
-import database
+import discord
 
 _config_data = None
-config_data = None
 
-def _dict_to_namespace(data):
-    if isinstance(data, dict):
-        return SimpleNamespace(**{k: _dict_to_namespace(v) for k, v in data.items()})
-    elif isinstance(data, list):
-        return [_dict_to_namespace(item) for item in data]
-    else:
-        return data
+_DEFAULT_CONFIG = {
+    'bot': {'name': 'Arbor'},
+    'colors': {'embeds': '#9dd2ff'},
+    'meme': {
+        'api_url': 'https://meme-api.com/gimme',
+        'batch_size': 25,
+        'buffer_size': 100,
+        'subreddits': [],
+        'reddit_listing': 'hot',
+        'reddit_batch_size': 100,
+        'reddit_refresh_seconds': 600,
+    },
+    'translation': {'backend': 'google'},
+    'storage': {'backend': 'mongo', 'path': 'arbor.sqlite3'},
+    'metrics': {'enabled': False, 'host': '127.0.0.1', 'port': 9108},
+    'health': {'database_interval': 15, 'loop_interval': 0.5, 'window': 240},
+    'watchdog': {'enabled': True, 'threshold': 0.1, 'interval': 0.02},
+    'intents': {'base': 'all', 'enable': [], 'disable': []},
+    'cache': {'members': 'intents', 'max_messages': 1000, 'chunk_guilds_at_startup': True},
+    'sharding': {'enabled': False, 'shard_count': 0, 'clusters': 1, 'status_interval': 30},
+    'write_buffer': {'interval': 1.0, 'max_pending': 500},
+    'shared_cache': {'redis': False, 'prefix': 'arbor', 'local_size': 10000, 'local_ttl': 60, 'ttl': 3600},
+    'leaderboard': {'size': 10, 'guilds': 1000},
+    'activity': {'enabled': True, 'interval': 60.0, 'retention_days': 90},
+    'automod': {
+        'enabled': True, 'flood_messages': 6, 'flood_seconds': 5.0, 'duplicate_messages': 4,
+        'duplicate_seconds': 30.0, 'mention_limit': 6, 'channel_seconds': 10.0, 'slowmode_messages': 20,
+        'slowmode_delay': 10, 'lock_messages': 40, 'lock_seconds': 600, 'cooldown': 60.0, 'tracked': 50000
+    },
+    'owners': {'ids': []},
+    'emojis': {
+        'moderation': '<:moderation:1424082709889810623>',
+        'menu': '<:menu:1424082502053658644>',
+        'down': '<:down:1424082358449209374>',
+        'up': '<:up:1424082291973685268>',
+        'right': '<:right:1424082178941124669>',
+        'left': '<:left:1424082111253708820>',
+        'error': '<:error:1424081965874806854>',
+        'warning': '<:warning:1424081885772124340>',
+        'add': '<:add:1424081808252993651>',
+        'delete': '<:delete:1424081729467191416>',
+        'edit': '<:edit:1424081620494713032>',
+        'offline': '<:offline:1424081539016425602>',
+        'online': '<:online:1424081456082325595>',
+        'tick': '<:tick:1424079282946441419>',
+        'home': '<:home:1424079222485549267>',
+        'link': '<:link:1424079154713985024>',
+        'info': '<:info:1424079090058526831>'
+    }
+}
 
-def load_config() -> Dict[str, Any]:
-    global _config_data, config_data
-    
-    if _config_data is not None:
-        return _config_data
-    
+@dataclass(frozen=True, slots=True)
+class BotConfig:
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class ColorsConfig:
+    embeds: str
+    embed_color: discord.Color = field(init=False)
+
+    def __post_init__(self):
+        try:
+            object.__setattr__(self, 'embed_color', discord.Color.from_str(self.embeds))
+        except ValueError:
+            raise ValueError(f"colors.embeds is not a valid color: {self.embeds!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class MemeConfig:
+    api_url: str
+    batch_size: int
+    buffer_size: int
+    subreddits: tuple
+    reddit_listing: str
+    reddit_batch_size: int
+    reddit_refresh_seconds: float
+
+    def __post_init__(self):
+        if self.reddit_listing not in ('hot', 'new', 'top', 'rising'):
+            raise ValueError(f"meme.reddit_listing must be hot, new, top or rising, not {self.reddit_listing!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class TranslationConfig:
+    backend: str
+
+
+@dataclass(frozen=True, slots=True)
+class StorageConfig:
+    backend: str
+    path: str
+
+    def __post_init__(self):
+        if self.backend not in ('mongo', 'sqlite', 'memory'):
+            raise ValueError(f"storage.backend must be mongo, sqlite or memory, not {self.backend!r}")
+        if self.backend == 'sqlite' and not self.path:
+            raise ValueError("storage.path is required for the sqlite backend")
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsConfig:
+    enabled: bool
+    host: str
+    port: int
+
+
+@dataclass(frozen=True, slots=True)
+class HealthConfig:
+    database_interval: float
+    loop_interval: float
+    window: int
+
+
+@dataclass(frozen=True, slots=True)
+class WatchdogConfig:
+    enabled: bool
+    threshold: float
+    interval: float
+
+
+_INTENT_BASES = {'all': discord.Intents.all, 'default': discord.Intents.default, 'none': discord.Intents.none}
+_MEMBER_CACHE_POLICIES = ('intents', 'all', 'none', 'joined', 'voice')
+
+
+@dataclass(frozen=True, slots=True)
+class IntentsConfig:
+    base: str
+    enable: tuple
+    disable: tuple
+    intents: discord.Intents = field(init=False)
+
+    def __post_init__(self):
+        if self.base not in _INTENT_BASES:
+            raise ValueError(f"intents.base must be all, default or none, not {self.base!r}")
+        intents = _INTENT_BASES[self.base]()
+        for key, value in (('enable', True), ('disable', False)):
+            for flag in getattr(self, key):
+                if flag not in discord.Intents.VALID_FLAGS:
+                    raise ValueError(f"intents.{key} has an unknown intent: {flag!r}")
+                setattr(intents, flag, value)
+        object.__setattr__(self, 'intents', intents)
+
+
+@dataclass(frozen=True, slots=True)
+class CacheConfig:
+    members: str
+    max_messages: int
+    chunk_guilds_at_startup: bool
+
+    def __post_init__(self):
+        if self.members not in _MEMBER_CACHE_POLICIES:
+            raise ValueError(f"cache.members must be one of {', '.join(_MEMBER_CACHE_POLICIES)}, not {self.members!r}")
+        if self.max_messages < 0:
+            raise ValueError("cache.max_messages must not be negative")
+
+    def member_cache_flags(self, intents: discord.Intents) -> discord.MemberCacheFlags:
+        if self.members == 'intents':
+            return discord.MemberCacheFlags.from_intents(intents)
+        if self.members == 'all':
+            return discord.MemberCacheFlags.all()
+        flags = discord.MemberCacheFlags.none()
+        if self.members != 'none':
+            setattr(flags, self.members, True)
+        return flags
+
+    def client_options(self, intents: discord.Intents) -> dict:
+        """Keyword arguments for discord.Client that apply this cache policy."""
+        return {
+            'intents': intents,
+            'member_cache_flags': self.member_cache_flags(intents),
+            'max_messages': self.max_messages or None,
+            'chunk_guilds_at_startup': self.chunk_guilds_at_startup and intents.members,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class ShardingConfig:
+    enabled: bool
+    shard_count: int
+    clusters: int
+    status_interval: float
+
+    def __post_init__(self):
+        if self.shard_count < 0:
+            raise ValueError("sharding.shard_count must not be negative")
+        if self.clusters < 1:
+            raise ValueError("sharding.clusters must be at least 1")
+
+
+@dataclass(frozen=True, slots=True)
+class WriteBufferConfig:
+    interval: float
+    max_pending: int
+
+    def __post_init__(self):
+        if self.interval <= 0:
+            raise ValueError("write_buffer.interval must be positive")
+        if self.max_pending < 1:
+            raise ValueError("write_buffer.max_pending must be at least 1")
+
+
+@dataclass(frozen=True, slots=True)
+class SharedCacheConfig:
+    redis: bool
+    prefix: str
+    local_size: int
+    local_ttl: float
+    ttl: int
+
+    def __post_init__(self):
+        if self.local_size < 1:
+            raise ValueError("shared_cache.local_size must be at least 1")
+        if self.local_ttl <= 0 or self.ttl <= 0:
+            raise ValueError("shared_cache.local_ttl and shared_cache.ttl must be positive")
+
+
+@dataclass(frozen=True, slots=True)
+class LeaderboardConfig:
+    size: int
+    guilds: int
+
+    def __post_init__(self):
+        if not 1 <= self.size <= 25:
+            raise ValueError("leaderboard.size must be between 1 and 25")
+        if self.guilds < 1:
+            raise ValueError("leaderboard.guilds must be at least 1")
+
+
+@dataclass(frozen=True, slots=True)
+class ActivityConfig:
+    enabled: bool
+    interval: float
+    retention_days: int
+
+    def __post_init__(self):
+        if self.interval <= 0:
+            raise ValueError("activity.interval must be positive")
+        if self.retention_days < 1:
+            raise ValueError("activity.retention_days must be at least 1")
+
+
+@dataclass(frozen=True, slots=True)
+class AutomodConfig:
+    enabled: bool
+    flood_messages: int
+    flood_seconds: float
+    duplicate_messages: int
+    duplicate_seconds: float
+    mention_limit: int
+    channel_seconds: float
+    slowmode_messages: int
+    slowmode_delay: int
+    lock_messages: int
+    lock_seconds: int
+    cooldown: float
+    tracked: int
+
+    def __post_init__(self):
+        if min(self.flood_messages, self.duplicate_messages, self.mention_limit) < 2:
+            raise ValueError("automod.flood_messages, duplicate_messages and mention_limit must be at least 2")
+        if min(self.flood_seconds, self.duplicate_seconds, self.channel_seconds) <= 0:
+            raise ValueError("automod.flood_seconds, duplicate_seconds and channel_seconds must be positive")
+        if not 2 <= self.slowmode_messages < self.lock_messages:
+            raise ValueError("automod.slowmode_messages must be at least 2 and below automod.lock_messages")
+        if not 1 <= self.slowmode_delay <= 21600:
+            raise ValueError("automod.slowmode_delay must be between 1 and 21600 seconds")
+        if self.lock_seconds < 1:
+            raise ValueError("automod.lock_seconds must be at least 1")
+        if self.cooldown < 0:
+            raise ValueError("automod.cooldown must not be negative")
+        if self.tracked < 1:
+            raise ValueError("automod.tracked must be at least 1")
+
+
+@dataclass(frozen=True, slots=True)
+class OwnersConfig:
+    ids: tuple
+    id_set: frozenset = field(init=False)
+
+    def __post_init__(self):
+        try:
+            object.__setattr__(self, 'id_set', frozenset(int(i) for i in self.ids))
+        except (TypeError, ValueError):
+            raise ValueError(f"owners.ids must be user ids, got {list(self.ids)!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class EmojisConfig:
+    moderation: str
+    menu: str
+    down: str
+    up: str
+    right: str
+    left: str
+    error: str
+    warning: str
+    add: str
+    delete: str
+    edit: str
+    offline: str
+    online: str
+    tick: str
+    home: str
+    link: str
+    info: str
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    bot: BotConfig
+    colors: ColorsConfig
+    meme: MemeConfig
+    translation: TranslationConfig
+    storage: StorageConfig
+    metrics: MetricsConfig
+    health: HealthConfig
+    watchdog: WatchdogConfig
+    intents: IntentsConfig
+    cache: CacheConfig
+    sharding: ShardingConfig
+    write_buffer: WriteBufferConfig
+    shared_cache: SharedCacheConfig
+    leaderboard: LeaderboardConfig
+    activity: ActivityConfig
+    automod: AutomodConfig
+    owners: OwnersConfig
+    emojis: EmojisConfig
+
+
+def _build_section(cls, name: str, values: Any):
+    if not isinstance(values, dict):
+        raise ValueError(f"[{name}] must be a table")
+    merged = {**_DEFAULT_CONFIG.get(name, {}), **values}
+    kwargs = {}
+    for f in fields(cls):
+        if not f.init:
+            continue
+        if f.name not in merged:
+            raise ValueError(f"{name}.{f.name} is missing")
+        value = merged.pop(f.name)
+        if f.type is tuple:
+            if not isinstance(value, list | tuple):
+                raise ValueError(f"{name}.{f.name} must be a list")
+            value = tuple(value)
+        elif f.type is float:
+            if isinstance(value, bool) or not isinstance(value, int | float):
+                raise ValueError(f"{name}.{f.name} must be a number")
+        elif f.type is int:
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise ValueError(f"{name}.{f.name} must be an integer")
+        elif not isinstance(value, f.type):
+            raise ValueError(f"{name}.{f.name} must be a {f.type.__name__}")
+        kwargs[f.name] = value
+    if merged:
+        raise ValueError(f"[{name}] has unknown key(s): {', '.join(sorted(merged))}")
+    return cls(**kwargs)
+
+
+def parse_config(data: Dict[str, Any]) -> Config:
+    """Validate a config.toml mapping and compile it into a Config. Raises ValueError."""
+    sections = {f.name: f.type for f in fields(Config)}
+    unknown = set(data) - set(sections)
+    if unknown:
+        raise ValueError(f"unknown section(s): {', '.join(sorted(unknown))}")
+    return Config(**{name: _build_section(cls, name, data.get(name, {})) for name, cls in sections.items()})
+
+
+def _read_config_file() -> Dict[str, Any]:
     config_path = os.path.join(os.path.dirname(__file__), 'config.toml')
-    
     try:
         with open(config_path, 'rb') as f:
-            _config_data = tomllib.load(f)
-        
-        config_data = _dict_to_namespace(_config_data)
-        return _config_data
+            return tomllib.load(f)
     except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
     except Exception as e:
         raise Exception(f"Error loading configuration: {e}")
 
+
+def load_config() -> Dict[str, Any]:
+    global _config_data, config_data
+
+    if _config_data is not None:
+        return _config_data
+
+    data = _read_config_file()
+    config_data = parse_config(data)
+    _config_data = data
+    return _config_data
+
+
+def reload_config() -> Config:
+    """Re-read config.toml and swap it in only if the whole file validates."""
+    global _config_data, config_data
+    data = _read_config_file()
+    compiled = parse_config(data)
+    _config_data, config_data = data, compiled
+    return compiled
+
+def _load_or_default() -> Dict[str, Any]:
+    global _config_data, config_data
+    try:
+        return load_config()
+    except Exception as e:
+        print(f"Warning: Could not load configuration: {e}")
+        config_data = parse_config(_DEFAULT_CONFIG)
+        _config_data = _DEFAULT_CONFIG
+        return _config_data
+
 def get_config() -> Dict[str, Any]:
     if _config_data is None:
-        return load_config()
+        return _load_or_default()
     return _config_data
 
-def get_database_ping():
-    return database.ping_database()
-
-try:
-    load_config()
-    db_ping = get_database_ping()
-    if db_ping is not None:
-        print(f"Loaded config: {config_data.bot.name} bot with {len(config_data.emojis.__dict__)} emojis, database ping: {db_ping}ms")
-    else:
-        print(f"Loaded config: {config_data.bot.name} bot with {len(config_data.emojis.__dict__)} emojis, database unavailable")
-except Exception as e:
-    print(f"Warning: Could not load configuration: {e}")
-    _config_data = {
-        'bot': {'name': 'Arbor'},
-        'colors': {'embeds': '#9dd2ff'},
-        'owners': {'ids': []},
-        'emojis': {
-            'moderation': '<:moderation:1424082709889810623>',
-            'menu': '<:menu:1424082502053658644>',
-            'down': '<:down:1424082358449209374>',
-            'up': '<:up:1424082291973685268>',
-            'right': '<:right:1424082178941124669>',
-            'left': '<:left:1424082111253708820>',
-            'error': '<:error:1424081965874806854>',
-            'warning': '<:warning:1424081885772124340>',
-            'add': '<:add:1424081808252993651>',
-            'delete': '<:delete:1424081729467191416>',
-            'edit': '<:edit:1424081620494713032>',
-            'offline': '<:offline:1424081539016425602>',
-            'online': '<:online:1424081456082325595>',
-            'tick': '<:tick:1424079282946441419>',
-            'home': '<:home:1424079222485549267>',
-            'link': '<:link:1424079154713985024>',
-            'info': '<:info:1424079090058526831>'
-        }
-    }
-    config_data = _dict_to_namespace(_config_data)
+def __getattr__(name):
+    # config_data is built on first access so importing this module stays free of I/O.
+    if name == 'config_data':
+        _load_or_default()
+        return config_data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
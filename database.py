@@ -2,9 +2,46 @@ import os
 import datetime
 from pymongo import MongoClient
 from pymongo.errors import ServerSelectionTimeoutError, ConnectionFailure
+import threading
 import time
 
+import config
+import docstore
+
 _database = None
+_connect_lock = threading.Lock()
+
+_COLLECTIONS = (
+    'Arbor',
+    'user_language_preferences',
+    'reminders',
+    'schedules',
+    'afk',
+    'reputation',
+    'rep_cooldowns',
+    'guild_reputation',
+    'activity',
+    'channel_locks',
+    'warnings',
+    'warning_counters',
+    'moderation_settings',
+    'translation_cache',
+    'cluster_status',
+)
+
+# How long /rep waits between grants from the same member.
+REP_COOLDOWN = datetime.timedelta(days=1)
+
+_INDEXES = (
+    ('rep_cooldowns', 'giver_id', {'unique': True}),
+    # The cooldown is over once a document expires, so nothing needs to clean them up.
+    ('rep_cooldowns', 'last_given_at', {'expireAfterSeconds': int(REP_COOLDOWN.total_seconds())}),
+    # Leaderboards are seeded by the highest totals, lower user ids first on ties.
+    ('reputation', [('total', -1), ('user_id', 1)], {}),
+    ('guild_reputation', [('guild_id', 1), ('user_id', 1)], {'unique': True}),
+    ('guild_reputation', [('guild_id', 1), ('total', -1), ('user_id', 1)], {}),
+    ('activity', [('guild_id', 1), ('date', 1)], {'unique': True}),
+)
 
 try:
     from dotenv import load_dotenv
@@ -13,11 +50,43 @@ except ImportError:
     pass 
 
 def connect_database():
+    with _connect_lock:
+        return _connect_locked()
+
+def ensure_indexes(database):
+    retention = datetime.timedelta(days=config.config_data.activity.retention_days)
+    indexes = _INDEXES + (
+        ('activity', 'date', {'expireAfterSeconds': int(retention.total_seconds())}),
+    )
+    for collection, keys, options in indexes:
+        try:
+            database[collection].create_index(keys, **options)
+        except Exception as e:
+            print(f"Failed to create index {keys} on {collection}: {e}")
+
+def _connect_embedded(settings):
+    path = None
+    if settings.backend == 'sqlite':
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), settings.path)
+    database = docstore.DocumentDatabase('Arbor', path)
+    existing = set(database.list_collection_names())
+    for name in _COLLECTIONS:
+        if name not in existing:
+            database.create_collection(name)
+    ensure_indexes(database)
+    return database
+
+def _connect_locked():
     global _database
 
     if _database is not None:
         return _database
 
+    settings = config.config_data.storage
+    if settings.backend != 'mongo':
+        _database = _connect_embedded(settings)
+        return _database
+
     database_url = os.getenv('database')
     if not database_url:
         raise ValueError("Database URL not found in environment variables")
@@ -31,40 +100,16 @@ def connect_database():
         )
         client.admin.command('ping')
 
-        _database = client.Arbor
-
-        if 'Arbor' not in _database.list_collection_names():
-            _database.create_collection('Arbor')
-
-        if 'user_language_preferences' not in _database.list_collection_names():
-            _database.create_collection('user_language_preferences')
-
-        if 'reminders' not in _database.list_collection_names():
-            _database.create_collection('reminders')
+        database = client.Arbor
 
-        if 'schedules' not in _database.list_collection_names():
-            _database.create_collection('schedules')
+        existing = set(database.list_collection_names())
+        for name in _COLLECTIONS:
+            if name not in existing:
+                database.create_collection(name)
+        ensure_indexes(database)
 
-        if 'afk' not in _database.list_collection_names():
-            _database.create_collection('afk')
-
-        if 'reputation' not in _database.list_collection_names():
-            _database.create_collection('reputation')
-        
-        if 'rep_cooldowns' not in _database.list_collection_names():
-            _database.create_collection('rep_cooldowns')
-
-        if 'channel_locks' not in _database.list_collection_names():
-            _database.create_collection('channel_locks')
-
-        if 'warnings' not in _database.list_collection_names():
-            _database.create_collection('warnings')
-
-        if 'warning_counters' not in _database.list_collection_names():
-            _database.create_collection('warning_counters')
-
-        if 'moderation_settings' not in _database.list_collection_names():
-            _database.create_collection('moderation_settings')
+        _database = database
+        return _database
 
     except (ServerSelectionTimeoutError, ConnectionFailure) as e:
         raise ConnectionError(f"Failed to connect to database: {e}")
@@ -0,0 +1,335 @@
+import asyncio
+import collections
+import datetime
+import enum
+import itertools
+import os
+import sys
+import threading
+import time
+import traceback
+import types
+
+import discord
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _frame_label(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{frame.lineno} {frame.name}"
+
+
+def _is_project_frame(frame: traceback.FrameSummary) -> bool:
+    return frame.filename.startswith(_ROOT) and "site-packages" not in frame.filename
+
+
+class StallRecord:
+    __slots__ = ("stack", "culprit", "count", "total", "worst", "last_seen")
+
+    def __init__(self, stack: tuple[str, ...], culprit: str):
+        self.stack = stack
+        self.culprit = culprit
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.last_seen: datetime.datetime | None = None
+
+
+class LoopWatchdog:
+    """Watches the event loop from a helper thread and records the stack of every stall.
+
+    A heartbeat callback is scheduled on the loop every ``interval`` seconds. When the
+    thread sees it late by more than ``threshold`` seconds, the loop thread's current
+    stack is captured and aggregated by call site.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.02, max_records: int = 200):
+        self.threshold = threshold
+        self.interval = interval
+        self.max_records = max_records
+        self.started_at: datetime.datetime | None = None
+        self.worst_lag = 0.0
+        self._records: dict[tuple[str, ...], StallRecord] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._last_beat = 0.0
+        self._handle: asyncio.TimerHandle | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._stall_beat: float | None = None
+        self._stall_record: StallRecord | None = None
+        self._stall_length = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._stop.clear()
+        self._beat()
+        self._thread = threading.Thread(target=self._watch, name="arbor-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self.worst_lag = 0.0
+            self.started_at = datetime.datetime.now(datetime.timezone.utc)
+
+    def _beat(self):
+        self._last_beat = time.perf_counter()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            last = self._last_beat
+            lag = time.perf_counter() - last - self.interval
+            if lag >= self.threshold:
+                if self._stall_beat != last:
+                    self._stall_beat = last
+                    self._stall_record = self._capture()
+                self._stall_length = lag
+            elif self._stall_record is not None:
+                self._finish_stall()
+        if self._stall_record is not None:
+            self._finish_stall()
+
+    def _capture(self) -> StallRecord | None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        summary = traceback.extract_stack(frame)
+        stack = tuple(_frame_label(f) for f in summary)
+        project = [f for f in summary if _is_project_frame(f)]
+        culprit = f"{_frame_label(project[-1])} -> {_frame_label(summary[-1])}" if project else stack[-1]
+        key = tuple(_frame_label(f) for f in project[-6:]) or stack[-6:]
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                if len(self._records) >= self.max_records:
+                    return None
+                record = self._records[key] = StallRecord(stack, culprit)
+        return record
+
+    def _finish_stall(self):
+        record, length = self._stall_record, self._stall_length
+        self._stall_record = None
+        self._stall_length = 0.0
+        with self._lock:
+            self.worst_lag = max(self.worst_lag, length)
+            record.count += 1
+            record.total += length
+            record.worst = max(record.worst, length)
+            record.last_seen = datetime.datetime.now(datetime.timezone.utc)
+
+    def records(self) -> list[StallRecord]:
+        with self._lock:
+            return sorted((r for r in self._records.values() if r.count), key=lambda r: r.total, reverse=True)
+
+    def report(self, limit: int = 20) -> str:
+        records = self.records()
+        since = self.started_at.strftime("%Y-%m-%d %H:%M:%S UTC") if self.started_at else "never"
+        lines = [
+            f"Event-loop stalls over {self.threshold * 1000:.0f}ms since {since}",
+            f"{sum(r.count for r in records)} stall(s) at {len(records)} call site(s), worst {self.worst_lag * 1000:.0f}ms",
+        ]
+        for record in records[:limit]:
+            lines.append("")
+            lines.append(
+                f"{record.count}x, total {record.total * 1000:.0f}ms, worst {record.worst * 1000:.0f}ms: {record.culprit}"
+            )
+            lines.extend(f"    {entry}" for entry in record.stack)
+        return "\n".join(lines)
+
+
+def _collapsed_frame(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Wall-clock sampler that snapshots every thread's stack from a helper thread."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks: collections.Counter[str] = collections.Counter()
+
+    def run(self, duration: float) -> None:
+        """Sample for ``duration`` seconds. Blocks, so call it through ``asyncio.to_thread``."""
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                parts = []
+                while frame is not None:
+                    parts.append(_collapsed_frame(frame.f_code))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                parts.append(names.get(ident, str(ident)).replace(";", ":"))
+                self.stacks[";".join(reversed(parts))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+_profile_lock = asyncio.Lock()
+
+
+async def profile(duration: float, interval: float = 0.005) -> SamplingProfiler | None:
+    """Profile the running process for ``duration`` seconds; None if a profile is already running."""
+    if _profile_lock.locked():
+        return None
+    async with _profile_lock:
+        profiler = SamplingProfiler(interval)
+        await asyncio.to_thread(profiler.run, duration)
+        return profiler
+
+
+# Objects that belong to another cache; sizing stops at them so nothing is counted twice.
+_SHARED_TYPES = (
+    discord.Guild, discord.abc.GuildChannel, discord.Thread, discord.Role, discord.Emoji, discord.GuildSticker,
+    discord.abc.User, discord.state.ConnectionState, discord.Client, enum.Enum,
+    type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType,
+)
+_LEAF_TYPES = (str, bytes, int, float, bool, type(None), datetime.datetime)
+
+
+def _owned_size(obj, seen: set[int]) -> int:
+    """Bytes reachable from ``obj`` without crossing into another cache's objects."""
+    total = 0
+    stack = [(obj, True)]
+    while stack:
+        current, root = stack.pop()
+        if id(current) in seen or (not root and isinstance(current, _SHARED_TYPES)):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, _LEAF_TYPES):
+            continue
+        if isinstance(current, dict):
+            stack.extend((item, False) for pair in current.items() for item in pair)
+        elif isinstance(current, list | tuple | set | frozenset | collections.deque):
+            stack.extend((item, False) for item in current)
+        else:
+            for cls in type(current).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if slot not in ("__weakref__", "__dict__") and hasattr(current, slot):
+                        stack.append((getattr(current, slot), False))
+            if hasattr(current, "__dict__"):
+                stack.append((current.__dict__, False))
+    return total
+
+
+class CacheUsage:
+    __slots__ = ("name", "count", "estimated_bytes")
+
+    def __init__(self, name: str, count: int, estimated_bytes: int):
+        self.name = name
+        self.count = count
+        self.estimated_bytes = estimated_bytes
+
+
+def _estimate(name: str, count: int, objects, sample: int) -> CacheUsage:
+    seen: set[int] = set()
+    sampled = list(itertools.islice(objects, sample))
+    if not sampled:
+        return CacheUsage(name, count, 0)
+    size = sum(_owned_size(obj, seen) for obj in sampled)
+    return CacheUsage(name, count, round(size / len(sampled) * count))
+
+
+def resident_memory() -> int | None:
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KiB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def memory_report(bot: discord.Client, sample: int = 200) -> list[CacheUsage]:
+    """Estimate what each discord.py cache holds by sizing a sample of its entries."""
+    guilds = bot.guilds
+
+    def members():
+        return (m for g in guilds for m in g.members)
+
+    def presences():
+        return (
+            (m.activities, m.client_status)
+            for m in members()
+            if m.activities or m.raw_status != "offline"
+        )
+
+    return [
+        _estimate("guilds", len(guilds), iter(guilds), sample),
+        _estimate("members", sum(len(g.members) for g in guilds), members(), sample),
+        _estimate("presences", sum(1 for _ in presences()), presences(), sample),
+        _estimate("users", len(bot.users), iter(bot.users), sample),
+        _estimate("messages", len(bot.cached_messages), iter(bot.cached_messages), sample),
+        _estimate("channels", sum(len(g.channels) for g in guilds), (c for g in guilds for c in g.channels), sample),
+        _estimate("roles", sum(len(g.roles) for g in guilds), (r for g in guilds for r in g.roles), sample),
+        _estimate("emojis", len(bot.emojis), iter(bot.emojis), sample),
+        _estimate("stickers", len(bot.stickers), iter(bot.stickers), sample),
+    ]
+
+
+_watchdog: LoopWatchdog | None = None
+
+
+def get_watchdog() -> LoopWatchdog | None:
+    return _watchdog
+
+
+def start_watchdog(threshold: float, interval: float) -> LoopWatchdog:
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = LoopWatchdog(threshold=threshold, interval=interval)
+    _watchdog.start()
+    return _watchdog
+
+
+def stop_watchdog() -> None:
+    if _watchdog is not None:
+        _watchdog.stop()
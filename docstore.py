@@ -0,0 +1,683 @@
+"""Embedded document database for running without MongoDB.
+
+It implements the subset of the pymongo Database and Collection API that the bot
+uses, so ``database.get_database()`` can return either one. Unique and TTL
+indexes are enforced; other indexes are only recorded. Documents are kept in
+memory. With a ``path``, every write is also stored in SQLite before the call
+returns, and the file is loaded again on startup. That suits a small
+self-hosted instance whose data fits comfortably in memory.
+"""
+import copy
+import datetime
+import sqlite3
+import threading
+import time
+
+from bson import json_util
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.operations import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+
+import metrics
+
+_JSON_OPTIONS = json_util.JSONOptions(
+    json_mode=json_util.JSONMode.RELAXED, tz_aware=True, tzinfo=datetime.timezone.utc
+)
+
+_MISSING = object()
+# How often expired documents are removed, like MongoDB's TTL monitor.
+_TTL_SWEEP_INTERVAL = 60.0
+
+
+def _get(doc, path: str):
+    cur = doc
+    for part in path.split("."):
+        if isinstance(cur, dict) and part in cur:
+            cur = cur[part]
+        else:
+            return _MISSING
+    return cur
+
+
+def _set(doc: dict, path: str, value) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset(doc: dict, path: str) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def _comparable(a, b) -> bool:
+    if a is _MISSING or a is None or b is None:
+        return False
+    if isinstance(a, datetime.datetime) and isinstance(b, datetime.datetime):
+        return True
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool)
+    return isinstance(a, type(b)) or isinstance(b, type(a)) or (
+        isinstance(a, int | float) and isinstance(b, int | float)
+    )
+
+
+def _equals(value, expected) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+def _match_operator(value, op: str, arg) -> bool:
+    if op == "$eq":
+        return _equals(value, arg)
+    if op == "$ne":
+        return not _equals(value, arg)
+    if op == "$in":
+        return any(_equals(value, a) for a in arg)
+    if op == "$nin":
+        return not any(_equals(value, a) for a in arg)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        if not _comparable(value, arg):
+            return False
+        return {
+            "$gt": value > arg,
+            "$gte": value >= arg,
+            "$lt": value < arg,
+            "$lte": value <= arg,
+        }[op]
+    raise NotImplementedError(f"query operator {op} is not supported by the embedded store")
+
+
+def matches(doc: dict, query: dict | None) -> bool:
+    for key, cond in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+            continue
+        value = _get(doc, key)
+        if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+            if not all(_match_operator(value, op, arg) for op, arg in cond.items()):
+                return False
+        elif not _equals(value, cond):
+            return False
+    return True
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool) -> None:
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set(doc, path, copy.deepcopy(value))
+        elif op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set(doc, path, copy.deepcopy(value))
+        elif op == "$unset":
+            for path in fields:
+                _unset(doc, path)
+        elif op == "$inc":
+            for path, amount in fields.items():
+                current = _get(doc, path)
+                _set(doc, path, (0 if current is _MISSING else current) + amount)
+        elif op in ("$max", "$min"):
+            for path, value in fields.items():
+                current = _get(doc, path)
+                if current is _MISSING or (value > current if op == "$max" else value < current):
+                    _set(doc, path, value)
+        elif op == "$push":
+            for path, value in fields.items():
+                current = _get(doc, path)
+                items = [] if current is _MISSING else current
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                    if "$slice" in value:
+                        n = value["$slice"]
+                        items = items[n:] if n < 0 else items[:n]
+                else:
+                    items.append(copy.deepcopy(value))
+                _set(doc, path, items)
+        else:
+            raise NotImplementedError(f"update operator {op} is not supported by the embedded store")
+
+
+def _project(doc: dict | None, projection) -> dict | None:
+    if doc is None:
+        return None
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    if isinstance(projection, list | tuple):
+        projection = {name: 1 for name in projection}
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        out = {}
+        for path in include:
+            value = _get(doc, path)
+            if value is not _MISSING:
+                _set(out, path, value)
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    for path, value in projection.items():
+        if not value:
+            _unset(doc, path)
+    return doc
+
+
+def _sort_key(spec):
+    def key(doc):
+        out = []
+        for path, direction in spec:
+            value = _get(doc, path)
+            missing = value is _MISSING or value is None
+            out.append(_Ordered(missing, None if missing else value, direction))
+        return out
+    return key
+
+
+class _Ordered:
+    __slots__ = ("missing", "value", "direction")
+
+    def __init__(self, missing, value, direction):
+        self.missing = missing
+        self.value = value
+        self.direction = direction
+
+    def __lt__(self, other):
+        if self.missing != other.missing:
+            less = self.missing
+        elif self.missing or self.value == other.value:
+            return False
+        else:
+            less = self.value < other.value
+        return less if self.direction >= 0 else not less
+
+    def __eq__(self, other):
+        return self.missing == other.missing and self.value == other.value
+
+
+def _normalise_sort(key, direction=None):
+    if isinstance(key, str):
+        return [(key, 1 if direction is None else direction)]
+    return list(key)
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+        self.acknowledged = True
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+        self.acknowledged = True
+
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+        self.acknowledged = True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+        self.acknowledged = True
+
+
+class BulkWriteResult:
+    def __init__(self):
+        self.inserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.deleted_count = 0
+        self.upserted_count = 0
+        self.upserted_ids = {}
+        self.acknowledged = True
+
+
+def _bulk_command(request) -> str:
+    if isinstance(request, InsertOne):
+        return "insert"
+    if isinstance(request, UpdateOne | UpdateMany | ReplaceOne):
+        return "update"
+    if isinstance(request, DeleteOne | DeleteMany):
+        return "delete"
+    raise NotImplementedError(f"{type(request).__name__} is not supported by the embedded store")
+
+
+class Cursor:
+    def __init__(self, collection, docs, projection):
+        self._collection = collection
+        self._docs = docs
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key, direction=None):
+        self._sort = _normalise_sort(key, direction)
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def _results(self):
+        docs = self._docs
+        if self._sort:
+            docs = sorted(docs, key=_sort_key(self._sort))
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(doc, self._projection) for doc in docs]
+
+    def __iter__(self):
+        return iter(self._results())
+
+    def to_list(self, length=None):
+        results = self._results()
+        return results if length is None else results[:length]
+
+
+class Collection:
+    def __init__(self, database: "DocumentDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.docs: list[dict] = []
+        self.indexes: dict[str, dict] = {}
+        self._next_sweep = 0.0
+
+    def _op(self, command: str):
+        return self.database._operation(f"{self.name}.{command}")
+
+    def _check_unique(self, doc: dict, replacing: dict | None = None):
+        for name, info in self.indexes.items():
+            if not info.get("unique"):
+                continue
+            fields = [field for field, _ in info["key"]]
+            key = [_get(doc, field) for field in fields]
+            key = [None if value is _MISSING else value for value in key]
+            for other in self.docs:
+                if other is replacing or other is doc:
+                    continue
+                if [None if (v := _get(other, field)) is _MISSING else v for field in fields] == key:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: {self.database.name}.{self.name} "
+                        f"index: {name} dup key: {dict(zip(fields, key))}",
+                        11000,
+                    )
+
+    def _expire(self):
+        """Remove documents past a TTL index's ``expireAfterSeconds``."""
+        ttl = [(info["key"][0][0], info["expireAfterSeconds"])
+               for info in self.indexes.values() if "expireAfterSeconds" in info]
+        if not ttl or time.monotonic() < self._next_sweep:
+            return
+        self._next_sweep = time.monotonic() + _TTL_SWEEP_INTERVAL
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expired = []
+        for doc in self.docs:
+            for field, seconds in ttl:
+                value = _get(doc, field)
+                if isinstance(value, datetime.datetime):
+                    if value.tzinfo is None:
+                        value = value.replace(tzinfo=datetime.timezone.utc)
+                    if value + datetime.timedelta(seconds=seconds) <= now:
+                        expired.append(doc)
+                        break
+        if expired:
+            ids = {id(doc) for doc in expired}
+            self.docs = [doc for doc in self.docs if id(doc) not in ids]
+            for doc in expired:
+                self.database._remove(self.name, doc)
+
+    def _modify(self, doc: dict, update: dict):
+        if any(info.get("unique") for info in self.indexes.values()):
+            # Check the updated copy so a rejected update leaves the document as it was.
+            updated = copy.deepcopy(doc)
+            _apply_update(updated, update, inserting=False)
+            self._check_unique(updated, replacing=doc)
+            doc.clear()
+            doc.update(updated)
+        else:
+            _apply_update(doc, update, inserting=False)
+        self.database._save(self.name, doc)
+
+    def _insert(self, document: dict):
+        document.setdefault("_id", ObjectId())
+        doc = copy.deepcopy(document)
+        self._check_unique(doc)
+        self.docs.append(doc)
+        self.database._save(self.name, doc)
+        return document["_id"]
+
+    def _find_docs(self, query, sort=None):
+        self._expire()
+        docs = [doc for doc in self.docs if matches(doc, query)]
+        if sort:
+            docs.sort(key=_sort_key(_normalise_sort(sort)))
+        return docs
+
+    def _upsert_doc(self, query: dict, update: dict | None, replacement: dict | None = None) -> dict:
+        doc = {}
+        for key, value in (query or {}).items():
+            if key.startswith("$"):
+                continue
+            if isinstance(value, dict) and any(k.startswith("$") for k in value):
+                if "$eq" in value:
+                    _set(doc, key, copy.deepcopy(value["$eq"]))
+                continue
+            _set(doc, key, copy.deepcopy(value))
+        if replacement is not None:
+            doc = {"_id": doc.get("_id"), **copy.deepcopy(replacement)}
+            if doc["_id"] is None:
+                doc.pop("_id")
+        else:
+            _apply_update(doc, update, inserting=True)
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(doc)
+        self.database._save(self.name, doc)
+        return doc
+
+    def insert_one(self, document: dict):
+        with self._op("insert"):
+            return InsertOneResult(self._insert(document))
+
+    def insert_many(self, documents, ordered=True):
+        with self._op("insert"):
+            return InsertManyResult([self._insert(document) for document in documents])
+
+    def find(self, filter=None, projection=None, sort=None, limit=0):
+        with self._op("find"):
+            cursor = Cursor(self, self._find_docs(filter), projection)
+        if sort:
+            cursor.sort(sort)
+        if limit:
+            cursor.limit(limit)
+        return cursor
+
+    def find_one(self, filter=None, projection=None, sort=None):
+        with self._op("find"):
+            docs = self._find_docs(filter, sort)
+            return _project(docs[0], projection) if docs else None
+
+    def count_documents(self, filter, limit=0):
+        with self._op("aggregate"):
+            self._expire()
+            count = sum(1 for doc in self.docs if matches(doc, filter))
+            return min(count, limit) if limit else count
+
+    def estimated_document_count(self):
+        with self._op("count"):
+            return len(self.docs)
+
+    def _update(self, filter, update, upsert, many):
+        docs = self._find_docs(filter)
+        if not many:
+            docs = docs[:1]
+        for doc in docs:
+            self._modify(doc, update)
+        if not docs and upsert:
+            doc = self._upsert_doc(filter, update)
+            return UpdateResult(0, 0, doc["_id"])
+        return UpdateResult(len(docs), len(docs))
+
+    def update_one(self, filter, update, upsert=False):
+        with self._op("update"):
+            return self._update(filter, update, upsert, many=False)
+
+    def update_many(self, filter, update, upsert=False):
+        with self._op("update"):
+            return self._update(filter, update, upsert, many=True)
+
+    def _replace(self, filter, replacement, upsert):
+        docs = self._find_docs(filter)
+        if docs:
+            doc = docs[0]
+            replaced = {**copy.deepcopy(replacement), "_id": doc.get("_id")}
+            self._check_unique(replaced, replacing=doc)
+            doc.clear()
+            doc.update(replaced)
+            self.database._save(self.name, doc)
+            return UpdateResult(1, 1)
+        if upsert:
+            doc = self._upsert_doc(filter, None, replacement)
+            return UpdateResult(0, 0, doc["_id"])
+        return UpdateResult(0, 0)
+
+    def replace_one(self, filter, replacement, upsert=False):
+        with self._op("update"):
+            return self._replace(filter, replacement, upsert)
+
+    def _delete(self, filter, many):
+        docs = self._find_docs(filter)
+        if not many:
+            docs = docs[:1]
+        ids = {id(doc) for doc in docs}
+        self.docs = [doc for doc in self.docs if id(doc) not in ids]
+        for doc in docs:
+            self.database._remove(self.name, doc)
+        return DeleteResult(len(docs))
+
+    def delete_one(self, filter):
+        with self._op("delete"):
+            return self._delete(filter, many=False)
+
+    def delete_many(self, filter):
+        with self._op("delete"):
+            return self._delete(filter, many=True)
+
+    def find_one_and_delete(self, filter, projection=None, sort=None):
+        with self._op("findAndModify"):
+            docs = self._find_docs(filter, sort)
+            if not docs:
+                return None
+            doc = docs[0]
+            self.docs = [d for d in self.docs if d is not doc]
+            self.database._remove(self.name, doc)
+            return _project(doc, projection)
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                            return_document=ReturnDocument.BEFORE):
+        with self._op("findAndModify"):
+            docs = self._find_docs(filter, sort)
+            if docs:
+                doc = docs[0]
+                before = _project(doc, projection)
+                self._modify(doc, update)
+                return _project(doc, projection) if return_document == ReturnDocument.AFTER else before
+            if upsert:
+                doc = self._upsert_doc(filter, update)
+                return _project(doc, projection) if return_document == ReturnDocument.AFTER else None
+            return None
+
+    def bulk_write(self, requests, ordered=True):
+        # The server receives one command per run of consecutive same-type requests.
+        result = BulkWriteResult()
+        batch, batch_type = [], None
+        for index, request in enumerate(requests):
+            request_type = _bulk_command(request)
+            if batch and request_type != batch_type:
+                self._bulk_batch(batch_type, batch, result)
+                batch = []
+            batch_type = request_type
+            batch.append((index, request))
+        if batch:
+            self._bulk_batch(batch_type, batch, result)
+        return result
+
+    def _bulk_batch(self, command, batch, result):
+        with self._op(command):
+            for index, request in batch:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    result.inserted_count += 1
+                elif isinstance(request, DeleteOne | DeleteMany):
+                    result.deleted_count += self._delete(request._filter, many=isinstance(request, DeleteMany)).deleted_count
+                else:
+                    if isinstance(request, ReplaceOne):
+                        res = self._replace(request._filter, request._doc, request._upsert)
+                    else:
+                        res = self._update(request._filter, request._doc, request._upsert, many=isinstance(request, UpdateMany))
+                    result.matched_count += res.matched_count
+                    result.modified_count += res.modified_count
+                    if res.upserted_id is not None:
+                        result.upserted_count += 1
+                        result.upserted_ids[index] = res.upserted_id
+
+    def create_index(self, keys, **kwargs):
+        with self._op("createIndexes"):
+            spec = _normalise_sort(keys)
+            name = kwargs.get("name") or "_".join(f"{k}_{d}" for k, d in spec)
+            self.indexes[name] = {"key": spec, **kwargs}
+            return name
+
+    def index_information(self):
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+
+class _Operation:
+    __slots__ = ("database", "name", "started")
+
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.database._round_trip()
+        self.database._lock.acquire()
+
+    def __exit__(self, *exc):
+        self.database.operations += 1
+        self.database._lock.release()
+        metrics.record_db(time.perf_counter() - self.started, self.name)
+        return False
+
+
+class _SQLiteStore:
+    """One row per document, keyed by collection and the JSON of its ``_id``."""
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "collection TEXT NOT NULL, id TEXT NOT NULL, body TEXT NOT NULL, "
+            "PRIMARY KEY (collection, id)) WITHOUT ROWID"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS collections (name TEXT PRIMARY KEY)")
+
+    def collections(self) -> list[str]:
+        return [row[0] for row in self.connection.execute("SELECT name FROM collections")]
+
+    def load(self):
+        for collection, body in self.connection.execute("SELECT collection, body FROM documents"):
+            yield collection, json_util.loads(body, json_options=_JSON_OPTIONS)
+
+    def create(self, collection: str):
+        self.connection.execute("INSERT OR IGNORE INTO collections (name) VALUES (?)", (collection,))
+
+    def save(self, collection: str, doc: dict):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO documents (collection, id, body) VALUES (?, ?, ?)",
+            (collection, json_util.dumps(doc["_id"], json_options=_JSON_OPTIONS),
+             json_util.dumps(doc, json_options=_JSON_OPTIONS)),
+        )
+
+    def remove(self, collection: str, doc: dict):
+        self.connection.execute(
+            "DELETE FROM documents WHERE collection = ? AND id = ?",
+            (collection, json_util.dumps(doc["_id"], json_options=_JSON_OPTIONS)),
+        )
+
+    def close(self):
+        self.connection.close()
+
+
+class DocumentDatabase:
+    def __init__(self, name: str = "Arbor", path: str | None = None):
+        self.name = name
+        self.operations = 0
+        self._collections: dict[str, Collection] = {}
+        self._lock = threading.RLock()
+        self._store = _SQLiteStore(path) if path else None
+        if self._store is not None:
+            for collection in self._store.collections():
+                self[collection]
+            for collection, doc in self._store.load():
+                self[collection].docs.append(doc)
+
+    def _operation(self, name: str):
+        return _Operation(self, name)
+
+    def _round_trip(self):
+        pass
+
+    def _save(self, collection: str, doc: dict):
+        if self._store is not None:
+            self._store.save(collection, doc)
+
+    def _remove(self, collection: str, doc: dict):
+        if self._store is not None:
+            self._store.remove(collection, doc)
+
+    def __getattr__(self, name: str) -> Collection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> Collection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = Collection(self, name)
+        return collection
+
+    def get_collection(self, name: str) -> Collection:
+        return self[name]
+
+    def list_collection_names(self):
+        with self._operation("listCollections"):
+            return list(self._collections)
+
+    def create_collection(self, name: str):
+        with self._operation("create"):
+            if self._store is not None:
+                self._store.create(name)
+            return self[name]
+
+    def command(self, name, *args, **kwargs):
+        with self._operation(name):
+            if name == "ping":
+                return {"ok": 1.0}
+            raise NotImplementedError(f"command {name} is not supported by the embedded store")
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -0,0 +1,287 @@
+"""Duck-typed Discord objects for driving cog callbacks without a gateway.
+
+They carry the attributes the cogs read and record what would have been sent.
+``api_latency`` makes every outgoing call await that long, to mimic REST round-trips.
+"""
+import asyncio
+import datetime
+import functools
+import itertools
+
+import discord
+
+_EPOCH = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class FakeDiscord:
+    """Owns id allocation and counts the REST calls made through the fakes."""
+
+    def __init__(self, api_latency: float = 0.0):
+        self.api_latency = api_latency
+        self.api_calls = 0
+        self._ids = itertools.count(100_000_000_000_000_000)
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    async def call(self):
+        self.api_calls += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+
+    def guild(self, name: str = "Bench", members: int = 10, channels: int = 1) -> "FakeGuild":
+        guild = FakeGuild(self, name)
+        moderator = guild.add_role("Moderator", position=2, permissions=discord.Permissions(
+            moderate_members=True, manage_channels=True, manage_roles=True, manage_messages=True))
+        member_role = guild.add_role("Member", position=1)
+        owner = guild.add_member("owner", roles=[moderator])
+        guild.owner_id = owner.id
+        guild.me = guild.add_member("arbor", bot=True, roles=[moderator])
+        guild.add_member("moderator", roles=[moderator])
+        for i in range(members):
+            guild.add_member(f"member{i}", roles=[member_role])
+        for i in range(channels):
+            guild.add_channel(f"channel-{i}")
+        return guild
+
+
+class FakeAsset:
+    __slots__ = ("url",)
+
+    def __init__(self, url: str):
+        self.url = url
+
+
+@functools.total_ordering
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", role_id: int, name: str, position: int,
+                 permissions: discord.Permissions | None = None):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+        self.position = position
+        self.permissions = permissions or discord.Permissions.none()
+        self.mention = f"<@&{role_id}>"
+
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+
+    def __lt__(self, other):
+        return (self.position, self.id) < (other.position, other.id)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeUser:
+    def __init__(self, world: FakeDiscord, user_id: int, name: str, bot: bool = False):
+        self.world = world
+        self.id = user_id
+        self.name = name
+        self.global_name = name
+        self.display_name = name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+        self.created_at = _EPOCH
+        self.display_avatar = FakeAsset(f"https://cdn.example.invalid/avatars/{user_id}.png")
+        self.color = discord.Color.default()
+        self.status = discord.Status.online
+        self.activity = None
+        self.dms: list[dict] = []
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        await self.world.call()
+        self.dms.append({"content": content, **kwargs})
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild: "FakeGuild", user_id: int, name: str, bot: bool = False,
+                 roles: list[FakeRole] | None = None):
+        super().__init__(guild.world, user_id, name, bot)
+        self.guild = guild
+        self.nick = None
+        self.joined_at = _EPOCH
+        self.roles = [guild.default_role, *(roles or [])]
+
+    @property
+    def top_role(self) -> FakeRole:
+        return max(self.roles)
+
+    @property
+    def guild_permissions(self) -> discord.Permissions:
+        if self.guild.owner_id == self.id:
+            return discord.Permissions.all()
+        value = 0
+        for role in self.roles:
+            value |= role.permissions.value
+        return discord.Permissions(value)
+
+
+class FakeAttachment:
+    def __init__(self, attachment_id: int, filename: str):
+        self.id = attachment_id
+        self.filename = filename
+        self.url = f"https://cdn.example.invalid/attachments/{attachment_id}/{filename}"
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", author: FakeUser, content: str = "",
+                 mentions: list[FakeUser] | None = None, attachments: list[FakeAttachment] | None = None,
+                 embed: discord.Embed | None = None):
+        self.id = channel.world.next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content or ""
+        self.mentions = mentions or []
+        self.attachments = attachments or []
+        self.embeds = [embed] if embed is not None else []
+        self.interaction_metadata = None
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{self.id}"
+
+    async def delete(self, **kwargs):
+        await self.channel.world.call()
+
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", channel_id: int, name: str):
+        self.world = guild.world
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.slowmode_delay = 0
+        self.overwrites: dict[int, discord.PermissionOverwrite] = {}
+        self.messages: list[FakeMessage] = []
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, *, embed=None, **kwargs):
+        await self.world.call()
+        message = FakeMessage(self, self.guild.me, content or "", embed=embed)
+        self.messages.append(message)
+        return message
+
+    def overwrites_for(self, target) -> discord.PermissionOverwrite:
+        overwrite = self.overwrites.get(target.id)
+        return discord.PermissionOverwrite(**dict(overwrite)) if overwrite else discord.PermissionOverwrite()
+
+    async def set_permissions(self, target, *, reason=None, **permissions):
+        await self.world.call()
+        overwrite = self.overwrites_for(target)
+        overwrite.update(**permissions)
+        self.overwrites[target.id] = overwrite
+
+    async def edit(self, *, reason=None, **fields):
+        await self.world.call()
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    async def history(self, limit=100, oldest_first=False):
+        await self.world.call()
+        messages = self.messages if oldest_first else list(reversed(self.messages))
+        for message in messages[:limit]:
+            yield message
+
+
+class FakeGuild:
+    def __init__(self, world: FakeDiscord, name: str):
+        self.world = world
+        self.id = world.next_id()
+        self.name = name
+        self.owner_id = None
+        self.me = None
+        self.roles: list[FakeRole] = []
+        self.members: list[FakeMember] = []
+        self.channels: list[FakeChannel] = []
+        self._members: dict[int, FakeMember] = {}
+        self._roles: dict[int, FakeRole] = {}
+        self._channels: dict[int, FakeChannel] = {}
+        self.default_role = self.add_role("@everyone", position=0, role_id=self.id)
+
+    @property
+    def owner(self) -> FakeMember | None:
+        return self._members.get(self.owner_id)
+
+    def add_role(self, name: str, position: int, permissions: discord.Permissions | None = None,
+                 role_id: int | None = None) -> FakeRole:
+        role = FakeRole(self, role_id or self.world.next_id(), name, position, permissions)
+        self.roles.append(role)
+        self._roles[role.id] = role
+        return role
+
+    def add_member(self, name: str, bot: bool = False, roles: list[FakeRole] | None = None) -> FakeMember:
+        member = FakeMember(self, self.world.next_id(), name, bot=bot, roles=roles)
+        self.members.append(member)
+        self._members[member.id] = member
+        return member
+
+    def add_channel(self, name: str) -> FakeChannel:
+        channel = FakeChannel(self, self.world.next_id(), name)
+        self.channels.append(channel)
+        self._channels[channel.id] = channel
+        return channel
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+
+class FakeContext:
+    """Stands in for commands.Context; ``sent`` collects every reply."""
+
+    def __init__(self, bot, author: FakeMember, channel: FakeChannel, command=None,
+                 attachments: list[FakeAttachment] | None = None):
+        self.bot = bot
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.command = command
+        self.invoked_subcommand = None
+        self.interaction = None
+        self.command_failed = False
+        self.message = FakeMessage(channel, author, attachments=attachments)
+        self.sent: list[dict] = []
+
+    async def send(self, content=None, **kwargs):
+        await self.channel.world.call()
+        self.sent.append({"content": content, **kwargs})
+        return FakeMessage(self.channel, self.guild.me, content or "", embed=kwargs.get("embed"))
+
+    reply = send
+
+    async def defer(self, **kwargs):
+        await self.channel.world.call()
+
+    async def send_help(self, *args):
+        await self.send("help")
+
+    def typing(self, **kwargs):
+        return _NullTyping()
+
+
+class _NullTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
@@ -0,0 +1,60 @@
+"""Local stand-in for meme-api.com.
+
+Run ``python -m fakes.meme_api`` and point ``[meme] api_url`` in config.toml at
+``http://127.0.0.1:8765/gimme``.
+"""
+import argparse
+import itertools
+
+from aiohttp import web
+
+_counter = itertools.count(1)
+
+
+def _meme(n: int) -> dict:
+    return {
+        "postLink": f"https://redd.it/stub{n}",
+        "subreddit": "stub",
+        "title": f"Stub meme {n}",
+        "url": f"https://i.example.invalid/stub/{n}.png",
+        "nsfw": False,
+        "spoiler": False,
+    }
+
+
+async def gimme(request: web.Request) -> web.Response:
+    return web.json_response(_meme(next(_counter)))
+
+
+async def gimme_many(request: web.Request) -> web.Response:
+    try:
+        count = max(1, min(int(request.match_info["count"]), 50))
+    except ValueError:
+        return web.json_response({"code": 400, "message": "count must be a number"}, status=400)
+    memes = [_meme(next(_counter)) for _ in range(count)]
+    return web.json_response({"count": len(memes), "memes": memes})
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/gimme", gimme)
+    app.router.add_get("/gimme/{count}", gimme_many)
+    return app
+
+
+async def start(host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+    """Start the stub in the running loop and return the runner and its /gimme URL."""
+    runner = web.AppRunner(create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return runner, f"http://{host}:{bound_port}/gimme"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local meme-api stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
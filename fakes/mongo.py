@@ -0,0 +1,20 @@
+"""In-memory stand-in for MongoDB in benchmarks.
+
+Install it with ``database._database = MemoryDatabase()``. It is the embedded
+document store without SQLite. Every operation is reported to
+``metrics.record_db`` like the pymongo listener does, and ``latency`` adds a
+blocking sleep per operation to mimic a network round-trip.
+"""
+import time
+
+from docstore import DocumentDatabase
+
+
+class MemoryDatabase(DocumentDatabase):
+    def __init__(self, name: str = "Arbor", latency: float = 0.0, path: str | None = None):
+        super().__init__(name, path)
+        self.latency = latency
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
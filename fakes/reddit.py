@@ -0,0 +1,43 @@
+import itertools
+from types import SimpleNamespace
+
+
+class FakeSubreddit:
+    def __init__(self, reddit, name: str):
+        self._reddit = reddit
+        self.display_name = name
+
+    async def _listing(self, limit: int = 100):
+        self._reddit.listing_calls += 1
+        for _ in range(limit):
+            n = next(self._reddit._ids)
+            yield SimpleNamespace(
+                id=f"{self.display_name}{n}",
+                url=f"https://i.example.invalid/r/{self.display_name}/{n}.png",
+                stickied=False,
+                over_18=False,
+            )
+
+    def hot(self, limit: int = 100):
+        return self._listing(limit)
+
+    def new(self, limit: int = 100):
+        return self._listing(limit)
+
+    def top(self, limit: int = 100):
+        return self._listing(limit)
+
+
+class FakeReddit:
+    """Stands in for ``asyncpraw.Reddit`` when passed as ``RedditFeed(client=...)``."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self.listing_calls = 0
+        self.closed = False
+
+    async def subreddit(self, name: str) -> FakeSubreddit:
+        return FakeSubreddit(self, name)
+
+    async def close(self):
+        self.closed = True
@@ -0,0 +1,123 @@
+"""In-process stand-in for the parts of redis-py that shared_cache uses.
+
+Clients from the same FakeRedisServer share keys and pub/sub, so two of them
+act like two bot processes talking to one Redis. Messages are delivered
+synchronously inside ``publish``.
+"""
+import collections
+import time
+
+
+class FakeRedisServer:
+    def __init__(self):
+        self.data: dict[str, tuple[str, float | None]] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.subscribers: dict[str, list] = collections.defaultdict(list)
+        self.commands = 0
+
+    def client(self) -> "FakeRedis":
+        return FakeRedis(self)
+
+
+class FakeRedis:
+    def __init__(self, server: FakeRedisServer | None = None):
+        self.server = server or FakeRedisServer()
+
+    def _live(self, key: str):
+        entry = self.server.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.server.data[key]
+            return None
+        return value
+
+    def ping(self):
+        self.server.commands += 1
+        return True
+
+    def get(self, key: str):
+        self.server.commands += 1
+        return self._live(key)
+
+    def set(self, key: str, value: str, ex: float | None = None, nx: bool = False):
+        self.server.commands += 1
+        if nx and self._live(key) is not None:
+            return None
+        self.server.data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        self.server.commands += 1
+        return sum(self.server.data.pop(key, None) is not None for key in keys)
+
+    def _ranked(self, key: str) -> list[tuple[str, float]]:
+        return sorted(self.server.sorted_sets.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+
+    def zadd(self, key: str, mapping: dict, gt: bool = False) -> int:
+        self.server.commands += 1
+        members = self.server.sorted_sets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            member = str(member)
+            if member not in members:
+                added += 1
+            elif gt and score <= members[member]:
+                continue
+            members[member] = float(score)
+        return added
+
+    def zrevrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        self.server.commands += 1
+        ranked = self._ranked(key)[::-1]
+        rows = ranked[start:None if end == -1 else end + 1]
+        return rows if withscores else [member for member, _ in rows]
+
+    def zremrangebyrank(self, key: str, start: int, end: int) -> int:
+        self.server.commands += 1
+        ranked = self._ranked(key)
+        removed = ranked[start:None if end == -1 else end + 1]
+        for member, _ in removed:
+            del self.server.sorted_sets[key][member]
+        return len(removed)
+
+    def publish(self, channel: str, message: str) -> int:
+        self.server.commands += 1
+        handlers = list(self.server.subscribers.get(channel, ()))
+        for handler in handlers:
+            handler({"type": "message", "pattern": None, "channel": channel, "data": message})
+        return len(handlers)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> "FakePubSub":
+        return FakePubSub(self.server)
+
+    def close(self):
+        pass
+
+
+class FakePubSub:
+    def __init__(self, server: FakeRedisServer):
+        self.server = server
+        self.handlers: dict[str, object] = {}
+
+    def subscribe(self, **handlers):
+        for channel, handler in handlers.items():
+            self.handlers[channel] = handler
+            self.server.subscribers[channel].append(handler)
+
+    def run_in_thread(self, sleep_time: float = 0.0, daemon: bool = False, exception_handler=None):
+        return _FakeWorker(self)
+
+    def close(self):
+        for channel, handler in self.handlers.items():
+            self.server.subscribers[channel].remove(handler)
+        self.handlers = {}
+
+
+class _FakeWorker:
+    def __init__(self, pubsub: FakePubSub):
+        self.pubsub = pubsub
+
+    def stop(self):
+        self.pubsub.close()
@@ -0,0 +1,9 @@
+class StubTranslator:
+    """Offline translator: set ``[translation] backend = "fakes.translator:StubTranslator"``."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text: str, target: str) -> str:
+        self.calls += 1
+        return f"[{target}] {text}"
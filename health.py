@@ -0,0 +1,89 @@
+import asyncio
+import collections
+import math
+
+import config
+import database
+
+
+def percentile(values, q: float) -> float | None:
+    """Nearest-rank percentile of ``values`` (0 < q <= 100), or None when empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RollingWindow:
+    __slots__ = ("samples",)
+
+    def __init__(self, size: int):
+        self.samples: collections.deque[float] = collections.deque(maxlen=size)
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    def percentiles(self, *qs: float) -> tuple[float | None, ...]:
+        ordered = sorted(self.samples)
+        return tuple(percentile(ordered, q) for q in qs)
+
+
+class HealthSampler:
+    """Samples database round-trips and event-loop lag in the background."""
+
+    def __init__(self, database_interval: float = 15, loop_interval: float = 0.5, window: int = 240):
+        self.database_interval = database_interval
+        self.loop_interval = loop_interval
+        self.database = RollingWindow(window)
+        self.loop_lag = RollingWindow(window)
+        self.database_available: bool | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._sample_database()),
+                asyncio.create_task(self._sample_loop_lag()),
+            ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _sample_database(self):
+        while True:
+            ping = await asyncio.to_thread(database.ping_database)
+            self.database_available = ping is not None
+            if ping is not None:
+                self.database.add(ping)
+            await asyncio.sleep(self.database_interval)
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.loop_interval
+            await asyncio.sleep(self.loop_interval)
+            self.loop_lag.add(max(0.0, loop.time() - expected) * 1000)
+
+
+_sampler: HealthSampler | None = None
+
+
+def get_sampler() -> HealthSampler:
+    global _sampler
+    if _sampler is None:
+        settings = config.config_data.health
+        _sampler = HealthSampler(settings.database_interval, settings.loop_interval, settings.window)
+    return _sampler
+
+
+def start() -> None:
+    get_sampler().start()
+
+
+async def stop() -> None:
+    if _sampler is not None:
+        await _sampler.stop()
@@ -0,0 +1,25 @@
+import aiohttp
+
+_session: aiohttp.ClientSession | None = None
+
+_TIMEOUT = aiohttp.ClientTimeout(total=10)
+_HEADERS = {"User-Agent": "ArborBot (https://github.com/motionzlol/arbor-bot)"}
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the bot-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=_TIMEOUT,
+            headers=_HEADERS,
+            connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
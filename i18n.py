@@ -4,6 +4,8 @@ import threading
 from typing import Any, Dict, Optional
 
 import database
+import shared_cache
+import timeparse
 
 _LOCK = threading.RLock()
 _LOCALES: Dict[str, Dict[str, Any]] = {}
@@ -52,14 +54,19 @@ def available_languages() -> list[str]:
     return sorted(_LOCALES.keys())
 
 
+def _load_user_language(user_id: int) -> Optional[str]:
+    db = database.get_database()
+    doc = db.user_language_preferences.find_one({"user_id": user_id}, {"language": 1})
+    if doc and isinstance(doc.get("language"), str):
+        return doc["language"].lower()
+    return None
+
+
 def get_user_language(user_id: int) -> str:
     try:
-        db = database.get_database()
-        doc = db.user_language_preferences.find_one({"user_id": user_id})
-        if doc and isinstance(doc.get("language"), str):
-            lang = doc["language"].lower()
-            if lang in available_languages():
-                return lang
+        lang = shared_cache.get_cache("language").get(user_id, lambda: _load_user_language(user_id))
+        if lang in available_languages():
+            return lang
     except Exception:
         pass
     return _DEFAULT_LANG
@@ -70,14 +77,48 @@ def set_user_language(user_id: int, language: str) -> None:
     db.user_language_preferences.update_one(
         {"user_id": user_id}, {"$set": {"language": language.lower()}}, upsert=True
     )
+    shared_cache.get_cache("language").set(user_id, language.lower())
+
+
+def _load_user_timezone(user_id: int) -> Optional[str]:
+    db = database.get_database()
+    doc = db.user_language_preferences.find_one({"user_id": user_id}, {"timezone": 1})
+    if doc and isinstance(doc.get("timezone"), str):
+        return doc["timezone"]
+    return None
+
+
+def get_user_timezone(user_id: int):
+    """The user's timezone for reading times they type; UTC if they never set one."""
+    try:
+        name = shared_cache.get_cache("timezone").get(user_id, lambda: _load_user_timezone(user_id))
+        tz = timeparse.zone(name)
+        if tz is not None:
+            return tz
+    except Exception:
+        pass
+    return timeparse.UTC
+
+
+def set_user_timezone(user_id: int, name: str) -> None:
+    db = database.get_database()
+    db.user_language_preferences.update_one(
+        {"user_id": user_id}, {"$set": {"timezone": name}}, upsert=True
+    )
+    shared_cache.get_cache("timezone").set(user_id, name)
 
 
 def t(user_id: Optional[int], key: str, **kwargs) -> str:
-    if not _LOCALES:
-        load_locales()
     lang = _DEFAULT_LANG
     if user_id is not None:
         lang = get_user_language(user_id)
+    return translate(lang, key, **kwargs)
+
+
+def translate(lang: str, key: str, **kwargs) -> str:
+    """Like ``t``, for a language the caller already looked up."""
+    if not _LOCALES:
+        load_locales()
     # Try user language
     text = _deep_get(_LOCALES.get(lang, {}), key)
     if text is None:
@@ -0,0 +1,140 @@
+"""Run the bot as several clusters: ``python launcher.py``.
+
+Every cluster is a separate bot.py process running an AutoShardedBot over a
+contiguous range of shards. Crashed clusters are restarted with backoff, and
+SIGINT/SIGTERM stop them all.
+"""
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+import cluster
+import config
+
+_BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot.py')
+# Discord allows max_concurrency identifies every 5 seconds.
+_IDENTIFY_INTERVAL = 5
+_STABLE_AFTER = 300
+
+
+def shard_ranges(shard_count: int, clusters: int) -> list[list[int]]:
+    per, extra = divmod(shard_count, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        size = per + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+async def gateway_info(token: str) -> tuple[int, int]:
+    """Recommended shard count and identify concurrency from GET /gateway/bot."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            'https://discord.com/api/v10/gateway/bot', headers={'Authorization': f'Bot {token}'}
+        ) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+    return data['shards'], data.get('session_start_limit', {}).get('max_concurrency', 1)
+
+
+class Worker:
+    def __init__(self, cluster_id: int, count: int, shard_ids: list[int], shard_count: int):
+        self.cluster_id = cluster_id
+        self.env = {**os.environ, **cluster.worker_env(cluster_id, count, shard_ids, shard_count)}
+        self.shard_ids = shard_ids
+        self.process: subprocess.Popen | None = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at: float | None = None
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, _BOT_PATH], env=self.env)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        print(f'[launcher] cluster {self.cluster_id} started as pid {self.process.pid} (shards {self.shard_ids})')
+
+    def check(self):
+        """Schedule a restart with exponential backoff if the process has exited."""
+        if self.process is None or self.restart_at is not None or self.process.poll() is None:
+            return
+        code = self.process.returncode
+        if time.monotonic() - self.started_at > _STABLE_AFTER:
+            self.failures = 0
+        self.failures += 1
+        delay = min(60, 2 ** self.failures)
+        self.restart_at = time.monotonic() + delay
+        print(f'[launcher] cluster {self.cluster_id} exited with {code}, restarting in {delay}s')
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+
+
+def main():
+    load_dotenv()
+    token = os.getenv('prodtoken')
+    if not token:
+        print('set token in .env lol')
+        return
+    if config.config_data.storage.backend != 'mongo':
+        # Every cluster would keep its own copy of an embedded store.
+        print('clusters need [storage] backend = "mongo"')
+        return
+    settings = config.config_data.sharding
+    recommended, concurrency = asyncio.run(gateway_info(token))
+    shard_count = settings.shard_count or recommended
+    clusters = min(settings.clusters, shard_count)
+    workers = [
+        Worker(i, clusters, shard_ids, shard_count)
+        for i, shard_ids in enumerate(shard_ranges(shard_count, clusters))
+    ]
+    print(f'[launcher] {shard_count} shard(s) across {clusters} cluster(s)')
+
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Stagger the clusters so their shards identify within Discord's rate limit.
+    for worker in workers:
+        if stopping:
+            break
+        worker.start()
+        wait_until = time.monotonic() + _IDENTIFY_INTERVAL * len(worker.shard_ids) / concurrency
+        while not stopping and time.monotonic() < wait_until:
+            time.sleep(0.5)
+
+    while not stopping:
+        now = time.monotonic()
+        for worker in workers:
+            worker.check()
+            if worker.restart_at is not None and now >= worker.restart_at:
+                worker.start()
+        time.sleep(1)
+
+    print('[launcher] stopping clusters')
+    for worker in workers:
+        worker.stop()
+    deadline = time.monotonic() + 15
+    for worker in workers:
+        if worker.process is None:
+            continue
+        try:
+            worker.process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Reputation leaderboards, kept current on every grant.
+
+A board holds the ``size`` highest totals, either globally or for one guild. It
+is seeded from an indexed query sorted by total the first time it is needed.
+After that, every grant offers the member's new total. Totals only grow, so a
+seeded board stays exact and reading it never sorts the collection again.
+
+With a Redis client from shared_cache, boards are sorted sets shared by every
+process, so grants handled by other clusters show up as well. A marker member
+records that a set was seeded; a Redis restart or eviction takes it along with
+the set, and the next read seeds again. The in-process boards are still
+updated and serve reads if Redis fails.
+"""
+import bisect
+import threading
+
+from cachetools import LRUCache
+
+import config
+import database
+import shared_cache
+
+_GLOBAL = "global"
+_SEEDED = "seeded"
+_ID_LIMIT = (1 << 64) - 1
+
+
+def _member(user_id: int) -> str:
+    # Redis orders equal scores by member; this puts the lower user id first, as TopK does.
+    return f"{_ID_LIMIT - user_id:020d}"
+
+
+def _user_id(member: str) -> int:
+    return _ID_LIMIT - int(member)
+
+
+class TopK:
+    """The ``size`` highest totals by user id, best first."""
+
+    __slots__ = ("size", "_order", "_totals")
+
+    def __init__(self, size: int):
+        self.size = size
+        # (-total, user_id), so ties go to the lower user id.
+        self._order: list[tuple[int, int]] = []
+        self._totals: dict[int, int] = {}
+
+    def __len__(self):
+        return len(self._order)
+
+    def offer(self, user_id: int, total: int):
+        current = self._totals.get(user_id)
+        if current is not None:
+            if total <= current:
+                return
+            del self._order[bisect.bisect_left(self._order, (-current, user_id))]
+        elif len(self._order) >= self.size and (-total, user_id) >= self._order[-1]:
+            return
+        bisect.insort(self._order, (-total, user_id))
+        self._totals[user_id] = total
+        if len(self._order) > self.size:
+            _, evicted = self._order.pop()
+            del self._totals[evicted]
+
+    def top(self) -> list[tuple[int, int]]:
+        return [(user_id, -total) for total, user_id in self._order]
+
+
+class Leaderboards:
+    def __init__(self, size: int, guilds: int):
+        self.size = size
+        self._global: TopK | None = None
+        # Boards for guilds nobody looked at recently are dropped and seeded again.
+        self._guilds: LRUCache = LRUCache(maxsize=guilds)
+        # Grants made while a board is being seeded, one list per thread seeding it.
+        self._loading: dict[int | None, list[list[tuple[int, int]]]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, guild_id: int | None) -> list[tuple[int, int]]:
+        db = database.get_database()
+        if guild_id is None:
+            cursor = db.reputation.find({}, {"_id": 0, "user_id": 1, "total": 1})
+        else:
+            cursor = db.guild_reputation.find({"guild_id": guild_id}, {"_id": 0, "user_id": 1, "total": 1})
+        return [
+            (doc["user_id"], doc.get("total", 0))
+            for doc in cursor.sort([("total", -1), ("user_id", 1)]).limit(self.size)
+            if doc.get("user_id") is not None
+        ]
+
+    def _stop_loading(self, guild_id: int | None, offers: list[tuple[int, int]]):
+        # Called with the lock held. By identity: another thread's list may be equal.
+        pending = [other for other in self._loading[guild_id] if other is not offers]
+        if pending:
+            self._loading[guild_id] = pending
+        else:
+            del self._loading[guild_id]
+
+    def _local(self, guild_id: int | None, create: bool = False) -> TopK | None:
+        with self._lock:
+            board = self._global if guild_id is None else self._guilds.get(guild_id)
+            if board is not None or not create:
+                return board
+            offers = []
+            self._loading.setdefault(guild_id, []).append(offers)
+        board = TopK(self.size)
+        try:
+            for user_id, total in self._load(guild_id):
+                board.offer(user_id, total)
+        except Exception:
+            with self._lock:
+                self._stop_loading(guild_id, offers)
+            raise
+        with self._lock:
+            self._stop_loading(guild_id, offers)
+            # Grants made while the query ran, which it may have missed.
+            for user_id, total in offers:
+                board.offer(user_id, total)
+            if guild_id is None:
+                if self._global is None:
+                    self._global = board
+                return self._global
+            return self._guilds.setdefault(guild_id, board)
+
+    def _key(self, guild_id: int | None) -> str:
+        scope = _GLOBAL if guild_id is None else str(guild_id)
+        return f"{config.config_data.shared_cache.prefix}:reptop:{scope}"
+
+    def _remote_offer(self, client, guild_id: int | None, entries: list[tuple[int, int]]):
+        if not entries:
+            return
+        key = self._key(guild_id)
+        client.zadd(key, {_member(user_id): total for user_id, total in entries}, gt=True)
+        # The marker scores highest, so it is never trimmed.
+        client.zremrangebyrank(key, 0, -(self.size + 2))
+
+    def _remote_top(self, client, guild_id: int | None) -> list[tuple[int, int]]:
+        key = self._key(guild_id)
+        rows = client.zrevrange(key, 0, self.size, withscores=True)
+        if not rows or rows[0][0] != _SEEDED:
+            # Grants recorded since the set was lost are kept; zadd with gt only raises totals.
+            self._remote_offer(client, guild_id, self._load(guild_id))
+            client.zadd(key, {_SEEDED: float("inf")})
+            rows = client.zrevrange(key, 0, self.size, withscores=True)
+        return [(_user_id(member), int(score)) for member, score in rows if member != _SEEDED]
+
+    def seed(self):
+        """Load the global board, so the first read does not wait for the query."""
+        self._local(None, create=True)
+
+    def record(self, user_id: int, total: int, guild_id: int | None = None):
+        """Offer ``user_id``'s new total after a grant."""
+        with self._lock:
+            board = self._global if guild_id is None else self._guilds.get(guild_id)
+            if board is not None:
+                board.offer(user_id, total)
+            for offers in self._loading.get(guild_id, ()):
+                offers.append((user_id, total))
+        client = shared_cache.get_client()
+        if client is not None:
+            try:
+                self._remote_offer(client, guild_id, [(user_id, total)])
+            except Exception as e:
+                print(f"Failed to update the shared leaderboard: {e}")
+
+    def top(self, guild_id: int | None = None) -> list[tuple[int, int]]:
+        """(user_id, total) pairs, highest first, for a guild or globally."""
+        client = shared_cache.get_client()
+        if client is not None:
+            try:
+                return self._remote_top(client, guild_id)
+            except Exception as e:
+                print(f"Failed to read the shared leaderboard: {e}")
+        board = self._local(guild_id, create=True)
+        with self._lock:
+            return board.top()
+
+
+_boards: Leaderboards | None = None
+
+
+def get_boards() -> Leaderboards:
+    global _boards
+    if _boards is None:
+        settings = config.config_data.leaderboard
+        _boards = Leaderboards(settings.size, settings.guilds)
+    return _boards
+
+
+def reset() -> None:
+    global _boards
+    _boards = None
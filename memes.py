@@ -0,0 +1,172 @@
+import asyncio
+import collections
+import os
+import random
+
+import aiohttp
+
+import http_client
+
+
+class MemeAPIError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"meme API returned status {status}")
+        self.status = status
+
+
+async def fetch_memes(api_url: str, count: int) -> list[str]:
+    """Fetch up to ``count`` meme image URLs from a meme-api compatible endpoint."""
+    url = api_url if count <= 1 else f"{api_url.rstrip('/')}/{count}"
+    async with http_client.get_session().get(url) as response:
+        if response.status != 200:
+            raise MemeAPIError(response.status)
+        data = await response.json()
+    items = data.get("memes") if isinstance(data.get("memes"), list) else [data]
+    return [item["url"] for item in items if isinstance(item, dict) and item.get("url")]
+
+
+class MemeBuffer:
+    """Local buffer of meme URLs that a background task keeps topped up in batches."""
+
+    def __init__(self, api_url: str, batch_size: int = 25, capacity: int = 100):
+        self.api_url = api_url
+        self.batch_size = max(1, min(batch_size, 50))
+        self.capacity = max(capacity, self.batch_size)
+        self.low_watermark = self.capacity // 2
+        self._buffer: collections.deque[str] = collections.deque(maxlen=self.capacity)
+        self._refill = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._refill.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def pop(self) -> str | None:
+        url = self._buffer.popleft() if self._buffer else None
+        if len(self._buffer) < self.low_watermark:
+            self._refill.set()
+        return url
+
+    async def _run(self):
+        while True:
+            await self._refill.wait()
+            self._refill.clear()
+            while len(self._buffer) < self.capacity:
+                try:
+                    urls = await fetch_memes(self.api_url, self.batch_size)
+                except (aiohttp.ClientError, asyncio.TimeoutError, MemeAPIError) as e:
+                    print(f"Meme prefetch failed: {e}")
+                    await asyncio.sleep(30)
+                    break
+                seen = set(self._buffer)
+                fresh = [url for url in dict.fromkeys(urls) if url not in seen]
+                if not fresh:
+                    break
+                self._buffer.extend(fresh)
+
+
+_IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+
+def _create_reddit_client():
+    import asyncpraw
+    return asyncpraw.Reddit(
+        client_id=os.getenv("reddit_client_id"),
+        client_secret=os.getenv("reddit_client_secret"),
+        user_agent=os.getenv("reddit_user_agent", "ArborBot (https://github.com/motionzlol/arbor-bot)"),
+    )
+
+
+class RedditFeed:
+    """Per-subreddit ring buffers of unseen image posts, refilled from batched listing calls."""
+
+    def __init__(self, subreddits: list[str], listing: str = "hot", batch_size: int = 100,
+                 refresh_seconds: float = 600, capacity: int = 500, client=None):
+        self.listing = listing
+        self.batch_size = batch_size
+        self.refresh_seconds = refresh_seconds
+        self.client = client
+        self._posts: dict[str, collections.deque[str]] = {
+            name.lower(): collections.deque(maxlen=capacity) for name in subreddits
+        }
+        self._seen: dict[str, dict[str, None]] = {name: {} for name in self._posts}
+        self._seen_limit = capacity * 4
+        self._refill = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self):
+        return sum(len(posts) for posts in self._posts.values())
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    def pop(self) -> str | None:
+        ready = [posts for posts in self._posts.values() if posts]
+        if len(ready) < len(self._posts):
+            self._refill.set()
+        if not ready:
+            return None
+        return random.choice(ready).popleft()
+
+    async def refresh(self, name: str) -> int:
+        """Pull one listing batch for ``name`` and buffer the image posts not served before."""
+        if self.client is None:
+            self.client = _create_reddit_client()
+        subreddit = await self.client.subreddit(name)
+        posts, seen = self._posts[name], self._seen[name]
+        added = 0
+        async for submission in getattr(subreddit, self.listing)(limit=self.batch_size):
+            if submission.id in seen or submission.stickied or submission.over_18:
+                continue
+            url = getattr(submission, "url", "") or ""
+            if not url.lower().endswith(_IMAGE_SUFFIXES):
+                continue
+            seen[submission.id] = None
+            posts.append(url)
+            added += 1
+        while len(seen) > self._seen_limit:
+            del seen[next(iter(seen))]
+        return added
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            for name in self._posts:
+                try:
+                    await self.refresh(name)
+                except Exception as e:
+                    print(f"Failed to refresh r/{name}: {e}")
+            self._refill.clear()
+            try:
+                await asyncio.wait_for(self._refill.wait(), timeout=self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+            # An empty buffer asks for a refill early, but never more than once a minute.
+            await asyncio.sleep(max(0.0, started + 60 - loop.time()))
@@ -0,0 +1,283 @@
+import contextvars
+import functools
+import threading
+import time
+
+from aiohttp import web
+from pymongo import monitoring
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_COUNT_BUCKETS = (0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+_PHASES = ("total", "database", "discord", "render")
+
+_lock = threading.Lock()
+_latency: dict[tuple[str, str, str], "Histogram"] = {}
+_db_ops: dict[tuple[str, str], "Histogram"] = {}
+_invocations: dict[tuple[str, str], int] = {}
+_errors: dict[tuple[str, str], int] = {}
+_operations: dict[tuple[str, str, str], int] = {}
+_budgets: dict[tuple[str, str], int] = {}
+_over_budget: dict[tuple[str, str], int] = {}
+_pending_ops: dict[int, str] = {}
+
+_current: contextvars.ContextVar["Invocation | None"] = contextvars.ContextVar("arbor_invocation", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class Invocation:
+    """Time and database work attributed to one command or listener run."""
+
+    __slots__ = ("kind", "name", "budget", "started", "db_seconds", "db_ops", "operations", "api_seconds", "finished")
+
+    def __init__(self, kind: str, name: str, budget: int | None = None):
+        self.kind = kind
+        self.name = name
+        self.budget = budget
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.db_ops = 0
+        self.operations: dict[str, int] = {}
+        self.api_seconds = 0.0
+        self.finished = False
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.db_ops > self.budget
+
+    def breakdown(self) -> str:
+        return ", ".join(f"{op} x{n}" for op, n in sorted(self.operations.items(), key=lambda i: -i[1]))
+
+
+def current() -> Invocation | None:
+    return _current.get()
+
+
+def db_budget(operations: int):
+    """Declare the most database round-trips one run of the decorated handler may make.
+
+    Apply it directly above ``async def``, under the command or listener decorators.
+    """
+    def decorator(func):
+        func.__arbor_db_budget__ = operations
+        return func
+    return decorator
+
+
+def budget_of(func) -> int | None:
+    return getattr(func, "__arbor_db_budget__", None)
+
+
+def begin(kind: str, name: str, budget: int | None = None) -> Invocation:
+    invocation = Invocation(kind, name, budget)
+    _current.set(invocation)
+    return invocation
+
+
+def finish(invocation: Invocation | None, failed: bool = False) -> None:
+    if invocation is None or invocation.finished:
+        return
+    invocation.finished = True
+    total = time.perf_counter() - invocation.started
+    render = max(0.0, total - invocation.db_seconds - invocation.api_seconds)
+    key = (invocation.kind, invocation.name)
+    with _lock:
+        for phase, value in zip(_PHASES, (total, invocation.db_seconds, invocation.api_seconds, render)):
+            hist = _latency.get(key + (phase,))
+            if hist is None:
+                hist = _latency[key + (phase,)] = Histogram(_LATENCY_BUCKETS)
+            hist.observe(value)
+        hist = _db_ops.get(key)
+        if hist is None:
+            hist = _db_ops[key] = Histogram(_COUNT_BUCKETS)
+        hist.observe(invocation.db_ops)
+        _invocations[key] = _invocations.get(key, 0) + 1
+        if failed:
+            _errors[key] = _errors.get(key, 0) + 1
+        for op, count in invocation.operations.items():
+            _operations[key + (op,)] = _operations.get(key + (op,), 0) + count
+        if invocation.budget is not None:
+            _budgets[key] = invocation.budget
+        first_overrun = False
+        if invocation.over_budget:
+            first_overrun = key not in _over_budget
+            _over_budget[key] = _over_budget.get(key, 0) + 1
+    if first_overrun:
+        print(
+            f"{invocation.kind} {invocation.name} made {invocation.db_ops} database round-trips, "
+            f"over its budget of {invocation.budget}: {invocation.breakdown()}"
+        )
+
+
+def record_db(seconds: float, operation: str = "unknown") -> None:
+    invocation = _current.get()
+    if invocation is not None:
+        invocation.db_seconds += seconds
+        invocation.db_ops += 1
+        invocation.operations[operation] = invocation.operations.get(operation, 0) + 1
+
+
+def listener(name: str):
+    """Wrap an event listener so each call is recorded under ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            invocation = Invocation("listener", name, budget_of(func))
+            token = _current.set(invocation)
+            failed = False
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                finish(invocation, failed)
+                _current.reset(token)
+        return wrapper
+    return decorator
+
+
+def _operation_name(command_name: str, command) -> str:
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return f"{target}.{command_name}" if isinstance(target, str) else command_name
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attributes every MongoDB command to the invocation in whose context it ran."""
+
+    def started(self, event):
+        if _current.get() is not None:
+            _pending_ops[event.request_id] = _operation_name(event.command_name, event.command)
+
+    def succeeded(self, event):
+        record_db(event.duration_micros / 1_000_000, _pending_ops.pop(event.request_id, event.command_name))
+
+    def failed(self, event):
+        record_db(event.duration_micros / 1_000_000, _pending_ops.pop(event.request_id, event.command_name))
+
+
+def _timed_request(request):
+    @functools.wraps(request)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await request(*args, **kwargs)
+        finally:
+            invocation = _current.get()
+            if invocation is not None:
+                invocation.api_seconds += time.perf_counter() - started
+    return wrapper
+
+
+def install(bot) -> None:
+    """Attach invoke hooks, Discord HTTP timing and the pymongo listener to ``bot``.
+
+    Must run before the MongoClient is created for database timings to be recorded.
+    """
+    from discord.webhook import async_ as webhook_async
+
+    monitoring.register(MongoCommandListener())
+
+    async def before_invoke(ctx):
+        begin("command", ctx.command.qualified_name, budget_of(ctx.command.callback))
+
+    async def after_invoke(ctx):
+        finish(_current.get(), ctx.command_failed)
+
+    async def on_command_error(ctx, error):
+        invocation = _current.get()
+        if invocation is not None and ctx.command is not None and invocation.name == ctx.command.qualified_name:
+            finish(invocation, True)
+
+    bot.before_invoke(before_invoke)
+    bot.after_invoke(after_invoke)
+    bot.add_listener(on_command_error, "on_command_error")
+    bot.http.request = _timed_request(bot.http.request)
+    # Interaction responses and followups go through the webhook adapter, not bot.http.
+    adapter = webhook_async.AsyncWebhookAdapter
+    if not getattr(adapter.request, "_arbor_timed", False):
+        adapter.request = _timed_request(adapter.request)
+        adapter.request._arbor_timed = True
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _render_histogram(lines: list[str], metric: str, hist: Histogram, **labels) -> None:
+    cumulative = 0
+    for bound, count in zip(hist.buckets, hist.counts):
+        cumulative += count
+        lines.append(f"{metric}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{metric}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+    lines.append(f"{metric}_sum{_labels(**labels)} {hist.sum}")
+    lines.append(f"{metric}_count{_labels(**labels)} {hist.count}")
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines: list[str] = []
+    with _lock:
+        lines.append("# HELP arbor_handler_seconds Wall time per command or listener run, split by phase.")
+        lines.append("# TYPE arbor_handler_seconds histogram")
+        for (kind, name, phase), hist in sorted(_latency.items()):
+            _render_histogram(lines, "arbor_handler_seconds", hist, kind=kind, handler=name, phase=phase)
+        lines.append("# HELP arbor_handler_db_operations MongoDB operations per command or listener run.")
+        lines.append("# TYPE arbor_handler_db_operations histogram")
+        for (kind, name), hist in sorted(_db_ops.items()):
+            _render_histogram(lines, "arbor_handler_db_operations", hist, kind=kind, handler=name)
+        lines.append("# HELP arbor_db_operations_total MongoDB operations by the command or listener that caused them.")
+        lines.append("# TYPE arbor_db_operations_total counter")
+        for (kind, name, op), value in sorted(_operations.items()):
+            lines.append(f"arbor_db_operations_total{_labels(kind=kind, handler=name, operation=op)} {value}")
+        lines.append("# HELP arbor_handler_db_budget Declared database round-trip budget per run.")
+        lines.append("# TYPE arbor_handler_db_budget gauge")
+        for (kind, name), value in sorted(_budgets.items()):
+            lines.append(f"arbor_handler_db_budget{_labels(kind=kind, handler=name)} {value}")
+        lines.append("# HELP arbor_handler_over_budget_total Runs that made more database round-trips than their budget.")
+        lines.append("# TYPE arbor_handler_over_budget_total counter")
+        for (kind, name), value in sorted(_over_budget.items()):
+            lines.append(f"arbor_handler_over_budget_total{_labels(kind=kind, handler=name)} {value}")
+        lines.append("# HELP arbor_handler_invocations_total Completed command or listener runs.")
+        lines.append("# TYPE arbor_handler_invocations_total counter")
+        for (kind, name), value in sorted(_invocations.items()):
+            lines.append(f"arbor_handler_invocations_total{_labels(kind=kind, handler=name)} {value}")
+        lines.append("# HELP arbor_handler_errors_total Command or listener runs that raised.")
+        lines.append("# TYPE arbor_handler_errors_total counter")
+        for (kind, name), value in sorted(_errors.items()):
+            lines.append(f"arbor_handler_errors_total{_labels(kind=kind, handler=name)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(body=render().encode("utf-8"),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def start_server(host: str, port: int) -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
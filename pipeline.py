@@ -0,0 +1,140 @@
+"""One ``on_message`` listener for every feature that reacts to chat.
+
+Cogs register stages instead of their own listeners. A message is filtered
+once: bot authors and DMs never reach a stage, and prefix commands and
+interaction responses only reach stages registered with ``commands=True``.
+Stages that pass get one shared ``MessageContext``. It holds the mention ids
+and, on first use, the author's language and the AFK entries of the author and
+the members they mention. A second stage asking for the same thing reuses it.
+
+Stages run one after another in registration order, and an error in one does
+not stop the others. Metrics record one ``pipeline.on_message`` listener run per
+message that passes the filters, with the stages' budgets added up.
+"""
+import database
+import i18n
+import metrics
+import records
+import shared_cache
+
+# The bot's command prefix; bot.py passes it to the client.
+PREFIX = "a."
+
+_UNSET = object()
+
+
+def get_afk(user_id: int) -> records.AfkEntry | None:
+    def load():
+        return database.get_database().afk.find_one({"user_id": user_id}, records.AfkEntry.PROJECTION)
+    doc = shared_cache.get_cache("afk").get(user_id, load)
+    return records.AfkEntry.from_doc(doc) if doc else None
+
+
+class MessageContext:
+    __slots__ = ("message", "guild", "channel", "author", "is_command", "mention_ids", "_language", "_afk")
+
+    def __init__(self, message):
+        self.message = message
+        self.guild = message.guild
+        self.channel = message.channel
+        self.author = message.author
+        self.is_command = bool(message.interaction_metadata) or message.content.startswith(PREFIX)
+        author_id = message.author.id
+        # Mentioned members in order, without the author or repeats.
+        self.mention_ids = tuple(dict.fromkeys(u.id for u in message.mentions if u.id != author_id))
+        self._language = None
+        self._afk = _UNSET
+
+    @property
+    def language(self) -> str:
+        if self._language is None:
+            self._language = i18n.get_user_language(self.author.id)
+        return self._language
+
+    def t(self, key: str, **kwargs) -> str:
+        """``i18n.t`` in the author's language."""
+        return i18n.translate(self.language, key, **kwargs)
+
+    @property
+    def afk(self) -> dict[int, records.AfkEntry]:
+        """AFK entries of the author and the mentioned members, by user id."""
+        if self._afk is _UNSET:
+            entries = {}
+            for user_id in (self.author.id, *self.mention_ids):
+                entry = get_afk(user_id)
+                if entry is not None:
+                    entries[user_id] = entry
+            self._afk = entries
+        return self._afk
+
+
+class Stage:
+    __slots__ = ("name", "handler", "commands")
+
+    def __init__(self, name: str, handler, commands: bool):
+        self.name = name
+        self.handler = handler
+        self.commands = commands
+
+
+class MessagePipeline:
+    def __init__(self):
+        self._stages: list[Stage] = []
+        self.__arbor_db_budget__ = 0
+
+    @property
+    def stages(self) -> list[str]:
+        return [stage.name for stage in self._stages]
+
+    def register(self, name: str, handler, *, commands: bool = False):
+        """Run ``handler(ctx)`` for guild messages from users; ``commands`` includes prefix commands too."""
+        self.unregister(name)
+        self._stages.append(Stage(name, handler, commands))
+        self._update_budget()
+
+    def unregister(self, name: str):
+        self._stages = [stage for stage in self._stages if stage.name != name]
+        self._update_budget()
+
+    def _update_budget(self):
+        # Read by metrics.budget_of, like a budget declared on a listener.
+        budgets = [metrics.budget_of(stage.handler) for stage in self._stages]
+        self.__arbor_db_budget__ = None if None in budgets else sum(budgets)
+
+    async def __call__(self, message):
+        if message.author.bot or not message.guild or not self._stages:
+            return
+        ctx = MessageContext(message)
+        invocation = metrics.begin("listener", "pipeline.on_message", self.__arbor_db_budget__)
+        failed = False
+        for stage in self._stages:
+            if ctx.is_command and not stage.commands:
+                continue
+            try:
+                await stage.handler(ctx)
+            except Exception as e:
+                failed = True
+                print(f"Error in message stage {stage.name}: {e}")
+        metrics.finish(invocation, failed)
+
+
+_pipeline: MessagePipeline | None = None
+
+
+def get_pipeline() -> MessagePipeline:
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = MessagePipeline()
+    return _pipeline
+
+
+def register(name: str, handler, *, commands: bool = False) -> None:
+    get_pipeline().register(name, handler, commands=commands)
+
+
+def unregister(name: str) -> None:
+    get_pipeline().unregister(name)
+
+
+async def dispatch(message) -> None:
+    await get_pipeline()(message)
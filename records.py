@@ -0,0 +1,126 @@
+"""Typed records for stored documents.
+
+Each record names the fields its read paths use in ``PROJECTION``. Queries pass
+that projection so only those fields are fetched, and ``from_doc`` builds the
+record from the projected document.
+"""
+import datetime
+from dataclasses import dataclass
+
+from bson.objectid import ObjectId
+
+
+def _utc(value) -> datetime.datetime | None:
+    if not isinstance(value, datetime.datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+@dataclass(frozen=True, slots=True)
+class Warning:
+    id: ObjectId | None
+    case_id: int | None
+    user_id: int | None
+    moderator_id: int | None
+    reason: str
+    created_at: datetime.datetime | None
+    attachment_url: str | None = None
+
+    # The list view shows neither the user nor the attachment.
+    LIST_PROJECTION = {"case_id": 1, "moderator_id": 1, "reason": 1, "created_at": 1}
+    PROJECTION = {**LIST_PROJECTION, "user_id": 1, "attachment.url": 1}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Warning":
+        attachment = doc.get("attachment")
+        return cls(
+            id=doc.get("_id"),
+            case_id=doc.get("case_id"),
+            user_id=doc.get("user_id"),
+            moderator_id=doc.get("moderator_id"),
+            reason=doc.get("reason") or "",
+            created_at=_utc(doc.get("created_at")),
+            attachment_url=attachment.get("url") if isinstance(attachment, dict) else None,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Reminder:
+    id: ObjectId
+    user_id: int
+    channel_id: int
+    message: str
+    remind_at: datetime.datetime | None
+
+    PROJECTION = {"user_id": 1, "channel_id": 1, "message": 1, "remind_at": 1}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Reminder":
+        return cls(
+            id=doc["_id"],
+            user_id=doc.get("user_id"),
+            channel_id=doc.get("channel_id"),
+            message=doc.get("message") or "",
+            remind_at=_utc(doc.get("remind_at")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Lock:
+    id: ObjectId
+    guild_id: int
+    channel_id: int
+    # (role_id, send_messages before the lock) for every role the lock changed.
+    previous_overwrites: tuple[tuple[int, bool | None], ...]
+    previous_send_messages: bool | None
+
+    PROJECTION = {"guild_id": 1, "channel_id": 1, "previous_overwrites": 1, "previous_send_messages": 1}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Lock":
+        return cls(
+            id=doc["_id"],
+            guild_id=doc.get("guild_id"),
+            channel_id=doc.get("channel_id"),
+            previous_overwrites=tuple(
+                (entry["role_id"], entry.get("prev")) for entry in doc.get("previous_overwrites") or ()
+            ),
+            previous_send_messages=doc.get("previous_send_messages"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class AfkEntry:
+    message: str
+    set_at: datetime.datetime
+
+    PROJECTION = {"_id": 0, "message": 1, "set_at": 1}
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "AfkEntry":
+        return cls(message=doc.get("message") or "", set_at=_utc(doc.get("set_at")) or datetime.datetime.now(datetime.timezone.utc))
+
+    def to_doc(self) -> dict:
+        return {"message": self.message, "set_at": self.set_at}
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    guild_id: int
+    logs_channel_id: int | None = None
+    log_warnings: bool = True
+    log_locks: bool = True
+    log_slowmode: bool = True
+    notify_dm: bool = True
+    automod: bool = False
+
+    PROJECTION = {
+        "_id": 0, "logs_channel_id": 1, "log_warnings": 1, "log_locks": 1, "log_slowmode": 1, "notify_dm": 1, "automod": 1,
+    }
+
+    @classmethod
+    def from_doc(cls, guild_id: int, doc: dict | None) -> "Settings":
+        fields = {name: doc[name] for name in cls.PROJECTION if name != "_id" and doc and doc.get(name) is not None}
+        return cls(guild_id=guild_id, **fields)
@@ -0,0 +1,240 @@
+"""Two-level cache: an in-process LRU in front of Redis.
+
+Each process keeps recently used values in memory for up to ``local_ttl`` seconds.
+With ``[shared_cache] redis`` enabled, values are also stored in Redis. Every write
+publishes the key on ``<prefix>:invalidate`` so the other processes drop their
+local copy. Without Redis this is a plain local cache.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+
+from cachetools import TTLCache
+
+import config
+
+_MISSING = object()
+# Tags invalidations so a process skips the ones it published itself.
+_INSTANCE = uuid.uuid4().hex
+
+_client = None
+_listener = None
+_started = False
+_start_lock = threading.Lock()
+_caches: dict[str, "SharedCache"] = {}
+
+
+def _default(value):
+    if isinstance(value, datetime.datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"cannot cache a {type(value).__name__}")
+
+
+def _object_hook(obj: dict):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _encode(value) -> str:
+    return json.dumps(value, default=_default, separators=(",", ":"))
+
+
+def _decode(raw: str | bytes):
+    return json.loads(raw, object_hook=_object_hook)
+
+
+class SharedCache:
+    """One namespace of cached values, such as language preferences by user id.
+
+    ``None`` is a valid value, so "this user is not AFK" is cached as well.
+    """
+
+    def __init__(self, namespace: str, maxsize: int, local_ttl: float, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self._lock = threading.Lock()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{config.config_data.shared_cache.prefix}:{self.namespace}:{key}"
+
+    def _store_local(self, key: str, value):
+        with self._lock:
+            self._local[key] = value
+
+    def drop_local(self, key):
+        with self._lock:
+            self._local.pop(str(key), None)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def get(self, key, loader):
+        """Return the value for ``key``, calling ``loader()`` on a miss in both tiers.
+
+        Exceptions from ``loader`` propagate and nothing is cached.
+        """
+        key = str(key)
+        with self._lock:
+            value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        client = _client
+        if client is not None:
+            try:
+                raw = client.get(self._redis_key(key))
+            except Exception:
+                raw = None
+            if raw is not None:
+                self.remote_hits += 1
+                value = _decode(raw)
+                self._store_local(key, value)
+                return value
+        self.misses += 1
+        value = loader()
+        self._store_local(key, value)
+        if client is not None:
+            try:
+                # nx: a write from another process while we were loading wins.
+                client.set(self._redis_key(key), _encode(value), ex=self.ttl, nx=True)
+            except Exception:
+                pass
+        return value
+
+    def set(self, key, value):
+        """Write through after the database has been updated."""
+        key = str(key)
+        self._store_local(key, value)
+        client = _client
+        if client is not None:
+            try:
+                client.set(self._redis_key(key), _encode(value), ex=self.ttl)
+                _publish(client, self.namespace, key)
+            except Exception as e:
+                print(f"Failed to update shared cache {self.namespace}:{key}: {e}")
+
+    def invalidate(self, key):
+        """Forget ``key`` everywhere; the next read goes to the database."""
+        key = str(key)
+        self.drop_local(key)
+        client = _client
+        if client is not None:
+            try:
+                client.delete(self._redis_key(key))
+                _publish(client, self.namespace, key)
+            except Exception as e:
+                print(f"Failed to invalidate shared cache {self.namespace}:{key}: {e}")
+
+
+def _channel() -> str:
+    return f"{config.config_data.shared_cache.prefix}:invalidate"
+
+
+def _publish(client, namespace: str, key: str):
+    client.publish(_channel(), f"{_INSTANCE}:{namespace}:{key}")
+
+
+def _on_invalidate(message: dict):
+    data = message.get("data")
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    if not isinstance(data, str):
+        return
+    sender, _, rest = data.partition(":")
+    namespace, _, key = rest.partition(":")
+    cache = _caches.get(namespace)
+    if sender != _INSTANCE and cache is not None:
+        cache.drop_local(key)
+
+
+def _on_listener_error(error, pubsub, thread):
+    # Invalidations may have been missed while disconnected.
+    print(f"Shared cache invalidation listener error: {error}")
+    for cache in list(_caches.values()):
+        cache.clear_local()
+    time.sleep(1)
+
+
+def _subscribe(client):
+    global _listener
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{_channel(): _on_invalidate})
+    _listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_on_listener_error)
+
+
+def _connect():
+    import redis
+
+    url = os.getenv("redis", "redis://localhost:6379/0")
+    client = redis.Redis.from_url(url, decode_responses=True, socket_timeout=2, socket_connect_timeout=2)
+    client.ping()
+    return client
+
+
+def _ensure_started():
+    global _client, _started
+    if _started:
+        return
+    with _start_lock:
+        if _started:
+            return
+        if config.config_data.shared_cache.redis:
+            try:
+                client = _connect()
+                _subscribe(client)
+                _client = client
+            except Exception as e:
+                print(f"Redis unavailable, using process-local caches only: {e}")
+        _started = True
+
+
+def get_cache(namespace: str) -> SharedCache:
+    _ensure_started()
+    cache = _caches.get(namespace)
+    if cache is None:
+        settings = config.config_data.shared_cache
+        cache = _caches.setdefault(
+            namespace, SharedCache(namespace, settings.local_size, settings.local_ttl, settings.ttl)
+        )
+    return cache
+
+
+def get_client():
+    """The Redis client, or ``None`` when running with local caches only."""
+    _ensure_started()
+    return _client
+
+
+def set_client(client) -> None:
+    """Swap the Redis client (``None`` for local-only) and start with empty caches."""
+    global _client, _started
+    close()
+    with _start_lock:
+        _caches.clear()
+        if client is not None:
+            _subscribe(client)
+        _client = client
+        _started = True
+
+
+def close() -> None:
+    global _client, _listener, _started
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _client is not None:
+        try:
+            _client.close()
+        except Exception:
+            pass
+        _client = None
+    _started = False
@@ -0,0 +1,227 @@
+"""Time expressions typed by users: durations, and moments for reminders and schedules.
+
+``parse_duration`` reads durations such as ``10m``, ``1h30m``, ``2 hours 15 minutes``
+or ``1:30``. ``parse_when`` reads a moment: a duration from now (``in 2 hours``), a
+time of day (``21:00``, ``9pm``, ``tomorrow 9:00``, ``friday at noon``) or a date
+(``12/31/2025 18:00``, ``2025-12-31 18:00``). Dates and times of day are read in
+the given timezone, and the result is always in UTC.
+
+All grammars are compiled once. Parsing a text yields a spec that does not
+depend on the current time, so specs are memoized by text and only resolved
+against ``now`` on each call.
+"""
+import datetime
+import functools
+import re
+import zoneinfo
+
+UTC = datetime.timezone.utc
+
+_UNITS = {
+    "w": 604800, "week": 604800, "weeks": 604800,
+    "d": 86400, "day": 86400, "days": 86400,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+}
+_UNIT = "|".join(sorted(_UNITS, key=len, reverse=True))
+_PART = rf"(\d+)\s*({_UNIT})(?![a-z])"
+_DURATION = re.compile(rf"(?:{_PART}\s*(?:,|and)?\s*)+")
+_DURATION_PART = re.compile(_PART)
+_CLOCK_DURATION = re.compile(r"(\d+):([0-5]\d)")
+_IN = re.compile(r"in\s+(.+)")
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_CLOCK = r"(?:(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm)?|(?P<named>noon|midnight))"
+_DAY = rf"(?P<day>today|tomorrow|(?P<next>next\s+)?(?P<weekday>{'|'.join(_WEEKDAYS)}))"
+_RELATIVE = re.compile(rf"(?:{_DAY}(?:\s+|$))?(?:(?:at\s+)?{_CLOCK})?")
+_US_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})\s+(\d{1,2}):(\d{2})")
+_ISO_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[\st](\d{1,2}):(\d{2}))?")
+_OFFSET = re.compile(r"(?:utc|gmt)?\s*([+-])(\d{1,2})(?::?(\d{2}))?")
+_SPACES = re.compile(r"\s+")
+# Anything longer is a typo, and adding it to the current time could overflow.
+_LONGEST = datetime.timedelta(days=3653)
+
+
+class _Spec:
+    """A parsed expression, resolved against the current time by ``resolve``."""
+
+    __slots__ = ("delta", "date", "day", "weekday", "skip_today", "clock")
+
+    def __init__(self, delta=None, date=None, day=None, weekday=None, skip_today=False, clock=None):
+        self.delta = delta
+        self.date = date
+        # Days after today for "today" and "tomorrow".
+        self.day = day
+        self.weekday = weekday
+        self.skip_today = skip_today
+        # (hour, minute), or None to keep the current time of day.
+        self.clock = clock
+
+    def resolve(self, now: datetime.datetime, tz: datetime.tzinfo) -> datetime.datetime:
+        if self.delta is not None:
+            return now + self.delta
+        if self.date is not None:
+            return datetime.datetime(*self.date, tzinfo=tz).astimezone(UTC)
+        local = now.astimezone(tz)
+        date = local.date()
+        # A bare time of day that has passed means tomorrow; a weekday means next week.
+        rollover = None
+        if self.weekday is not None:
+            ahead = (self.weekday - date.weekday()) % 7
+            if ahead == 0 and self.skip_today:
+                ahead = 7
+            date += datetime.timedelta(days=ahead)
+            rollover = 7
+        elif self.day is not None:
+            date += datetime.timedelta(days=self.day)
+        else:
+            rollover = 1
+        hour, minute = self.clock if self.clock is not None else (local.hour, local.minute)
+        target = datetime.datetime.combine(date, datetime.time(hour, minute), tzinfo=tz)
+        if rollover and target <= local:
+            target += datetime.timedelta(days=rollover)
+        return target.astimezone(UTC)
+
+
+def _normalise(text: str) -> str:
+    return _SPACES.sub(" ", text.strip().lower())
+
+
+def _duration(text: str) -> datetime.timedelta | None:
+    if _DURATION.fullmatch(text):
+        seconds = sum(int(amount) * _UNITS[unit] for amount, unit in _DURATION_PART.findall(text))
+        if seconds > _LONGEST.total_seconds():
+            return None
+        return datetime.timedelta(seconds=seconds)
+    return None
+
+
+def _clock(match: re.Match) -> tuple[int, int] | None:
+    if match.group("named"):
+        return (12, 0) if match.group("named") == "noon" else (0, 0)
+    if match.group("hour") is None:
+        return None
+    hour, minute = int(match.group("hour")), int(match.group("minute") or 0)
+    meridiem = match.group("meridiem")
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError("hour out of range for am/pm")
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif match.group("minute") is None:
+        # A bare number such as "tomorrow 9" is too ambiguous to guess.
+        raise ValueError("time of day needs minutes or am/pm")
+    datetime.time(hour, minute)
+    return hour, minute
+
+
+def _date(*parts) -> tuple | None:
+    values = tuple(int(p) for p in parts if p is not None)
+    datetime.datetime(*values)
+    return values
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_when(text: str) -> _Spec | None:
+    match = _IN.fullmatch(text)
+    delta = _duration(match.group(1) if match else text)
+    if delta is not None:
+        return _Spec(delta=delta)
+    try:
+        if match := _US_DATE.fullmatch(text):
+            month, day, year, hour, minute = match.groups()
+            return _Spec(date=_date(year, month, day, hour, minute))
+        if match := _ISO_DATE.fullmatch(text):
+            return _Spec(date=_date(*match.groups()))
+        if match := _RELATIVE.fullmatch(text):
+            clock = _clock(match)
+            day = match.group("day")
+            if day is None:
+                return _Spec(clock=clock) if clock is not None else None
+            if match.group("weekday"):
+                return _Spec(
+                    weekday=_WEEKDAYS.index(match.group("weekday")),
+                    skip_today=bool(match.group("next")), clock=clock,
+                )
+            if day == "today" and clock is None:
+                # Today at the current minute has already passed.
+                return None
+            return _Spec(day=0 if day == "today" else 1, clock=clock)
+    except ValueError:
+        return None
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_duration(text: str) -> datetime.timedelta | None:
+    delta = _duration(text)
+    if delta is not None:
+        return delta
+    match = _CLOCK_DURATION.fullmatch(text)
+    if match:
+        seconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60
+        if seconds > _LONGEST.total_seconds():
+            return None
+        return datetime.timedelta(seconds=seconds)
+    return None
+
+
+def parse_duration(text: str | None) -> datetime.timedelta | None:
+    """``10m``, ``1h30m``, ``2 hours 15 minutes`` or ``1:30`` (hours and minutes); at most about ten years."""
+    if not text:
+        return None
+    return _compile_duration(_normalise(text))
+
+
+def parse_when(text: str | None, tz: datetime.tzinfo = UTC,
+               now: datetime.datetime | None = None) -> datetime.datetime | None:
+    """The UTC moment ``text`` refers to, reading dates and times of day in ``tz``."""
+    if not text:
+        return None
+    spec = _compile_when(_normalise(text))
+    if spec is None:
+        return None
+    try:
+        return spec.resolve(now or datetime.datetime.now(UTC), tz)
+    except (OverflowError, ValueError):
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _zone_names() -> dict[str, str]:
+    return {name.lower(): name for name in zoneinfo.available_timezones()}
+
+
+def zone(name: str | None) -> datetime.tzinfo | None:
+    """A timezone from an IANA name (any case) or a UTC offset like ``+02:00``; None if unknown."""
+    if not name:
+        return None
+    name = name.strip()
+    if name.upper() in ("UTC", "GMT", "Z"):
+        return UTC
+    match = _OFFSET.fullmatch(name.lower())
+    if match:
+        sign, hours, minutes = match.groups()
+        offset = datetime.timedelta(hours=int(hours), minutes=int(minutes or 0))
+        if offset > datetime.timedelta(hours=14):
+            return None
+        return datetime.timezone(-offset if sign == "-" else offset)
+    key = _zone_names().get(name.lower())
+    if key is None:
+        return None
+    try:
+        return zoneinfo.ZoneInfo(key)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def zone_name(tz: datetime.tzinfo) -> str:
+    """The name ``zone`` reads back: the IANA key, or a UTC offset."""
+    if isinstance(tz, zoneinfo.ZoneInfo):
+        return tz.key
+    offset = tz.utcoffset(None) or datetime.timedelta()
+    if not offset:
+        return "UTC"
+    minutes = int(offset.total_seconds()) // 60
+    sign = "+" if minutes >= 0 else "-"
+    return f"UTC{sign}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+import hashlib
+import importlib
+from typing import Protocol
+
+from cachetools import LRUCache
+
+import config
+import database
+
+# Locale file codes that differ from the codes translation services expect.
+_TARGET_CODES = {"jajp": "ja", "ukua": "uk"}
+_MAX_CHARS = 5000
+
+_cache: LRUCache = LRUCache(maxsize=2048)
+_inflight: dict[tuple[str, str], asyncio.Task] = {}
+_backend = None
+
+
+class Backend(Protocol):
+    def translate(self, text: str, target: str) -> str: ...
+
+
+class GoogleBackend:
+    def translate(self, text: str, target: str) -> str:
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source="auto", target=target).translate(text)
+
+
+def _load_backend(name: str) -> Backend:
+    if name == "google":
+        return GoogleBackend()
+    module_name, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def get_backend() -> Backend:
+    global _backend
+    if _backend is None:
+        _backend = _load_backend(config.config_data.translation.backend)
+    return _backend
+
+
+def set_backend(backend: Backend | None) -> None:
+    """Swap the translator (``None`` reloads the configured one) and drop cached results."""
+    global _backend
+    _backend = backend
+    _cache.clear()
+
+
+def target_code(language: str) -> str:
+    return _TARGET_CODES.get(language, language)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _translate_blocking(digest: str, text: str, target: str) -> str:
+    doc_id = f"{digest}:{target}"
+    try:
+        doc = database.get_database().translation_cache.find_one({"_id": doc_id}, {"text": 1})
+        if doc and isinstance(doc.get("text"), str):
+            return doc["text"]
+    except Exception:
+        pass
+    translated = get_backend().translate(text, target)
+    try:
+        database.get_database().translation_cache.update_one(
+            {"_id": doc_id},
+            {"$set": {"text": translated, "target": target, "created_at": datetime.datetime.now(datetime.timezone.utc)}},
+            upsert=True,
+        )
+    except Exception:
+        pass
+    return translated
+
+
+async def translate(text: str, language: str) -> str:
+    """Translate ``text`` into the i18n ``language``, using the memory and database caches."""
+    text = text[:_MAX_CHARS]
+    target = target_code(language)
+    key = (_text_hash(text), target)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(asyncio.to_thread(_translate_blocking, key[0], text, target))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    translated = await asyncio.shield(task)
+    _cache[key] = translated
+    return translated
@@ -0,0 +1,154 @@
+"""Write-behind buffer for writes that do not need to be durable immediately.
+
+Writes are queued per collection and coalesced per filter. They are sent as one
+ordered ``bulk_write`` per collection every ``interval`` seconds, or sooner once
+``max_pending`` writes are waiting. A failed flush is logged and its writes are
+dropped, so only route data here that the bot can afford to lose, such as audit
+entries and cleanups.
+"""
+import asyncio
+import itertools
+
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+import config
+import database
+
+# How a later update operator combines with a pending one on the same field.
+_MERGE = {
+    "$set": lambda old, new: new,
+    "$setOnInsert": lambda old, new: old,
+    "$inc": lambda old, new: old + new,
+    "$max": max,
+    "$min": min,
+}
+
+
+def _key(filter: dict) -> tuple:
+    return tuple(sorted(filter.items()))
+
+
+def _merge(update: dict, newer: dict) -> dict:
+    merged = {op: dict(fields) for op, fields in update.items()}
+    for op, fields in newer.items():
+        if op not in _MERGE:
+            raise ValueError(f"write buffer cannot coalesce {op}")
+        target = merged.setdefault(op, {})
+        for name, value in fields.items():
+            target[name] = _MERGE[op](target[name], value) if name in target else value
+    return merged
+
+
+def _request(op: tuple):
+    kind = op[0]
+    if kind == "insert":
+        return InsertOne(op[1])
+    if kind == "update":
+        return UpdateOne(op[1], op[2], upsert=op[3])
+    return DeleteOne(op[1])
+
+
+class WriteBuffer:
+    def __init__(self, interval: float = 1.0, max_pending: int = 500):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.flushed = 0
+        self.dropped = 0
+        self._pending: dict[str, dict[tuple, list[tuple]]] = {}
+        self._count = 0
+        self._inserts = itertools.count()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self):
+        return self._count
+
+    def _ops(self, collection: str, key: tuple) -> list[tuple]:
+        return self._pending.setdefault(collection, {}).setdefault(key, [])
+
+    def _added(self, count: int = 1):
+        self._count += count
+        if self._count >= self.max_pending:
+            self._full.set()
+
+    def insert(self, collection: str, document: dict):
+        self._ops(collection, ("insert", next(self._inserts))).append(("insert", document))
+        self._added()
+
+    def update(self, collection: str, filter: dict, update: dict, upsert: bool = False):
+        """Queue an update; consecutive updates to the same filter become one."""
+        ops = self._ops(collection, _key(filter))
+        if ops and ops[-1][0] == "update":
+            _, _, pending, pending_upsert = ops[-1]
+            ops[-1] = ("update", filter, _merge(pending, update), pending_upsert or upsert)
+        else:
+            ops.append(("update", filter, _merge({}, update), upsert))
+            self._added()
+
+    def delete(self, collection: str, filter: dict):
+        """Queue a delete; it supersedes anything still pending for the same filter."""
+        ops = self._ops(collection, _key(filter))
+        self._count -= len(ops)
+        ops[:] = [("delete", filter)]
+        self._added()
+
+    async def flush(self):
+        async with self._flush_lock:
+            pending, self._pending, self._count = self._pending, {}, 0
+            self._full.clear()
+            for collection, keyed in pending.items():
+                requests = [_request(op) for ops in keyed.values() for op in ops]
+                if not requests:
+                    continue
+                try:
+                    await asyncio.to_thread(database.get_database()[collection].bulk_write, requests, ordered=True)
+                    self.flushed += len(requests)
+                except Exception as e:
+                    self.dropped += len(requests)
+                    print(f"Write buffer dropped {len(requests)} write(s) to {collection}: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and drain what is left."""
+        if self._task is not None:
+            # Waits for a flush in progress instead of cancelling it halfway.
+            async with self._flush_lock:
+                self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._count:
+                await self.flush()
+
+
+_buffer: WriteBuffer | None = None
+
+
+def get_buffer() -> WriteBuffer:
+    global _buffer
+    if _buffer is None:
+        settings = config.config_data.write_buffer
+        _buffer = WriteBuffer(settings.interval, settings.max_pending)
+    return _buffer
+
+
+def start() -> None:
+    get_buffer().start()
+
+
+async def stop() -> None:
+    global _buffer
+    if _buffer is not None:
+        await _buffer.stop()
+        _buffer = None